@@ -1,3 +1,9 @@
+from django.utils.cache import get_conditional_response
+from rest_framework import serializers
+
+from normandy.base.api.pagination import KeysetPagination
+from normandy.base.api.responses import cached_response
+from normandy.base.api.utils import get_request_fingerprint, parse_field_paths
 from normandy.base.decorators import api_cache_control
 
 
@@ -11,3 +17,158 @@ class CachingViewsetMixin(object):
     @api_cache_control()
     def list(self, request, *args, **kwargs):
         return super().list(request, *args, **kwargs)
+
+
+class ETagViewsetMixin(object):
+    """
+    Add ETags to read methods, and answer matching If-None-Match requests with a 304.
+
+    Subclasses must implement `get_collection_version`, returning a value that
+    changes whenever any data served by the viewset changes. The ETag is
+    derived from it and the request, so checking it doesn't build a queryset.
+    """
+
+    def get_collection_version(self):
+        raise NotImplementedError()
+
+    def get_etag(self, request):
+        return '"{}"'.format(get_request_fingerprint(request, self.get_collection_version()))
+
+    def conditional_response(self, view_method, request, *args, **kwargs):
+        etag = self.get_etag(request)
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = view_method(request, *args, **kwargs)
+        if response.status_code in [200, 304]:
+            response["ETag"] = etag
+        return response
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(super().retrieve, request, *args, **kwargs)
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(super().list, request, *args, **kwargs)
+
+
+class ResponseCacheViewsetMixin(object):
+    """
+    Serve list responses from Django's cache backend, when enabled by settings.
+
+    Subclasses must implement `get_collection_version` (see `ETagViewsetMixin`).
+    Cached entries are keyed on it, so they stop being used as soon as the
+    data changes.
+    """
+
+    def list(self, request, *args, **kwargs):
+        view_method = super().list
+        return cached_response(
+            request,
+            self.get_collection_version(),
+            lambda: view_method(request, *args, **kwargs),
+        )
+
+
+class CursorPaginationViewsetMixin(object):
+    """
+    Paginate lists by cursor instead of by page number when the `cursor`
+    query parameter is given. It may be empty to get the first page.
+
+    Subclasses must set `cursor_ordering` (see `KeysetPagination`).
+    """
+
+    cursor_ordering = None
+
+    @property
+    def paginator(self):
+        if not hasattr(self, "_paginator") and "cursor" in self.request.query_params:
+            self._paginator = KeysetPagination(self.cursor_ordering)
+        return super().paginator
+
+
+class SparseFieldsetsViewsetMixin(object):
+    """
+    Let clients choose the fields of read responses with the `fields` and
+    `omit` query parameters. Both are comma separated lists of field names,
+    with dots to select fields of nested objects, like `latest_revision.name`.
+    Only the fields of nested serializers can be chosen this way. Fields
+    built by methods, like the `action` of a revision, are included or
+    omitted as a whole, and paths into them are rejected.
+
+    `select_related_fields` and `prefetch_related_fields` map the relations
+    to load for the queryset to the fields that need them. Each relation is
+    only loaded if one of its fields is part of the response.
+    """
+
+    select_related_fields = {}
+    prefetch_related_fields = {}
+
+    def get_field_selection(self):
+        if self.request.method != "GET":
+            return {}, {}
+        include = parse_field_paths(self.request.query_params.get("fields", ""))
+        omit = parse_field_paths(self.request.query_params.get("omit", ""))
+        return include, omit
+
+    def is_field_selected(self, path):
+        include, omit = self.get_field_selection()
+
+        for name in path.split("."):
+            if include:
+                if name not in include:
+                    return False
+                include = include[name]
+            if name in omit:
+                if not omit[name]:
+                    return False
+                omit = omit[name]
+            else:
+                omit = {}
+
+        return True
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+
+        select_related = [
+            relation
+            for relation, fields in self.select_related_fields.items()
+            if any(self.is_field_selected(field) for field in fields)
+        ]
+        if select_related:
+            queryset = queryset.select_related(*select_related)
+
+        prefetch_related = [
+            relation
+            for relation, fields in self.prefetch_related_fields.items()
+            if any(self.is_field_selected(field) for field in fields)
+        ]
+        if prefetch_related:
+            queryset = queryset.prefetch_related(*prefetch_related)
+
+        return queryset
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        self.prune_serializer_fields(serializer, *self.get_field_selection())
+        return serializer
+
+    def prune_serializer_fields(self, serializer, include, omit, path=()):
+        if isinstance(serializer, serializers.ListSerializer):
+            serializer = serializer.child
+        if not (include or omit):
+            return
+        if not isinstance(serializer, serializers.Serializer):
+            raise serializers.ValidationError(
+                {"fields": f"The fields of `{'.'.join(path)}` cannot be selected."}
+            )
+
+        for name in list(serializer.fields):
+            if (include and name not in include) or (name in omit and not omit[name]):
+                serializer.fields.pop(name)
+            else:
+                self.prune_serializer_fields(
+                    serializer.fields[name],
+                    include.get(name, {}),
+                    omit.get(name, {}),
+                    path + (name,),
+                )
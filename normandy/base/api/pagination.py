@@ -0,0 +1,136 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from collections import OrderedDict
+
+from django.core.exceptions import ValidationError
+from django.db.models import F, Q
+from rest_framework import serializers
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Paginate by the position of the last item of the previous page, instead
+    of by page number.
+
+    Pages are found by filtering on the values of the ordering fields, so the
+    cost of fetching a page doesn't depend on how deep it is, and no count
+    query is needed. The last field of `ordering` must be unique, and all of
+    the fields must be sorted in the same direction. Since pages are always
+    in that order, requests that ask for another one are rejected.
+    """
+
+    cursor_query_param = "cursor"
+    page_size = api_settings.PAGE_SIZE
+    invalid_cursor_message = "Invalid cursor"
+    ordering_not_allowed_message = "Results can't be reordered when paginating by cursor"
+
+    def __init__(self, ordering):
+        self.descending = ordering[0].startswith("-")
+        self.fields = [field.lstrip("-") for field in ordering]
+        self.aliases = [f"keyset_{i}" for i in range(len(self.fields))]
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if api_settings.ORDERING_PARAM in request.query_params:
+            raise serializers.ValidationError(
+                {api_settings.ORDERING_PARAM: self.ordering_not_allowed_message}
+            )
+
+        self.base_url = request.build_absolute_uri()
+        cursor = self.decode_cursor(request)
+        reverse = cursor is not None and cursor["reverse"]
+        descending = self.descending != reverse
+
+        queryset = queryset.annotate(
+            **{alias: F(field) for alias, field in zip(self.aliases, self.fields)}
+        )
+        if cursor is not None:
+            try:
+                position_filter = self.get_position_filter(cursor["position"], descending)
+                queryset = queryset.filter(position_filter)
+            except ValidationError:
+                raise NotFound(self.invalid_cursor_message)
+        direction = "-" if descending else ""
+        queryset = queryset.order_by(*(direction + alias for alias in self.aliases))
+
+        results = list(queryset[: self.page_size + 1])
+        has_more = len(results) > self.page_size
+        results = results[: self.page_size]
+        if reverse:
+            results.reverse()
+
+        has_next = has_more if not reverse else True
+        has_previous = has_more if reverse else cursor is not None
+        self.next_position = self.get_position(results[-1]) if results and has_next else None
+        self.previous_position = (
+            self.get_position(results[0]) if results and has_previous else None
+        )
+
+        return results
+
+    def get_position_filter(self, position, descending):
+        """Match items that come after `position` when sorted in the given direction."""
+        lookup = "lt" if descending else "gt"
+        position_filter = Q()
+        for i, alias in enumerate(self.aliases):
+            equal = Q(**{alias: value for alias, value in zip(self.aliases[:i], position)})
+            position_filter |= equal & Q(**{f"{alias}__{lookup}": position[i]})
+        return position_filter
+
+    def get_position(self, instance):
+        values = [getattr(instance, alias) for alias in self.aliases]
+        # Datetimes are compared exactly, so keep their full precision
+        return [value.isoformat() if hasattr(value, "isoformat") else value for value in values]
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+
+        try:
+            cursor = json.loads(urlsafe_b64decode(encoded.encode()))
+            if len(cursor["position"]) != len(self.aliases):
+                raise ValueError()
+            return {"reverse": bool(cursor["reverse"]), "position": cursor["position"]}
+        except (TypeError, ValueError, KeyError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, position, reverse):
+        cursor = json.dumps({"reverse": reverse, "position": position})
+        encoded = urlsafe_b64encode(cursor.encode()).decode()
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def get_next_link(self):
+        if self.next_position is None:
+            return None
+        return self.encode_cursor(self.next_position, reverse=False)
+
+    def get_previous_link(self):
+        if self.previous_position is None:
+            return None
+        return self.encode_cursor(self.previous_position, reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response(
+            OrderedDict(
+                [
+                    ("next", self.get_next_link()),
+                    ("previous", self.get_previous_link()),
+                    ("results", data),
+                ]
+            )
+        )
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "properties": {
+                "next": {"type": "string", "nullable": True},
+                "previous": {"type": "string", "nullable": True},
+                "results": schema,
+            },
+        }
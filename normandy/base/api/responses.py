@@ -0,0 +1,60 @@
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.functional import cached_property
+from rest_framework.response import Response
+
+from normandy.base.api.renderers import CanonicalJSONRenderer
+from normandy.base.api.utils import get_request_fingerprint
+
+
+class PrerenderedResponse(Response):
+    """
+    A Response whose body has already been rendered to JSON bytes.
+
+    The bytes are sent as-is instead of being rendered again. `data` is
+    decoded from them on demand, for the benefit of tests and anything else
+    that inspects the response.
+    """
+
+    def __init__(self, content, **kwargs):
+        super().__init__(**kwargs)
+        # Response.__init__ sets `data`. Drop it so it is decoded from the content instead.
+        del self.data
+        self.prerendered_content = content
+
+    @cached_property
+    def data(self):
+        return json.loads(self.prerendered_content)
+
+    @property
+    def rendered_content(self):
+        self["Content-Type"] = self.accepted_renderer.media_type
+        return self.prerendered_content
+
+
+def cached_response(request, version, get_response):
+    """
+    Return the response built by `get_response`, caching its rendered content.
+
+    Only successful responses rendered as canonical JSON are cached, and only
+    if :envvar:`DJANGO_API_RESPONSE_CACHE_ENABLED` is set. Entries are keyed
+    on `version` and the request, so they must not be shared between
+    responses that depend on anything else.
+    """
+    if not settings.API_RESPONSE_CACHE_ENABLED or not isinstance(
+        request.accepted_renderer, CanonicalJSONRenderer
+    ):
+        return get_response()
+
+    key = "api-response:" + get_request_fingerprint(request, version)
+    content = cache.get(key)
+    if content is None:
+        response = get_response()
+        if response.status_code != 200:
+            return response
+        content = request.accepted_renderer.render(response.data)
+        cache.set(key, content, settings.API_RESPONSE_CACHE_TIMEOUT)
+
+    return PrerenderedResponse(content)
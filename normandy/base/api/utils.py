@@ -1,8 +1,11 @@
+import hashlib
 import re
 
 from django.contrib.admindocs.views import simplify_regex
 from django.urls import URLPattern, URLResolver
 
+from normandy.base.utils import canonical_json_dumps
+
 
 _PATH_PARAMETER_COMPONENT_RE = re.compile(r"<(?:(?P<converter>[^>:]+):)?(?P<parameter>\w+)>")
 
@@ -100,3 +103,37 @@ def get_api_endpoints(patterns=None, namespace="", prefix=""):
             api_endpoints.extend(nested_endpoints)
 
     return api_endpoints
+
+
+def get_request_fingerprint(request, version):
+    """
+    Return a hash identifying the response to a read request.
+
+    `version` must change whenever the data behind the response changes. The
+    rest is taken from the request: the path, the query, the negotiated media
+    type and the user.
+    """
+    key = [
+        version,
+        request.build_absolute_uri(request.path),
+        sorted(request.query_params.lists()),
+        request.accepted_media_type,
+        request.user.pk,
+    ]
+    return hashlib.sha256(canonical_json_dumps(key).encode()).hexdigest()
+
+
+def parse_field_paths(value):
+    """
+    Parse a comma separated list of dotted field paths into a tree.
+
+    For example, `id,revision.name,revision.action` becomes
+    `{"id": {}, "revision": {"name": {}, "action": {}}}`.
+    """
+    tree = {}
+    for path in value.split(","):
+        node = tree
+        for name in path.strip().split("."):
+            if name:
+                node = node.setdefault(name, {})
+    return tree
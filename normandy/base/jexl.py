@@ -1,5 +1,17 @@
+from collections import namedtuple
+from functools import lru_cache
+
 from pyjexl import JEXL
+from pyjexl.analysis import ValidatingAnalyzer
+from pyjexl.exceptions import ParseError
+
+
+# Number of distinct expressions to keep the parse results of. Recipes
+# rarely share expressions, so this should be comfortably above the number
+# of recipes validated in a row, such as during an import.
+PARSE_CACHE_SIZE = 1024
 
+ParsedExpression = namedtuple("ParsedExpression", ["tree", "errors"])
 
 _cached_jexl = None
 
@@ -29,3 +41,22 @@ def get_normandy_jexl():
             _cached_jexl.add_transform(transform, lambda x: x)
 
     return _cached_jexl
+
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def parse_cached(expression):
+    """
+    Parse and validate an expression with the Normandy JEXL instance.
+
+    Returns a `ParsedExpression`, whose `errors` is a tuple of the messages
+    that ``JEXL.validate`` would give, and whose `tree` is ``None`` if the
+    expression could not be parsed. Results are cached by expression, so
+    the tree is shared and must not be modified.
+    """
+    jexl = get_normandy_jexl()
+    try:
+        tree = jexl.parse(expression)
+    except ParseError as err:
+        return ParsedExpression(None, (str(err),))
+    errors = tuple(ValidatingAnalyzer(jexl.config).visit(tree))
+    return ParsedExpression(tree, errors)
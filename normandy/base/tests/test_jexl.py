@@ -0,0 +1,29 @@
+from normandy.base.jexl import get_normandy_jexl, parse_cached
+
+
+class TestParseCached(object):
+    def setup_method(self):
+        parse_cached.cache_clear()
+
+    def test_valid_expression(self):
+        parsed = parse_cached('normandy.channel in ["release"]')
+        assert parsed.tree is not None
+        assert parsed.errors == ()
+
+    def test_errors_match_validate(self):
+        jexl = get_normandy_jexl()
+        for expression in ["inv(-alsid", "1|undefinedTransform", "[1, 2]|length"]:
+            assert list(parse_cached(expression).errors) == list(jexl.validate(expression))
+
+    def test_parse_errors_have_no_tree(self):
+        parsed = parse_cached("inv(-alsid")
+        assert parsed.tree is None
+        assert parsed.errors == ("Could not parse expression: inv(-alsid",)
+
+    def test_it_parses_each_expression_once(self, mocker):
+        jexl = get_normandy_jexl()
+        parse = mocker.patch.object(jexl, "parse", wraps=jexl.parse)
+        for _ in range(3):
+            parse_cached("normandy.locale == 'en-US'")
+        parse_cached("normandy.locale == 'de'")
+        assert parse.call_count == 2
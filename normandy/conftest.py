@@ -10,9 +10,35 @@ from rest_framework.test import APIClient
 from normandy.schema import schema as normandy_schema
 from normandy.base.tests import UserFactory
 from normandy.recipes import geolocation as geolocation_module
+from normandy.recipes.local_autograph import LocalAutograph
+from normandy.recipes.local_remotesettings import LocalRemoteSettings
+from normandy.recipes.models import ReferenceData
+from normandy.recipes.signing import reset_verified_chains
 from normandy.recipes.tests import fake_sign
 
 
+@pytest.fixture(autouse=True)
+def reference_data():
+    """
+    Fixture to drop the copy of the reference data between tests, since the
+    database changes of a test are rolled back without sending signals.
+    """
+    ReferenceData.reset()
+    yield
+    ReferenceData.reset()
+
+
+@pytest.fixture(autouse=True)
+def verified_chains():
+    """
+    Fixture to forget the certificate chains verified by a test, so that
+    tests reusing an x5u URL don't depend on each other.
+    """
+    reset_verified_chains()
+    yield
+    reset_verified_chains()
+
+
 @pytest.fixture
 def api_client():
     """Fixture to provide a DRF API client."""
@@ -46,11 +72,41 @@ def mocked_autograph(mocker):
     return mocked
 
 
+@pytest.fixture
+def local_autograph(settings):
+    """Fixture to sign with a local Autograph server, with a real key and certificate chain."""
+    with LocalAutograph() as autograph:
+        settings.AUTOGRAPH_URL = autograph.url
+        settings.AUTOGRAPH_HAWK_ID = "normandy"
+        settings.AUTOGRAPH_HAWK_SECRET_KEY = "local-autograph"
+        settings.AUTOGRAPH_KEYID = None
+        settings.CERTIFICATES_CHECK_VALIDITY = True
+        settings.CERTIFICATES_EXPECTED_ROOT_HASH = autograph.root_hash
+        settings.CERTIFICATES_EXPECTED_SUBJECT_CN = autograph.subject_cn
+        yield autograph
+
+
 @pytest.fixture
 def mocked_remotesettings(mocker):
     return mocker.patch("normandy.recipes.models.RemoteSettings")
 
 
+@pytest.fixture
+def local_remotesettings(settings):
+    """Fixture to publish to a local Remote Settings server."""
+    with LocalRemoteSettings(
+        workspace_bucket=settings.REMOTE_SETTINGS_WORKSPACE_BUCKET_ID,
+        publish_bucket=settings.REMOTE_SETTINGS_PUBLISH_BUCKET_ID,
+        collections=[settings.REMOTE_SETTINGS_CAPABILITIES_COLLECTION_ID],
+    ) as remotesettings:
+        settings.REMOTE_SETTINGS_URL = remotesettings.url
+        settings.REMOTE_SETTINGS_USERNAME = remotesettings.username
+        settings.REMOTE_SETTINGS_PASSWORD = remotesettings.password
+        # Don't retry, so that injected failures are deterministic.
+        settings.REMOTE_SETTINGS_RETRY_REQUESTS = 0
+        yield remotesettings
+
+
 @pytest.fixture
 def rs_settings(settings):
     settings.REMOTE_SETTINGS_URL = "https://remotesettings.example.com/v1"
@@ -1,4 +1,6 @@
 import django_filters
+from django.db.models import BooleanField, F
+from django.db.models.expressions import Expression
 from rest_framework import serializers
 
 from normandy.recipes.models import Recipe
@@ -48,17 +50,9 @@ class BaselineCapabilitiesFilter(django_filters.Filter):
             baseline_only = lc_value in ["true", "1"]
 
         if baseline_only:
-            recipes = list(qs)
-            if not all(isinstance(recipe, Recipe) for recipe in recipes):
+            if not issubclass(qs.model, Recipe):
                 raise TypeError("BaselineCapabilitiesFilter can only be used to filter recipes")
-            match_ids = []
-            for recipe in recipes:
-                if (
-                    recipe.approved_revision
-                    and recipe.approved_revision.uses_only_baseline_capabilities()
-                ):
-                    match_ids.append(recipe.id)
-            return Recipe.objects.filter(id__in=match_ids)
+            return qs.only_baseline_capabilities()
 
         return qs
 
@@ -82,6 +76,11 @@ class FilterObjectFieldFilter(django_filters.Filter):
     contains the value `value1`, and that have a filter object with a field
     `key2` that contains `value2`. The two filter objects do not have to be
     the same, but may be.
+
+    Values are matched as they would be written in Python: a list contains
+    the value if one of its items does, and booleans are ``True`` and
+    ``False``. This is a substring search over the latest revision of every
+    recipe, so no index can help it.
     """
 
     def filter(self, qs, value):
@@ -97,36 +96,57 @@ class FilterObjectFieldFilter(django_filters.Filter):
             key, val = segment.split(":", 1)
             needles.append((key, val))
 
-        # Let the database do a first pass filter
-        for k, v in needles:
-            qs = qs.filter(latest_revision__filter_object_json__contains=k)
-            qs = qs.filter(latest_revision__filter_object_json__contains=v)
-
-        recipes = list(qs)
-        if not all(isinstance(recipe, Recipe) for recipe in recipes):
-            raise TypeError("FilterObjectFieldFilter can only be used to filter recipes")
-
-        # For every recipe that contains the right substrings, look through
-        # their filter objects for an actual match
-        match_ids = []
-        for recipe in recipes:
-            recipe_matches = True
-
-            # Recipes needs to have all the keys and values in the needles
-            for k, v in needles:
-                for filter_object in recipe.latest_revision.filter_object:
-                    # Don't consider invalid filter objects
-                    if not filter_object.is_valid():
-                        continue
-                    if k in filter_object.data and v in str(filter_object.data[k]):
-                        # Found a match
-                        break
-                else:
-                    # Did not break, so no match was not found
-                    recipe_matches = False
-                    break
-
-            if recipe_matches:
-                match_ids.append(recipe.id)
-
-        return Recipe.objects.filter(id__in=match_ids)
+        # Match recipes with, for each needle, a filter object that has the
+        # key and whose value contains the needle's value as a substring.
+        for i, (k, v) in enumerate(needles):
+            alias = f"filter_object_matches_{i}"
+            match = FilterObjectMatch(F("latest_revision__filter_object_data"), k, v)
+            qs = qs.annotate(**{alias: match}).filter(**{alias: True})
+        return qs
+
+
+class FilterObjectMatch(Expression):
+    """
+    Whether a JSONB list of filter objects has one with the field `key`,
+    whose value contains `value` as `FilterObjectFieldFilter` describes.
+
+    The list is given as an expression, so that it is resolved against
+    whichever join of the query it belongs to.
+    """
+
+    template = """
+        EXISTS (
+            SELECT 1
+            FROM jsonb_array_elements({data}) AS filter_object,
+                jsonb_array_elements(
+                    CASE jsonb_typeof(filter_object -> %s)
+                        WHEN 'array' THEN filter_object -> %s
+                        ELSE jsonb_build_array(filter_object -> %s)
+                    END
+                ) AS item
+            WHERE filter_object ? %s AND strpos(
+                CASE jsonb_typeof(item)
+                    WHEN 'boolean' THEN initcap(item #>> ARRAY[]::text[])
+                    ELSE item #>> ARRAY[]::text[]
+                END,
+                %s
+            ) > 0
+        )
+    """
+
+    def __init__(self, data, key, value):
+        super().__init__(output_field=BooleanField())
+        self.data = data
+        self.key = key
+        self.value = value
+
+    def get_source_expressions(self):
+        return [self.data]
+
+    def set_source_expressions(self, exprs):
+        (self.data,) = exprs
+
+    def as_sql(self, compiler, connection):
+        data_sql, data_params = compiler.compile(self.data)
+        sql = self.template.format(data=data_sql)
+        return sql, [*data_params, self.key, self.key, self.key, self.key, self.value]
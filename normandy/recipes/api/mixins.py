@@ -0,0 +1,21 @@
+from normandy.base.api.mixins import ETagViewsetMixin, ResponseCacheViewsetMixin
+from normandy.recipes.models import CollectionVersion, get_serialization_settings_hash
+
+
+def get_recipe_collection_version():
+    """Return a value that changes whenever any recipe data served by the API changes."""
+    return [CollectionVersion.get_current(), get_serialization_settings_hash()]
+
+
+class RecipeETagViewsetMixin(ETagViewsetMixin):
+    """ETags for viewsets serving recipe data, based on the recipe collection version."""
+
+    def get_collection_version(self):
+        return get_recipe_collection_version()
+
+
+class RecipeResponseCacheViewsetMixin(ResponseCacheViewsetMixin):
+    """Server-side caching for viewsets serving recipe data."""
+
+    def get_collection_version(self):
+        return get_recipe_collection_version()
@@ -1,6 +1,7 @@
 from django.conf import settings
 from django.db import transaction
 from django.db.models import Q
+from django.utils.cache import get_conditional_response
 from django.views.decorators.cache import never_cache
 
 import django_filters
@@ -11,9 +12,22 @@ from rest_framework.response import Response
 
 from normandy.base.api.mixins import CachingViewsetMixin
 from normandy.base.api.permissions import AdminEnabledOrReadOnly
-from normandy.base.api.renderers import JavaScriptRenderer
+from normandy.base.api.renderers import CanonicalJSONRenderer, JavaScriptRenderer
+from normandy.base.api.responses import PrerenderedResponse, cached_response
 from normandy.base.decorators import api_cache_control
-from normandy.recipes.models import Action, ApprovalRequest, Client, Recipe, RecipeRevision
+from normandy.recipes.models import (
+    Action,
+    ApprovalRequest,
+    Client,
+    Recipe,
+    RecipeRevision,
+    SignedRecipeManifest,
+)
+from normandy.recipes.api.mixins import (
+    RecipeETagViewsetMixin,
+    RecipeResponseCacheViewsetMixin,
+    get_recipe_collection_version,
+)
 from normandy.recipes.api.filters import (
     BaselineCapabilitiesFilter,
     CharSplitFilter,
@@ -30,7 +44,12 @@ from normandy.recipes.api.v1.serializers import (
 )
 
 
-class ActionViewSet(CachingViewsetMixin, viewsets.ReadOnlyModelViewSet):
+class ActionViewSet(
+    CachingViewsetMixin,
+    RecipeETagViewsetMixin,
+    RecipeResponseCacheViewsetMixin,
+    viewsets.ReadOnlyModelViewSet,
+):
     """Viewset for viewing recipe actions."""
 
     queryset = Action.objects.all()
@@ -87,7 +106,22 @@ class SignedRecipeFilters(RecipeFilters):
     only_baseline_capabilities = BaselineCapabilitiesFilter(default_only_baseline=True)
 
 
-class RecipeViewSet(CachingViewsetMixin, viewsets.ReadOnlyModelViewSet):
+def render_default_signed_recipes():
+    """
+    Render the signed recipe listing as it is served without any query
+    parameters. See `SignedRecipeManifest`.
+    """
+    recipes = SignedRecipeFilters(data={}, queryset=RecipeViewSet.queryset.all()).qs
+    serializer = SignedRecipeSerializer(recipes.exclude(signature=None), many=True)
+    return CanonicalJSONRenderer().render(serializer.data)
+
+
+class RecipeViewSet(
+    CachingViewsetMixin,
+    RecipeETagViewsetMixin,
+    RecipeResponseCacheViewsetMixin,
+    viewsets.ReadOnlyModelViewSet,
+):
     """Viewset for viewing and uploading recipes."""
 
     queryset = (
@@ -136,9 +170,29 @@ class RecipeViewSet(CachingViewsetMixin, viewsets.ReadOnlyModelViewSet):
     @action(detail=False, methods=["GET"], filterset_class=SignedRecipeFilters)
     @api_cache_control()
     def signed(self, request, pk=None):
+        # The default listing is what Firefox polls, so it is served from a
+        # prebuilt manifest, or built in memory until the manifest is rebuilt.
+        # Anything customized is built from scratch.
+        if not request.query_params and isinstance(
+            request.accepted_renderer, CanonicalJSONRenderer
+        ):
+            manifest = SignedRecipeManifest.get_current() or SignedRecipeManifest.build()
+            response = get_conditional_response(request, etag=manifest.etag)
+            if response is None:
+                response = PrerenderedResponse(manifest.content)
+            response["ETag"] = manifest.etag
+            return response
+
+        return cached_response(
+            request,
+            get_recipe_collection_version(),
+            lambda: Response(self.get_signed_data()),
+        )
+
+    def get_signed_data(self):
         recipes = self.filter_queryset(self.get_queryset()).exclude(signature=None)
         serializer = SignedRecipeSerializer(recipes, many=True)
-        return Response(serializer.data)
+        return serializer.data
 
     @action(detail=True, methods=["GET"])
     @api_cache_control()
@@ -150,7 +204,7 @@ class RecipeViewSet(CachingViewsetMixin, viewsets.ReadOnlyModelViewSet):
         return Response(serializer.data)
 
 
-class RecipeRevisionViewSet(viewsets.ReadOnlyModelViewSet):
+class RecipeRevisionViewSet(RecipeETagViewsetMixin, viewsets.ReadOnlyModelViewSet):
     queryset = (
         RecipeRevision.objects.all()
         .select_related("action")
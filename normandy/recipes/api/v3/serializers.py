@@ -2,7 +2,7 @@ from rest_framework import serializers
 from factory.fuzzy import FuzzyText
 
 from normandy.base.api.v3.serializers import UserSerializer
-from normandy.base.jexl import get_normandy_jexl
+from normandy.base.jexl import parse_cached
 from normandy.recipes import filters
 from normandy.recipes.api.fields import (
     ActionImplementationHyperlinkField,
@@ -16,7 +16,6 @@ from normandy.recipes.models import (
     RecipeRevision,
     Signature,
 )
-from normandy.recipes.validators import JSONSchemaValidator
 
 
 class CustomizableSerializerMixin:
@@ -199,9 +198,7 @@ class RecipeSerializer(CustomizableSerializerMixin, serializers.ModelSerializer)
 
     def validate_extra_filter_expression(self, value):
         if value:
-            jexl = get_normandy_jexl()
-
-            errors = list(jexl.validate(value))
+            errors = list(parse_cached(value).errors)
             if errors:
                 raise serializers.ValidationError(errors)
 
@@ -219,10 +216,8 @@ class RecipeSerializer(CustomizableSerializerMixin, serializers.ModelSerializer)
             if not isinstance(arguments, dict):
                 raise serializers.ValidationError({"arguments": "Must be an object."})
 
-            # Get the schema associated with the selected action
-            schema = action.arguments_schema
-
-            schemaValidator = JSONSchemaValidator(schema)
+            # Get the schema validator associated with the selected action
+            schemaValidator = action.arguments_validator
             errorResponse = {}
             errors = sorted(schemaValidator.iter_errors(arguments), key=lambda e: e.path)
 
@@ -2,7 +2,7 @@ import re
 
 from django.conf import settings
 from django.db import transaction
-from django.db.models import Q
+from django.db.models import Case, IntegerField, Q, When
 from django.http import HttpResponse
 
 import django_filters
@@ -13,18 +13,26 @@ from rest_framework.response import Response
 
 from normandy.base.api import UpdateOrCreateModelViewSet
 from normandy.base.api.filters import AliasedOrderingFilter
-from normandy.base.api.mixins import CachingViewsetMixin
+from normandy.base.api.mixins import (
+    CachingViewsetMixin,
+    CursorPaginationViewsetMixin,
+    SparseFieldsetsViewsetMixin,
+)
 from normandy.base.api.permissions import AdminEnabledOrReadOnly
+from normandy.base.api.responses import cached_response
 from normandy.base.decorators import api_cache_control
 from normandy.recipes.models import (
     Action,
     ApprovalRequest,
     EnabledState,
-    Channel,
-    Country,
-    Locale,
     Recipe,
     RecipeRevision,
+    ReferenceData,
+)
+from normandy.recipes.api.mixins import (
+    RecipeETagViewsetMixin,
+    RecipeResponseCacheViewsetMixin,
+    get_recipe_collection_version,
 )
 from normandy.recipes.api.filters import (
     ApprovalStateFilter,
@@ -42,7 +50,13 @@ from normandy.recipes.api.v3.serializers import (
 )
 
 
-class ActionViewSet(CachingViewsetMixin, viewsets.ReadOnlyModelViewSet):
+class ActionViewSet(
+    CachingViewsetMixin,
+    RecipeETagViewsetMixin,
+    RecipeResponseCacheViewsetMixin,
+    SparseFieldsetsViewsetMixin,
+    viewsets.ReadOnlyModelViewSet,
+):
     """Viewset for viewing recipe actions."""
 
     queryset = Action.objects.all()
@@ -72,43 +86,61 @@ class RecipeOrderingFilter(AliasedOrderingFilter):
     }
 
 
-class RecipeViewSet(CachingViewsetMixin, UpdateOrCreateModelViewSet):
+class RecipeViewSet(
+    CachingViewsetMixin,
+    RecipeETagViewsetMixin,
+    RecipeResponseCacheViewsetMixin,
+    CursorPaginationViewsetMixin,
+    SparseFieldsetsViewsetMixin,
+    UpdateOrCreateModelViewSet,
+):
     """Viewset for viewing and uploading recipes."""
 
-    queryset = (
-        Recipe.objects.all()
-        .select_related(
-            "approved_revision__action",
-            "approved_revision__user",
-            "approved_revision__approval_request",
-            "approved_revision__approval_request__creator",
-            "approved_revision__approval_request__approver",
-            "latest_revision__action",
-            "latest_revision__user",
-            "latest_revision__approval_request",
-            "latest_revision__approval_request__creator",
-            "latest_revision__approval_request__approver",
-        )
-        .prefetch_related(
-            "approved_revision__channels",
-            "approved_revision__countries",
-            "approved_revision__enabled_states",
-            "approved_revision__enabled_states__creator",
-            "approved_revision__locales",
-            "latest_revision__channels",
-            "latest_revision__countries",
-            "latest_revision__enabled_states",
-            "latest_revision__enabled_states__creator",
-            "latest_revision__locales",
-        )
-    )
+    queryset = Recipe.objects.all()
+    # Relations to load, and the fields that need them
+    select_related_fields = {
+        "approved_revision": ["approved_revision"],
+        "approved_revision__action": [
+            "approved_revision.action",
+            "approved_revision.capabilities",
+        ],
+        "approved_revision__user": ["approved_revision.creator"],
+        "approved_revision__approval_request": ["approved_revision.approval_request"],
+        "approved_revision__approval_request__creator": [
+            "approved_revision.approval_request.creator"
+        ],
+        "approved_revision__approval_request__approver": [
+            "approved_revision.approval_request.approver"
+        ],
+        "latest_revision": ["latest_revision", "uses_only_baseline_capabilities"],
+        "latest_revision__action": [
+            "latest_revision.action",
+            "latest_revision.capabilities",
+            "uses_only_baseline_capabilities",
+        ],
+        "latest_revision__user": ["latest_revision.creator"],
+        "latest_revision__approval_request": ["latest_revision.approval_request"],
+        "latest_revision__approval_request__creator": ["latest_revision.approval_request.creator"],
+        "latest_revision__approval_request__approver": [
+            "latest_revision.approval_request.approver"
+        ],
+    }
+    prefetch_related_fields = {
+        "approved_revision__enabled_states": ["approved_revision.enabled_states"],
+        "approved_revision__enabled_states__creator": ["approved_revision.enabled_states.creator"],
+        "latest_revision__enabled_states": ["latest_revision.enabled_states"],
+        "latest_revision__enabled_states__creator": ["latest_revision.enabled_states.creator"],
+    }
     serializer_class = RecipeSerializer
     filterset_class = RecipeFilters
     filter_backends = [django_filters.rest_framework.DjangoFilterBackend, RecipeOrderingFilter]
     permission_classes = [permissions.DjangoModelPermissionsOrAnonReadOnly, AdminEnabledOrReadOnly]
+    # Recipes are paged newest first. Their update time is on the latest
+    # revision, and ordering by it across the join would sort every page.
+    cursor_ordering = ("-id",)
 
     def get_queryset(self):
-        queryset = self.queryset
+        queryset = super().get_queryset()
 
         if self.request.GET.get("status") == "enabled":
             queryset = queryset.only_enabled()
@@ -128,7 +160,21 @@ class RecipeViewSet(CachingViewsetMixin, UpdateOrCreateModelViewSet):
                     | Q(latest_revision__arguments_json__icontains=token)
                 )
 
-            queryset = queryset.filter(query)
+            # Rank recipes by how many of the tokens are in their name. The
+            # ordering filter overrides this if an ordering is requested.
+            rank = sum(
+                Case(
+                    When(latest_revision__name__icontains=token, then=1),
+                    default=0,
+                    output_field=IntegerField(),
+                )
+                for token in tokens
+            )
+            queryset = (
+                queryset.filter(query)
+                .annotate(text_rank=rank)
+                .order_by("-text_rank", *Recipe._meta.ordering)
+            )
 
         return queryset
 
@@ -189,15 +235,26 @@ class RecipeRevisionFilterBackend(filters.BaseFilterBackend):
         return queryset
 
 
-class RecipeRevisionViewSet(viewsets.ReadOnlyModelViewSet):
-    queryset = (
-        RecipeRevision.objects.all()
-        .select_related("action", "approval_request", "recipe")
-        .prefetch_related("enabled_states", "channels", "countries", "locales")
-    )
+class RecipeRevisionViewSet(
+    RecipeETagViewsetMixin,
+    CursorPaginationViewsetMixin,
+    SparseFieldsetsViewsetMixin,
+    viewsets.ReadOnlyModelViewSet,
+):
+    queryset = RecipeRevision.objects.all()
+    # Relations to load, and the fields that need them
+    select_related_fields = {
+        "action": ["action", "capabilities"],
+        "approval_request": ["approval_request"],
+        "recipe": ["recipe"],
+    }
+    prefetch_related_fields = {
+        "enabled_states": ["enabled_states"],
+    }
     serializer_class = RecipeRevisionSerializer
     permission_classes = [AdminEnabledOrReadOnly, permissions.DjangoModelPermissionsOrAnonReadOnly]
     filter_backends = [RecipeRevisionFilterBackend]
+    cursor_ordering = ("-created", "-id")
 
     @action(detail=True, methods=["POST"])
     def request_approval(self, request, pk=None):
@@ -238,7 +295,9 @@ class ApprovalRequestFilters(django_filters.FilterSet):
         fields = ["approved"]
 
 
-class ApprovalRequestViewSet(viewsets.ReadOnlyModelViewSet):
+class ApprovalRequestViewSet(
+    CursorPaginationViewsetMixin, SparseFieldsetsViewsetMixin, viewsets.ReadOnlyModelViewSet
+):
     queryset = (
         ApprovalRequest.objects.all()
         # prefetch?
@@ -250,6 +309,7 @@ class ApprovalRequestViewSet(viewsets.ReadOnlyModelViewSet):
     serializer_class = ApprovalRequestSerializer
     permission_classes = [AdminEnabledOrReadOnly, permissions.DjangoModelPermissionsOrAnonReadOnly]
     filterset_class = ApprovalRequestFilters
+    cursor_ordering = ("-created", "-id")
 
     @action(detail=True, methods=["POST"])
     def approve(self, request, pk=None):
@@ -311,20 +371,28 @@ class Filters(views.APIView):
     permission_classes = []
 
     def get(self, request, format=None):
-        return Response(
-            {
-                "status": [
-                    {"key": "enabled", "value": "Enabled"},
-                    {"key": "disabled", "value": "Disabled"},
-                ],
-                "channels": [{"key": c.slug, "value": c.name} for c in Channel.objects.all()],
-                "countries": [{"key": c.code, "value": c.name} for c in Country.objects.all()],
-                "locales": [
-                    {"key": locale.code, "value": locale.name} for locale in Locale.objects.all()
-                ],
-            }
+        return cached_response(
+            request, get_recipe_collection_version(), lambda: Response(self.get_data())
         )
 
+    def get_data(self):
+        reference_data = ReferenceData.get()
+        return {
+            "status": [
+                {"key": "enabled", "value": "Enabled"},
+                {"key": "disabled", "value": "Disabled"},
+            ],
+            "channels": [
+                {"key": slug, "value": name} for slug, name in reference_data.channels.items()
+            ],
+            "countries": [
+                {"key": code, "value": name} for code, name in reference_data.countries.items()
+            ],
+            "locales": [
+                {"key": code, "value": name} for code, name in reference_data.locales.items()
+            ],
+        }
+
 
 class IdenticonView(views.APIView):
     @api_cache_control(max_age=settings.IMMUTABLE_CACHE_TIME, immutable=True)
@@ -11,6 +11,9 @@ class RecipesApp(AppConfig):
     verbose_name = "Normandy Recipes"
 
     def ready(self):
+        # Import for side-effect: registers signal handlers
+        import normandy.recipes.signals  # NOQA
+
         checks.register()
         RemoteSettings().check_config()
         load_geoip_database()
@@ -44,6 +44,23 @@ def actions_have_consistent_hashes(app_configs, **kwargs):
     return errors
 
 
+def verify_signed_objects(objects):
+    """
+    Verify the signatures of recipes or actions, returning pairs of each
+    object and the error with its signature, or None if it is valid.
+    """
+    items = [
+        (
+            obj.canonical_json(),
+            obj.signature.signature,
+            obj.signature.x5u,
+            obj.signature.public_key,
+        )
+        for obj in objects
+    ]
+    return zip(objects, signing.verify_signatures(items))
+
+
 def recipe_signatures_are_correct(app_configs, **kwargs):
     errors = []
     try:
@@ -55,27 +72,22 @@ def recipe_signatures_are_correct(app_configs, **kwargs):
         return errors
 
     try:
-        for recipe in signed_recipes:
-            data = recipe.canonical_json()
-            signature = recipe.signature.signature
-            pubkey = recipe.signature.public_key
-            x5u = recipe.signature.x5u
-            try:
-                if x5u:
-                    signing.verify_signature_x5u(data, signature, x5u)
-                else:
-                    signing.verify_signature_pubkey(data, signature, pubkey)
-            except signing.BadSignature as e:
+        for recipe, error in verify_signed_objects(signed_recipes):
+            if error is None:
+                continue
+            elif isinstance(error, signing.BadSignature):
                 msg = "Recipe '{recipe}' (id={recipe.id}) has a bad signature: {detail}".format(
-                    recipe=recipe, detail=e.detail
+                    recipe=recipe, detail=error.detail
                 )
                 errors.append(Error(msg, id=ERROR_INVALID_RECIPE_SIGNATURE))
-            except requests.RequestException as exc:
+            elif isinstance(error, requests.RequestException):
                 msg = (
                     f"The signature for recipe with ID {recipe.id} could not be be verified due to "
-                    f"network error when requesting the url {x5u!r}. {exc}"
+                    f"network error when requesting the url {recipe.signature.x5u!r}. {error}"
                 )
                 errors.append(Error(msg, id=ERROR_COULD_NOT_VERIFY_CERTIFICATE))
+            else:
+                raise error
     except (ProgrammingError, OperationalError, ImproperlyConfigured) as e:
         errors.append(
             Warning(f"Could not check signatures: {e}", id=WARNING_COULD_NOT_CHECK_SIGNATURES)
@@ -96,25 +108,20 @@ def action_signatures_are_correct(app_configs, **kwargs):
         return errors
 
     try:
-        for action in signed_actions:
-            data = action.canonical_json()
-            signature = action.signature.signature
-            pubkey = action.signature.public_key
-            x5u = action.signature.x5u
-            try:
-                if x5u:
-                    signing.verify_signature_x5u(data, signature, x5u)
-                else:
-                    signing.verify_signature_pubkey(data, signature, pubkey)
-            except signing.BadSignature as e:
-                msg = f"Action '{action}' (id={action.id}) has a bad signature: {e.detail}"
+        for action, error in verify_signed_objects(signed_actions):
+            if error is None:
+                continue
+            elif isinstance(error, signing.BadSignature):
+                msg = f"Action '{action}' (id={action.id}) has a bad signature: {error.detail}"
                 errors.append(Error(msg, id=ERROR_INVALID_ACTION_SIGNATURE))
-            except requests.RequestException as exc:
+            elif isinstance(error, requests.RequestException):
                 msg = (
                     f"The signature for action with ID {action.id} could not be be verified due to "
-                    f"network error when requesting the url {x5u!r}. {exc}"
+                    f"network error when requesting the url {action.signature.x5u!r}. {error}"
                 )
                 errors.append(Error(msg, id=ERROR_COULD_NOT_VERIFY_CERTIFICATE))
+            else:
+                raise error
     except (ProgrammingError, OperationalError, ImproperlyConfigured) as e:
         errors.append(
             Warning(f"Could not check signatures: {e}", id=WARNING_COULD_NOT_CHECK_SIGNATURES)
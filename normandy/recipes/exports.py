@@ -1,12 +1,14 @@
+import hashlib
 import logging
 
 import kinto_http
 from django.conf import settings
 from django.core.exceptions import ImproperlyConfigured
-from normandy.base.utils import ScopedSettings
+from normandy.base.utils import ScopedSettings, canonical_json_dumps
 
 
 APPROVE_CHANGES_FLAG = {"status": "to-sign"}
+KINTO_INTERNAL_FIELDS = ("last_modified", "schema")
 ROLLBACK_CHANGES_FLAG = {"status": "to-rollback"}
 logger = logging.getLogger(__name__)
 rs_settings = ScopedSettings("REMOTE_SETTINGS_")
@@ -33,6 +35,36 @@ def recipe_as_record(recipe):
     return record
 
 
+def record_hash(record):
+    """
+    Hash a record, ignoring the fields that are managed by the Remote
+    Settings server.
+    """
+    cleaned_record = {k: v for k, v in record.items() if k not in KINTO_INTERNAL_FIELDS}
+    return hashlib.sha256(canonical_json_dumps(cleaned_record).encode()).hexdigest()
+
+
+def record_published(recipe, record):
+    """Remember what was published for `recipe`."""
+    from normandy.recipes.models import PublishedRecord  # avoid circular imports
+
+    PublishedRecord.objects.update_or_create(
+        recipe_id=recipe.id,
+        defaults={
+            "record_hash": record_hash(record),
+            "signature": recipe.signature.signature if recipe.signature else "",
+            "last_modified": None,
+        },
+    )
+
+
+def record_unpublished(recipe_ids):
+    """Forget what was published for the recipes with the given ids."""
+    from normandy.recipes.models import PublishedRecord  # avoid circular imports
+
+    PublishedRecord.objects.filter(recipe_id__in=recipe_ids).delete()
+
+
 class RemoteSettings:
     """
     Interacts with a RemoteSettings service.
@@ -80,6 +112,9 @@ class RemoteSettings:
             if rs_settings.URL
             else None
         )
+        # What was changed in the workspace, to remember once it is approved
+        self._pending_published = {}
+        self._pending_unpublished = set()
 
     def check_config(self):
         """
@@ -135,15 +170,21 @@ class RemoteSettings:
                     f"Review was not disabled on Remote Settings collection {collection}."
                 )
 
-    def published_recipes(self):
+    def published_recipes(self, since=None):
         """
         Return the current list of remote records.
+
+        If `since` is given, only the records that changed after that
+        timestamp are returned, including tombstones for deleted records.
         """
         if self.client is None:
             raise ImproperlyConfigured("Remote Settings is not enabled.")
 
+        params = {} if since is None else {"_since": since}
         capabilities_records = self.client.get_records(
-            bucket=rs_settings.PUBLISH_BUCKET_ID, collection=rs_settings.CAPABILITIES_COLLECTION_ID
+            bucket=rs_settings.PUBLISH_BUCKET_ID,
+            collection=rs_settings.CAPABILITIES_COLLECTION_ID,
+            **params,
         )
         return capabilities_records
 
@@ -161,6 +202,7 @@ class RemoteSettings:
             bucket=rs_settings.WORKSPACE_BUCKET_ID,
             collection=rs_settings.CAPABILITIES_COLLECTION_ID,
         )
+        self._remember_published(recipe, record)
 
         # 2. Approve the changes immediately (multi-signoff is disabled).
         log_action = "Batch published"
@@ -197,6 +239,11 @@ class RemoteSettings:
             else:
                 raise
 
+        if either_existed:
+            self._remember_unpublished(recipe)
+        else:
+            record_unpublished([recipe.id])
+
         # 2. Approve the changes immediately (multi-signoff is disabled).
         log_action = "Batch deleted"
         if either_existed and approve_changes:
@@ -207,9 +254,83 @@ class RemoteSettings:
             f"{log_action} record '{recipe.id}' of recipe {recipe.approved_revision.name!r}"
         )
 
+    def publish_many(self, recipes, approve_changes=True):
+        """
+        Publish all of `recipes` with a single batch request, and approve the
+        changes once at the end.
+        """
+        if self.client is None or not recipes:
+            return  # no-op if disabled or if there is nothing to do.
+
+        records = [recipe_as_record(recipe) for recipe in recipes]
+        with self.client.batch() as batch:
+            for record in records:
+                batch.update_record(
+                    data=record,
+                    bucket=rs_settings.WORKSPACE_BUCKET_ID,
+                    collection=rs_settings.CAPABILITIES_COLLECTION_ID,
+                )
+        for recipe, record in zip(recipes, records):
+            self._remember_published(recipe, record)
+
+        log_action = "Batch published"
+        if approve_changes:
+            self.approve_changes()
+            log_action = "Published"
+
+        for recipe in recipes:
+            logger.info(
+                f"{log_action} record '{recipe.id}' for recipe {recipe.approved_revision.name!r}"
+            )
+
+    def unpublish_many(self, recipes, approve_changes=True):
+        """
+        Unpublish all of `recipes` with a single batch request, and approve the
+        changes once at the end.
+        """
+        if self.client is None or not recipes:
+            return  # no-op if disabled or if there is nothing to do.
+
+        missing_ids = set()
+        try:
+            with self.client.batch() as batch:
+                for recipe in recipes:
+                    batch.delete_record(
+                        id=str(recipe.id),
+                        bucket=rs_settings.WORKSPACE_BUCKET_ID,
+                        collection=rs_settings.CAPABILITIES_COLLECTION_ID,
+                    )
+        except kinto_http.KintoBatchException as e:
+            for exception in e.exceptions:
+                if exception.response.status_code != 404:
+                    raise
+                missing_ids.add(exception.request["path"].rsplit("/", 1)[-1])
+
+        for recipe in recipes:
+            if str(recipe.id) in missing_ids:
+                record_unpublished([recipe.id])
+            else:
+                self._remember_unpublished(recipe)
+
+        for recipe_id in missing_ids:
+            logger.warning(
+                f"The recipe '{recipe_id}' was not published in the capabilities collection. Skip."
+            )
+
+        log_action = "Batch deleted"
+        if len(missing_ids) < len(recipes) and approve_changes:
+            self.approve_changes()
+            log_action = "Deleted"
+
+        for recipe in recipes:
+            if str(recipe.id) not in missing_ids:
+                name = recipe.approved_revision.name if recipe.approved_revision else None
+                logger.info(f"{log_action} record '{recipe.id}' of recipe {name!r}")
+
     def approve_changes(self):
         """
-        Approve the changes made in the workspace collection.
+        Approve the changes made in the workspace collection, and remember
+        what was published once they are approved.
 
         .. note::
             This only works because multi-signoff is disabled for the Normandy recipes
@@ -229,9 +350,26 @@ class RemoteSettings:
         except kinto_http.exceptions.KintoException:
             # Approval failed unexpectedly.
             # The changes in the `main-workspace` bucket must be reverted.
+            self._pending_published = {}
+            self._pending_unpublished = set()
             self.client.patch_collection(
                 id=rs_settings.CAPABILITIES_COLLECTION_ID,
                 data=ROLLBACK_CHANGES_FLAG,
                 bucket=rs_settings.WORKSPACE_BUCKET_ID,
             )
             raise
+
+        for recipe, record in self._pending_published.values():
+            record_published(recipe, record)
+        if self._pending_unpublished:
+            record_unpublished(self._pending_unpublished)
+        self._pending_published = {}
+        self._pending_unpublished = set()
+
+    def _remember_published(self, recipe, record):
+        self._pending_unpublished.discard(recipe.id)
+        self._pending_published[recipe.id] = (recipe, record)
+
+    def _remember_unpublished(self, recipe):
+        self._pending_published.pop(recipe.id, None)
+        self._pending_unpublished.add(recipe.id)
@@ -22,10 +22,11 @@ field, so the final JSON would look something like this:
 
 import json
 from datetime import datetime
+from functools import lru_cache
 
 from rest_framework import serializers
 
-from normandy.base.jexl import get_normandy_jexl
+from normandy.base.jexl import parse_cached
 
 
 # If you add a new filter to this file, remember to update the docs too!
@@ -129,10 +130,11 @@ class ChannelFilter(BaseFilter):
 
     def validate_channels(self, value):
         # Avoid circular imports
-        from normandy.recipes.models import Channel
+        from normandy.recipes.models import ReferenceData
 
+        channels = ReferenceData.get().channels
         for slug in value:
-            if not Channel.objects.filter(slug=slug).exists():
+            if slug not in channels:
                 raise serializers.ValidationError(f"Unrecognized channel slug {slug!r}")
         return value
 
@@ -165,10 +167,11 @@ class LocaleFilter(BaseFilter):
 
     def validate_locales(self, value):
         # Avoid circular imports
-        from normandy.recipes.models import Locale
+        from normandy.recipes.models import ReferenceData
 
+        locales = ReferenceData.get().locales
         for code in value:
-            if not Locale.objects.filter(code=code).exists():
+            if code not in locales:
                 raise serializers.ValidationError(f"Unrecognized locale code {code!r}")
         return value
 
@@ -200,10 +203,11 @@ class CountryFilter(BaseFilter):
 
     def validate_countries(self, value):
         # Avoid circular imports
-        from normandy.recipes.models import Country
+        from normandy.recipes.models import ReferenceData
 
+        countries = ReferenceData.get().countries
         for code in value:
-            if not Country.objects.filter(code=code).exists():
+            if code not in countries:
                 raise serializers.ValidationError(f"Unrecognized country code {code!r}")
         return value
 
@@ -795,9 +799,9 @@ class WindowsVersionFilter(BaseFilter):
         return f"(normandy.os.isWindows && normandy.os.windowsVersion in {self.initial_data['versions_list']})"
 
     def validate_versions_list(self, versions_list):
-        from normandy.recipes.models import WindowsVersion
+        from normandy.recipes.models import ReferenceData
 
-        all_versions = WindowsVersion.objects.values_list("nt_version", flat=True)
+        all_versions = ReferenceData.get().windows_versions
         for version in versions_list:
             if version not in all_versions:
                 raise serializers.ValidationError(f"Unrecognized windows version slug {version!r}")
@@ -1002,9 +1006,8 @@ class JexlFilter(BaseFilter):
 
     def to_jexl(self, revision):
         built_expression = "(" + self.initial_data["expression"] + ")"
-        jexl = get_normandy_jexl()
 
-        errors = list(jexl.validate(built_expression))
+        errors = list(parse_cached(built_expression).errors)
         if errors:
             raise serializers.ValidationError(errors)
 
@@ -1155,9 +1158,31 @@ def _calculate_by_type():
 by_type = _calculate_by_type()
 
 
+# The number of distinct filter objects, and lists of them, to keep parsed.
+PARSED_FILTER_CACHE_SIZE = 1024
+
+
 def from_data(data):
+    """
+    Build the filter described by `data`.
+
+    Filters are cached by their content, so the same instance may be returned
+    to several callers and must not be modified.
+    """
+    return _from_data_json(json.dumps(data, sort_keys=True))
+
+
+@lru_cache(maxsize=PARSED_FILTER_CACHE_SIZE)
+def _from_data_json(data_json):
+    data = json.loads(data_json)
     cls = by_type.get(data["type"])
     if cls:
         return cls(data=data)
     else:
         raise ValueError(f'Unknown type "{data["type"]}.')
+
+
+@lru_cache(maxsize=PARSED_FILTER_CACHE_SIZE)
+def from_json(filter_object_json):
+    """Build the filters in a JSON list of filter objects, as stored on revisions."""
+    return tuple(from_data(data) for data in json.loads(filter_object_json))
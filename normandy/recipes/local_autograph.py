@@ -0,0 +1,236 @@
+"""
+A stand-in for an Autograph server, for signing content without one.
+
+It implements Autograph's ``/sign/data`` endpoint for content signatures with
+a P-384 key generated at startup, and serves a matching certificate chain as
+the x5u. The signatures it makes verify with the same code that verifies real
+Autograph signatures, so signing and verification can be exercised end to end.
+
+Hawk authentication is required to be present, but isn't checked. This is
+only meant for tests and local development.
+"""
+
+import base64
+import hashlib
+import json
+import textwrap
+import threading
+import uuid
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import fastecdsa.ecdsa
+import fastecdsa.keys
+import pytz
+from fastecdsa import curve
+from fastecdsa.encoding.der import DEREncoder
+from fastecdsa.encoding.pem import PEMEncoder
+from pyasn1.codec.der.decoder import decode as der_decode
+from pyasn1.codec.der.encoder import encode as der_encode
+from pyasn1.type import univ, useful
+from pyasn1_modules import rfc5280
+
+
+# ecdsa-with-SHA384, from RFC 5758
+ECDSA_WITH_SHA384 = univ.ObjectIdentifier("1.2.840.10045.4.3.3")
+
+X5U_PATH = "/x5u/chain.pem"
+
+
+class LocalAutograph(object):
+    """
+    A local Autograph server, running in a background thread.
+
+    Use it as a context manager, or call `start` and `stop`. Once started,
+    `url` can be used as ``AUTOGRAPH_URL``, and the certificate chain matches
+    `root_hash` and `subject_cn`.
+    """
+
+    def __init__(
+        self,
+        host="127.0.0.1",
+        port=0,
+        subject_cn="normandy.content-signature.mozilla.org",
+        validity=timedelta(days=30),
+    ):
+        self.subject_cn = subject_cn
+        self.requests_count = 0
+        self._lock = threading.Lock()
+
+        self.private_key, public_key = fastecdsa.keys.gen_keypair(curve.P384)
+        root_private_key, root_public_key = fastecdsa.keys.gen_keypair(curve.P384)
+        not_before = datetime.utcnow().replace(tzinfo=pytz.utc) - timedelta(days=1)
+        not_after = not_before + validity
+        root_cert = make_certificate(
+            "Normandy Local Autograph Root",
+            root_public_key,
+            "Normandy Local Autograph Root",
+            root_private_key,
+            not_before,
+            not_after,
+            serial=1,
+        )
+        signing_cert = make_certificate(
+            subject_cn,
+            public_key,
+            "Normandy Local Autograph Root",
+            root_private_key,
+            not_before,
+            not_after,
+            serial=2,
+        )
+        self.root_hash = hashlib.sha256(root_cert).hexdigest()
+        self.chain_pem = "".join(pem_certificate(cert) for cert in [signing_cert, root_cert])
+        self.public_key = public_key_b64(public_key)
+
+        self.server = ThreadingHTTPServer((host, port), AutographRequestHandler)
+        self.server.autograph = self
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    @property
+    def x5u(self):
+        return self.url.rstrip("/") + X5U_PATH
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def sign(self, data):
+        """Make an Autograph style content signature of some bytes."""
+        r, s = fastecdsa.ecdsa.sign(
+            b"Content-Signature:\x00" + data,
+            self.private_key,
+            curve=curve.P384,
+            hashfunc=hashlib.sha384,
+        )
+        signature = r.to_bytes(48, "big") + s.to_bytes(48, "big")
+        return base64.urlsafe_b64encode(signature).decode()
+
+    def sign_request(self, signing_request):
+        with self._lock:
+            self.requests_count += 1
+        return [
+            {
+                "ref": str(uuid.uuid4()),
+                "type": "contentsignature",
+                "mode": "p384ecdsa",
+                "signer_id": "normandy",
+                "public_key": self.public_key,
+                "signature": self.sign(base64.b64decode(item["input"])),
+                "x5u": self.x5u,
+            }
+            for item in signing_request
+        ]
+
+
+class AutographRequestHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != X5U_PATH:
+            self.send_error(404)
+            return
+        self.send_body(self.server.autograph.chain_pem.encode(), "application/x-pem-file")
+
+    def do_POST(self):
+        if self.path != "/sign/data":
+            self.send_error(404)
+            return
+        if not self.headers.get("Authorization", "").startswith("Hawk "):
+            self.send_error(401)
+            return
+
+        length = int(self.headers.get("Content-Length", 0))
+        try:
+            signing_request = json.loads(self.rfile.read(length))
+            response = self.server.autograph.sign_request(signing_request)
+        except (ValueError, TypeError, KeyError):
+            self.send_error(400)
+            return
+        self.send_body(json.dumps(response).encode(), "application/json")
+
+    def send_body(self, body, content_type):
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Keep test and benchmark output quiet.
+        pass
+
+
+def public_key_b64(public_key):
+    """Encode a public key the way Autograph does: base64 DER, without armor."""
+    pem = PEMEncoder.encode_public_key(public_key)
+    return "".join(line for line in pem.splitlines() if not line.startswith("-----"))
+
+
+def make_name(common_name):
+    value = rfc5280.DirectoryString()
+    value["utf8String"] = common_name
+    attribute = rfc5280.AttributeTypeAndValue()
+    attribute["type"] = rfc5280.id_at_commonName
+    attribute["value"] = der_encode(value)
+    rdn = rfc5280.RelativeDistinguishedName()
+    rdn[0] = attribute
+    name = rfc5280.Name()
+    name["rdnSequence"][0] = rdn
+    return name
+
+
+def make_time(dt):
+    time = rfc5280.Time()
+    time["utcTime"] = useful.UTCTime(dt.strftime("%y%m%d%H%M%SZ"))
+    return time
+
+
+def make_certificate(
+    subject_cn, public_key, issuer_cn, issuer_private_key, not_before, not_after, serial
+):
+    """Make a DER encoded certificate, signed by the issuer's key."""
+    algorithm = rfc5280.AlgorithmIdentifier()
+    algorithm["algorithm"] = ECDSA_WITH_SHA384
+
+    tbs = rfc5280.TBSCertificate()
+    tbs["version"] = "v3"
+    tbs["serialNumber"] = serial
+    tbs["signature"] = algorithm
+    tbs["issuer"] = make_name(issuer_cn)
+    tbs["validity"]["notBefore"] = make_time(not_before)
+    tbs["validity"]["notAfter"] = make_time(not_after)
+    tbs["subject"] = make_name(subject_cn)
+    spki_der = base64.b64decode(public_key_b64(public_key))
+    tbs["subjectPublicKeyInfo"] = der_decode(spki_der, asn1Spec=rfc5280.SubjectPublicKeyInfo())[0]
+
+    r, s = fastecdsa.ecdsa.sign(
+        der_encode(tbs), issuer_private_key, curve=curve.P384, hashfunc=hashlib.sha384
+    )
+    cert = rfc5280.Certificate()
+    cert["tbsCertificate"] = tbs
+    cert["signatureAlgorithm"] = algorithm
+    cert["signature"] = univ.BitString.fromOctetString(DEREncoder.encode_signature(r, s))
+    return der_encode(cert)
+
+
+def pem_certificate(der):
+    lines = textwrap.wrap(base64.b64encode(der).decode(), 64)
+    return "-----BEGIN CERTIFICATE-----\n" + "\n".join(lines) + "\n-----END CERTIFICATE-----\n"
@@ -0,0 +1,335 @@
+"""
+A stand-in for a Remote Settings (Kinto) server, for publishing recipes without one.
+
+It implements the parts of the Kinto HTTP API that `RemoteSettings` uses: the
+server info with the signer capability, collection metadata and approval,
+records with their tombstones, and batch requests. Approving the changes of a
+workspace collection copies its records to the publish bucket, and rolling
+back resets the workspace to what was last published.
+
+Requests can be slowed down with a fixed latency, and made to fail with
+`LocalRemoteSettings.fail`, to measure and test how Normandy behaves with a
+slow or unreliable server. This is only meant for tests and local development.
+"""
+
+import base64
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+RECORDS_PATH_RE = re.compile(
+    r"^/buckets/(?P<bucket>[^/]+)/collections/(?P<collection>[^/]+)/records(/(?P<id>[^/]+))?$"
+)
+COLLECTION_PATH_RE = re.compile(r"^/buckets/(?P<bucket>[^/]+)/collections/(?P<collection>[^/]+)$")
+
+
+class LocalRemoteSettings(object):
+    """
+    A local Remote Settings server, running in a background thread.
+
+    Use it as a context manager, or call `start` and `stop`. Once started,
+    `url` can be used as ``REMOTE_SETTINGS_URL``. Every request received,
+    including the ones inside batches, is recorded in `requests` as a
+    ``(method, path)`` tuple.
+    """
+
+    def __init__(
+        self,
+        host="127.0.0.1",
+        port=0,
+        username="normandy",
+        password="n0rm4ndy",
+        workspace_bucket="main-workspace",
+        publish_bucket="main",
+        collections=("normandy-recipes-capabilities",),
+        batch_max_requests=25,
+        latency=0,
+    ):
+        self.username = username
+        self.password = password
+        self.workspace_bucket = workspace_bucket
+        self.publish_bucket = publish_bucket
+        self.collections = list(collections)
+        self.batch_max_requests = batch_max_requests
+        self.latency = latency
+        self.requests = []
+
+        self._lock = threading.RLock()
+        self._failures = []
+        self._timestamp = 0
+        self._records = {}
+        self._tombstones = {}
+        self._metadata = {}
+        for collection in self.collections:
+            for bucket in [workspace_bucket, publish_bucket]:
+                self._records[(bucket, collection)] = {}
+                self._tombstones[(bucket, collection)] = {}
+            self._metadata[collection] = {"id": collection, "status": "signed"}
+
+        self.server = ThreadingHTTPServer((host, port), RemoteSettingsRequestHandler)
+        self.server.remotesettings = self
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    @property
+    def user_id(self):
+        return f"account:{self.username}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def fail(self, method, path_pattern, status=503, times=1):
+        """
+        Make the next `times` requests with `method` and a path matching the
+        regular expression `path_pattern` fail with `status`, before they
+        have any effect. Requests inside batches can fail individually.
+        """
+        with self._lock:
+            self._failures.append([method.upper(), re.compile(path_pattern), status, times])
+
+    def records(self, bucket, collection):
+        """Return the current records of a collection."""
+        with self._lock:
+            return [dict(r) for r in self._records[(bucket, collection)].values()]
+
+    def published_records(self, collection=None):
+        """Return the records that were approved in the publish bucket."""
+        return self.records(self.publish_bucket, collection or self.collections[0])
+
+    def handle(self, method, path, params=None, body=None, authenticated=True):
+        """
+        Handle a request to the API, and return the status and the response body.
+        """
+        method = method.upper()
+        with self._lock:
+            self.requests.append((method, path))
+            for failure in self._failures:
+                failure_method, pattern, status, times = failure
+                if failure_method == method and pattern.search(path) and times > 0:
+                    failure[3] -= 1
+                    return status, error_body(status, "Failure injected for testing")
+
+        if path in ["", "/"] and method == "GET":
+            return 200, self.server_info(authenticated)
+        if not authenticated:
+            return 401, error_body(401, "Please authenticate yourself to use this endpoint.")
+        if path == "/batch" and method == "POST":
+            return self.handle_batch(body)
+
+        match = RECORDS_PATH_RE.match(path)
+        if match:
+            key = (match.group("bucket"), match.group("collection"))
+            if key not in self._records:
+                return 404, error_body(404, "Collection not found")
+            record_id = match.group("id")
+            if record_id is None and method == "GET":
+                return 200, {"data": self.get_records(key, params or {})}
+            if record_id is not None and method == "PUT":
+                return 200, {"data": self.put_record(key, record_id, body["data"])}
+            if record_id is not None and method == "DELETE":
+                tombstone = self.delete_record(key, record_id)
+                if tombstone is None:
+                    return 404, error_body(404, "Record not found")
+                return 200, {"data": tombstone}
+
+        match = COLLECTION_PATH_RE.match(path)
+        if match and match.group("collection") in self._metadata:
+            collection = match.group("collection")
+            if method == "GET":
+                return 200, {
+                    "data": dict(self._metadata[collection]),
+                    "permissions": {"write": [self.user_id]},
+                }
+            if method == "PATCH" and match.group("bucket") == self.workspace_bucket:
+                return 200, {"data": self.patch_collection(collection, body.get("data", {}))}
+
+        return 404, error_body(404, "Not found")
+
+    def server_info(self, authenticated):
+        info = {
+            "project_name": "Remote Settings (local)",
+            "settings": {"batch_max_requests": self.batch_max_requests, "readonly": False},
+            "capabilities": {
+                "signer": {
+                    "to_review_enabled": True,
+                    "resources": [
+                        {
+                            "source": {"bucket": self.workspace_bucket, "collection": collection},
+                            "destination": {
+                                "bucket": self.publish_bucket,
+                                "collection": collection,
+                            },
+                            "to_review_enabled": False,
+                        }
+                        for collection in self.collections
+                    ],
+                }
+            },
+        }
+        if authenticated:
+            info["user"] = {"id": self.user_id}
+        return info
+
+    def handle_batch(self, body):
+        subrequests = body.get("requests", [])
+        if len(subrequests) > self.batch_max_requests:
+            return 400, error_body(400, "Too many requests in batch")
+
+        responses = []
+        for request in subrequests:
+            path = request["path"]
+            status, response = self.handle(request["method"], path, body=request.get("body") or {})
+            responses.append({"status": status, "path": path, "body": response, "headers": {}})
+        return 200, {"responses": responses}
+
+    def next_timestamp(self):
+        # Timestamps are in milliseconds, and always increase.
+        self._timestamp = max(self._timestamp + 1, int(time.time() * 1000))
+        return self._timestamp
+
+    def get_records(self, key, params):
+        with self._lock:
+            records = list(self._records[key].values())
+            since = params.get("_since")
+            if since is not None:
+                since = int(since.strip('"'))
+                records = [r for r in records if r["last_modified"] > since]
+                records += [
+                    {"id": record_id, "last_modified": last_modified, "deleted": True}
+                    for record_id, last_modified in self._tombstones[key].items()
+                    if last_modified > since
+                ]
+            return sorted(records, key=lambda r: r["last_modified"], reverse=True)
+
+    def put_record(self, key, record_id, data):
+        with self._lock:
+            record = {**data, "id": record_id, "last_modified": self.next_timestamp()}
+            self._records[key][record_id] = record
+            self._tombstones[key].pop(record_id, None)
+            return dict(record)
+
+    def delete_record(self, key, record_id):
+        with self._lock:
+            if record_id not in self._records[key]:
+                return None
+            del self._records[key][record_id]
+            last_modified = self.next_timestamp()
+            self._tombstones[key][record_id] = last_modified
+            return {"id": record_id, "last_modified": last_modified, "deleted": True}
+
+    def patch_collection(self, collection, data):
+        with self._lock:
+            status = data.get("status")
+            if status == "to-sign":
+                self.copy_records(collection, self.workspace_bucket, self.publish_bucket)
+            elif status == "to-rollback":
+                self.copy_records(collection, self.publish_bucket, self.workspace_bucket)
+            metadata = self._metadata[collection]
+            metadata.update(data)
+            if status in ["to-sign", "to-rollback"]:
+                metadata["status"] = "signed"
+            metadata["last_modified"] = self.next_timestamp()
+            return dict(metadata)
+
+    def copy_records(self, collection, source_bucket, destination_bucket):
+        """Make the records of the destination the same as the source."""
+        source = self._records[(source_bucket, collection)]
+        destination = self._records[(destination_bucket, collection)]
+        for record_id in list(destination):
+            if record_id not in source:
+                self.delete_record((destination_bucket, collection), record_id)
+        for record_id, record in source.items():
+            data = {k: v for k, v in record.items() if k != "last_modified"}
+            current = destination.get(record_id)
+            if current is None or data != {
+                k: v for k, v in current.items() if k != "last_modified"
+            }:
+                self.put_record((destination_bucket, collection), record_id, data)
+
+
+class RemoteSettingsRequestHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        self.dispatch("GET")
+
+    def do_PUT(self):
+        self.dispatch("PUT")
+
+    def do_PATCH(self):
+        self.dispatch("PATCH")
+
+    def do_DELETE(self):
+        self.dispatch("DELETE")
+
+    def do_POST(self):
+        self.dispatch("POST")
+
+    def dispatch(self, method):
+        remotesettings = self.server.remotesettings
+        if remotesettings.latency:
+            time.sleep(remotesettings.latency)
+
+        url = urlparse(self.path)
+        if not url.path.startswith("/v1"):
+            self.send_json(404, error_body(404, "Not found"))
+            return
+        path = url.path.split("/v1", 1)[1].rstrip("/") or "/"
+        params = {k: v[0] for k, v in parse_qs(url.query).items()}
+
+        length = int(self.headers.get("Content-Length", 0))
+        try:
+            body = json.loads(self.rfile.read(length)) if length else {}
+        except ValueError:
+            self.send_json(400, error_body(400, "Invalid JSON"))
+            return
+
+        status, response = remotesettings.handle(
+            method, path, params=params, body=body, authenticated=self.is_authenticated()
+        )
+        self.send_json(status, response)
+
+    def is_authenticated(self):
+        remotesettings = self.server.remotesettings
+        credentials = f"{remotesettings.username}:{remotesettings.password}"
+        expected = "Basic " + base64.b64encode(credentials.encode()).decode()
+        return self.headers.get("Authorization") == expected
+
+    def send_json(self, status, response):
+        body = json.dumps(response).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        if status >= 500:
+            self.send_header("Retry-After", "0")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Keep test and benchmark output quiet.
+        pass
+
+
+def error_body(status, message):
+    return {"code": status, "errno": 999, "error": "Error", "message": message}
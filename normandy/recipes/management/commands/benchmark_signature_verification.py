@@ -0,0 +1,76 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from normandy.recipes import signing
+from normandy.recipes.models import Action, Recipe
+
+
+class Command(BaseCommand):
+    """
+    Time verifying the signatures of every signed recipe and action, decoding
+    the public key for each signature versus reusing the decoded keys.
+    """
+
+    help = "Benchmark signature verification for all signed recipes and actions"
+    requires_system_checks = False
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--repeat", type=int, default=5, help="Number of times to verify the signed set"
+        )
+
+    def handle(self, *args, repeat=5, **options):
+        items = self.get_items()
+        if not items:
+            self.stdout.write("No signed recipes or actions to verify")
+            return
+
+        def uncached():
+            for item in items:
+                signing.decode_public_key.cache_clear()
+                try:
+                    signing.verify_signature_pubkey(*item)
+                except signing.BadSignature:
+                    pass
+
+        def cached():
+            signing.verify_many(items)
+
+        uncached_time = self.best_time(uncached, repeat)
+        signing.decode_public_key.cache_clear()
+        cached_time = self.best_time(cached, repeat)
+
+        self.stdout.write(f"Verified {len(items)} signatures, best of {repeat}:")
+        self.stdout.write(f" * decoding each key: {uncached_time * 1000:.1f}ms")
+        self.stdout.write(f" * reusing decoded keys: {cached_time * 1000:.1f}ms")
+        if cached_time:
+            self.stdout.write(f" * speedup: {uncached_time / cached_time:.2f}x")
+
+    def get_items(self):
+        """
+        Get ``(data, signature, pubkey)`` for every signed recipe and action,
+        fetching the public keys of the certificate chains once.
+        """
+        objects = list(Recipe.objects.exclude(signature=None).select_related("signature"))
+        objects += list(Action.objects.exclude(signature=None).select_related("signature"))
+
+        pubkeys_by_x5u = {}
+        items = []
+        for obj in objects:
+            pubkey = obj.signature.public_key
+            x5u = obj.signature.x5u
+            if x5u:
+                if x5u not in pubkeys_by_x5u:
+                    pubkeys_by_x5u[x5u] = signing.get_x5u_public_key(x5u)
+                pubkey = pubkeys_by_x5u[x5u]
+            items.append((obj.canonical_json(), obj.signature.signature, pubkey))
+        return items
+
+    def best_time(self, func, repeat):
+        times = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func()
+            times.append(time.perf_counter() - start)
+        return min(times)
@@ -0,0 +1,152 @@
+from contextlib import contextmanager
+
+import markus
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import F
+
+from normandy.recipes.exports import RemoteSettings
+from normandy.recipes.models import OutboxEvent, Recipe
+
+
+metrics = markus.get_metrics("normandy.outbox")
+
+# The first key of the advisory locks taken on recipes, with the recipe id as
+# the second, to keep them apart from any other advisory locks.
+ADVISORY_LOCK_ID = 7340
+
+
+class Command(BaseCommand):
+    """
+    Sign and publish the recipes that have events queued in the outbox.
+
+    All of the pending events for a recipe are handled together. The
+    signature is saved in a short transaction of its own, and Remote Settings
+    is updated after it is committed, so that no transaction is kept open
+    while external services are called. Events that fail are kept and
+    retried by the next run, until they have been tried
+    ``RECIPE_OUTBOX_MAX_ATTEMPTS`` times.
+    """
+
+    help = "Process queued recipe signing and publishing"
+    requires_system_checks = False
+
+    def handle(self, *args, **options):
+        remote_settings = RemoteSettings()
+
+        recipe_ids = (
+            self.get_pending_events()
+            .order_by("recipe_id")
+            .values_list("recipe_id", flat=True)
+            .distinct()
+        )
+
+        processed = 0
+        failed = 0
+        for recipe_id in recipe_ids:
+            result = self.process_recipe(recipe_id, remote_settings)
+            if result is True:
+                processed += 1
+            elif result is False:
+                failed += 1
+
+        metrics.gauge("processed", processed)
+        metrics.gauge("failed", failed)
+        self.stdout.write(f"Processed outbox events for {processed} recipes, {failed} failed")
+
+    def get_pending_events(self):
+        return OutboxEvent.objects.filter(attempts__lt=settings.RECIPE_OUTBOX_MAX_ATTEMPTS)
+
+    @contextmanager
+    def lock_recipe(self, recipe_id):
+        """
+        Hold a lock on handling the events of a recipe, for as long as the
+        block runs. Unlike a row lock, it doesn't need a transaction to be
+        kept open while Autograph and Remote Settings are called. Yields
+        False if another worker holds the lock.
+        """
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_try_advisory_lock(%s, %s)", [ADVISORY_LOCK_ID, recipe_id])
+            locked = cursor.fetchone()[0]
+        try:
+            yield locked
+        finally:
+            if locked:
+                with connection.cursor() as cursor:
+                    cursor.execute(
+                        "SELECT pg_advisory_unlock(%s, %s)", [ADVISORY_LOCK_ID, recipe_id]
+                    )
+
+    def process_recipe(self, recipe_id, remote_settings):
+        """
+        Handle the pending events for a recipe.
+
+        Returns True if they were handled, False if they failed, or None if
+        they are being handled by another worker, or the recipe changed while
+        they were being handled.
+        """
+        with self.lock_recipe(recipe_id) as locked:
+            if not locked:
+                return None
+
+            event_ids = list(
+                self.get_pending_events().filter(recipe_id=recipe_id).values_list("id", "kind")
+            )
+            if not event_ids:
+                return None
+            kinds = {kind for _, kind in event_ids}
+            event_ids = [event_id for event_id, _ in event_ids]
+
+            try:
+                # Publishing sends the signature, so sign first in any case.
+                recipe = self.sign_recipe(recipe_id)
+                if recipe is None:
+                    # The change queued events of its own, and the next run
+                    # will handle them together with these.
+                    return None
+
+                if OutboxEvent.PUBLISH in kinds:
+                    if recipe.approved_revision and recipe.approved_revision.enabled:
+                        remote_settings.publish(recipe)
+                    else:
+                        remote_settings.unpublish(recipe)
+            except Exception as e:
+                self.stderr.write(f"Failed to process outbox events for recipe {recipe_id}: {e!r}")
+                OutboxEvent.objects.filter(id__in=event_ids).update(
+                    attempts=F("attempts") + 1, last_error=repr(e)
+                )
+                return False
+
+            OutboxEvent.objects.filter(id__in=event_ids).delete()
+            return True
+
+    def sign_recipe(self, recipe_id):
+        """
+        Update the signature of a recipe, calling Autograph outside of any
+        transaction, and save only the signature.
+
+        Returns the recipe, or None if it was approved, enabled or disabled
+        while it was being signed, in which case nothing is saved.
+        """
+        recipe = Recipe.objects.get(id=recipe_id)
+        signed_state = get_signing_state(recipe)
+        recipe.update_signature()
+
+        with transaction.atomic():
+            current = Recipe.objects.select_for_update().get(id=recipe_id)
+            if get_signing_state(current) != signed_state:
+                if recipe.signature_id not in [None, current.signature_id]:
+                    recipe.signature.delete()
+                return None
+            current.signature = recipe.signature
+            current.save(update_fields=["signature"])
+        return current
+
+
+def get_signing_state(recipe):
+    """Return what the signature of a recipe depends on."""
+    revision = recipe.approved_revision
+    if revision is None:
+        return None, False
+    return revision.id, revision.enabled
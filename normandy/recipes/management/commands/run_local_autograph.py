@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+
+from normandy.recipes.local_autograph import LocalAutograph
+
+
+class Command(BaseCommand):
+    """
+    Run a local stand-in for Autograph, so that content can be signed and
+    verified without a real Autograph server.
+    """
+
+    help = "Run a local Autograph server for development and benchmarks"
+    requires_system_checks = False
+
+    def add_arguments(self, parser):
+        parser.add_argument("--host", default="127.0.0.1", help="Address to listen on")
+        parser.add_argument("--port", type=int, default=8765, help="Port to listen on")
+
+    def handle(self, *args, host="127.0.0.1", port=8765, **options):
+        autograph = LocalAutograph(host=host, port=port)
+        self.stdout.write(f"Local Autograph listening on {autograph.url}")
+        self.stdout.write("Configure Normandy to use it with:")
+        self.stdout.write(f"  DJANGO_AUTOGRAPH_URL={autograph.url}")
+        self.stdout.write("  DJANGO_AUTOGRAPH_HAWK_ID=normandy")
+        self.stdout.write("  DJANGO_AUTOGRAPH_HAWK_SECRET_KEY=local-autograph")
+        self.stdout.write(f"  DJANGO_CERTIFICATES_EXPECTED_ROOT_HASH={autograph.root_hash}")
+        self.stdout.write(f"  DJANGO_CERTIFICATES_EXPECTED_SUBJECT_CN={autograph.subject_cn}")
+        self.stdout.flush()
+        try:
+            autograph.server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            autograph.server.server_close()
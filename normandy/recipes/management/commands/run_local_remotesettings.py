@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand
+
+from normandy.recipes.local_remotesettings import LocalRemoteSettings
+
+
+class Command(BaseCommand):
+    """
+    Run a local stand-in for Remote Settings, so that recipes can be
+    published without a real Remote Settings server.
+    """
+
+    help = "Run a local Remote Settings server for development and benchmarks"
+    requires_system_checks = False
+
+    def add_arguments(self, parser):
+        parser.add_argument("--host", default="127.0.0.1", help="Address to listen on")
+        parser.add_argument("--port", type=int, default=8888, help="Port to listen on")
+        parser.add_argument(
+            "--latency", type=float, default=0, help="Seconds to wait before each response"
+        )
+        parser.add_argument(
+            "--batch-max-requests",
+            type=int,
+            default=25,
+            help="Maximum number of requests in a batch",
+        )
+
+    def handle(self, *args, host="127.0.0.1", port=8888, **options):
+        remotesettings = LocalRemoteSettings(
+            host=host,
+            port=port,
+            latency=options["latency"],
+            batch_max_requests=options["batch_max_requests"],
+        )
+        self.stdout.write(f"Local Remote Settings listening on {remotesettings.url}")
+        self.stdout.write("Configure Normandy to use it with:")
+        self.stdout.write(f"  DJANGO_REMOTE_SETTINGS_URL={remotesettings.url}")
+        self.stdout.write(f"  DJANGO_REMOTE_SETTINGS_USERNAME={remotesettings.username}")
+        self.stdout.write(f"  DJANGO_REMOTE_SETTINGS_PASSWORD={remotesettings.password}")
+        self.stdout.flush()
+        try:
+            remotesettings.server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            remotesettings.server.server_close()
@@ -1,10 +1,12 @@
 from django.core.management.base import BaseCommand
 
-from normandy.recipes.models import Recipe
-from normandy.recipes.exports import RemoteSettings, recipe_as_record
-
-
-KINTO_INTERNAL_FIELDS = ("last_modified", "schema")
+from normandy.recipes.models import PublishedRecord, Recipe, RemoteSettingsState
+from normandy.recipes.exports import (
+    KINTO_INTERNAL_FIELDS,
+    RemoteSettings,
+    record_hash,
+    recipe_as_record,
+)
 
 
 def compare_remote(recipe, record):
@@ -13,8 +15,22 @@ def compare_remote(recipe, record):
     return as_record == cleaned_record
 
 
+def get_recipe_or_placeholder(recipe_id):
+    try:
+        return Recipe.objects.get(id=recipe_id)
+    except Recipe.DoesNotExist:
+        return Recipe(id=recipe_id)
+
+
 class Command(BaseCommand):
-    """Check that Remote Settings published content is consistent and up-to-date."""
+    """
+    Check that Remote Settings published content is consistent and up-to-date.
+
+    After the first run, only the records that changed remotely since the
+    previous run are downloaded, and local recipes are compared to what was
+    last published for them, so each run is cheap. Use ``--full`` to compare
+    every record instead.
+    """
 
     help = "Sync recipes with Remote Settings"
 
@@ -22,34 +38,40 @@ class Command(BaseCommand):
         parser.add_argument(
             "--dry-run", action="store_true", default=False, help="Do not sync, just print out."
         )
+        parser.add_argument(
+            "--full",
+            action="store_true",
+            default=False,
+            help="Compare every published record, not only the changes since the last sync.",
+        )
 
-    def handle(self, *args, dry_run=False, **options):
+    def handle(self, *args, dry_run=False, full=False, **options):
         remote_settings = RemoteSettings()
 
-        local_recipes = Recipe.objects.filter(approved_revision__enabled_state__enabled=True)
-        remote_records = remote_settings.published_recipes()
-
-        # Compare the two sets: local recipes that are missing remotely will
-        # be published, recipes that differ will be updated, and recipes that
-        # are only on the remote server will be unpublished.
-        to_publish = []
-        to_update = []
-        local_by_id = {str(r.id): r for r in local_recipes}
-        remote_by_id = {r["id"]: r for r in remote_records}
-        for rid, local_recipe in local_by_id.items():
-            if rid in remote_by_id:
-                remote_record = remote_by_id.pop(rid)
-                if not compare_remote(local_recipe, remote_record):
-                    to_update.append(local_recipe)
-            else:
-                to_publish.append(local_recipe)
-        # Lookup locally the recipes that are published but should not.
-        to_unpublish = []
-        for rid in remote_by_id.keys():
-            try:
-                to_unpublish.append(Recipe.objects.get(id=rid))
-            except Recipe.DoesNotExist:
-                to_unpublish.append(Recipe(id=rid))
+        since = None if full else RemoteSettingsState.get_last_modified()
+        remote_records = remote_settings.published_recipes(since=since)
+
+        if since is None:
+            to_publish, to_update, to_unpublish, in_sync = self.compare_all(remote_records)
+        else:
+            to_publish, to_update, to_unpublish, in_sync = self.compare_changes(remote_records)
+
+        if not dry_run:
+            for recipe, record in in_sync:
+                PublishedRecord.objects.update_or_create(
+                    recipe_id=recipe.id,
+                    defaults={
+                        "record_hash": record_hash(record),
+                        "signature": recipe.signature.signature if recipe.signature else "",
+                        "last_modified": record.get("last_modified"),
+                    },
+                )
+
+            timestamps = [r["last_modified"] for r in remote_records if "last_modified" in r]
+            if since is not None:
+                timestamps.append(since)
+            if timestamps:
+                RemoteSettingsState.set_last_modified(max(timestamps))
 
         # If there is nothing to do, exit.
         if not to_publish and not to_update and not to_unpublish:
@@ -61,15 +83,11 @@ class Command(BaseCommand):
         self.stdout.write(style(f"{len(to_publish)} recipes to publish:"))
         for r in to_publish:
             self.stdout.write(f" * {r.approved_revision.name!r} (id={r.id!r})")
-            if not dry_run:
-                remote_settings.publish(r)
 
         style = self.style.SUCCESS if not to_update else self.style.MIGRATE_LABEL
         self.stdout.write(style(f"{len(to_update)} recipes to update:"))
         for r in to_update:
             self.stdout.write(f" * {r.approved_revision.name!r} (id={r.id!r})")
-            if not dry_run:
-                remote_settings.publish(r)
 
         style = self.style.SUCCESS if not to_unpublish else self.style.MIGRATE_LABEL
         self.stdout.write(style(f"{len(to_unpublish)} recipes to unpublish:"))
@@ -80,5 +98,99 @@ class Command(BaseCommand):
                 else self.style.WARNING("Unknown locally")
             )
             self.stdout.write(f" * {name!r} (id={r.id!r})")
-            if not dry_run:
-                remote_settings.unpublish(r)
+
+        if not dry_run:
+            remote_settings.publish_many(to_publish + to_update, approve_changes=False)
+            remote_settings.unpublish_many(to_unpublish, approve_changes=False)
+            remote_settings.approve_changes()
+
+    def compare_all(self, remote_records):
+        """
+        Compare every local recipe with every remote record: local recipes
+        that are missing remotely will be published, recipes that differ will
+        be updated, and recipes that are only on the remote server will be
+        unpublished.
+        """
+        local_recipes = Recipe.objects.only_enabled()
+
+        to_publish = []
+        to_update = []
+        in_sync = []
+        local_by_id = {str(r.id): r for r in local_recipes}
+        remote_by_id = {r["id"]: r for r in remote_records}
+        for rid, local_recipe in local_by_id.items():
+            if rid in remote_by_id:
+                remote_record = remote_by_id.pop(rid)
+                if compare_remote(local_recipe, remote_record):
+                    in_sync.append((local_recipe, remote_record))
+                else:
+                    to_update.append(local_recipe)
+            else:
+                to_publish.append(local_recipe)
+        # Lookup locally the recipes that are published but should not.
+        to_unpublish = [get_recipe_or_placeholder(rid) for rid in remote_by_id.keys()]
+
+        return to_publish, to_update, to_unpublish, in_sync
+
+    def compare_changes(self, changed_records):
+        """
+        Compare local recipes with what was last published for them, and the
+        records that changed remotely with what was published for them.
+        """
+        local_recipes = (
+            Recipe.objects.only_enabled()
+            .select_related("signature", "approved_revision__action")
+            .prefetch_related(
+                "approved_revision__channels",
+                "approved_revision__countries",
+                "approved_revision__locales",
+            )
+        )
+        local_by_id = {str(r.id): r for r in local_recipes}
+        published_by_id = {str(p.recipe_id): p for p in PublishedRecord.objects.all()}
+
+        to_publish = {}
+        to_update = {}
+        to_unpublish = {}
+        in_sync = []
+
+        # Local changes that haven't been published
+        for rid, recipe in local_by_id.items():
+            published = published_by_id.get(rid)
+            if published is None:
+                to_publish[rid] = recipe
+            elif record_hash(recipe_as_record(recipe)) != published.record_hash:
+                to_update[rid] = recipe
+        # Published recipes that were disabled or deleted since
+        stale_ids = [int(rid) for rid in published_by_id if rid not in local_by_id]
+        stale_recipes = Recipe.objects.in_bulk(stale_ids)
+        for recipe_id in stale_ids:
+            to_unpublish[str(recipe_id)] = stale_recipes.get(recipe_id, Recipe(id=recipe_id))
+
+        # Remote changes that don't match what was published
+        for record in changed_records:
+            rid = record["id"]
+            recipe = local_by_id.get(rid)
+            if rid in to_publish or rid in to_update or rid in to_unpublish:
+                continue
+
+            if recipe is None:
+                if not record.get("deleted"):
+                    to_unpublish[rid] = get_recipe_or_placeholder(rid)
+            elif record.get("deleted"):
+                to_publish[rid] = recipe
+            else:
+                published = published_by_id[rid]
+                if record.get("last_modified") == published.last_modified:
+                    continue
+                if record_hash(record) == published.record_hash:
+                    in_sync.append((recipe, record))
+                else:
+                    to_update[rid] = recipe
+
+        return (
+            list(to_publish.values()),
+            list(to_update.values()),
+            list(to_unpublish.values()),
+            in_sync,
+        )
@@ -29,14 +29,16 @@ class Command(BaseCommand):
         else:
             actions_to_update = self.get_outdated_actions()
 
-        count = actions_to_update.count()
+        actions_to_update = list(actions_to_update)
+        count = len(actions_to_update)
         if count == 0:
             self.stdout.write("No out of date actions to sign")
         else:
             self.stdout.write(f"Signing {count} actions:")
             for action in actions_to_update:
                 self.stdout.write(" * " + action.name)
-                action.update_signature()
+            Action.update_signatures(actions_to_update)
+            for action in actions_to_update:
                 action.save()
 
         metrics.gauge("signed", count, tags=["force"] if force else [])
@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.template.defaultfilters import pluralize
+
+from normandy.recipes.models import CollectionVersion, RecipeRevision, SignedRecipeManifest
+
+
+class Command(BaseCommand):
+    """
+    Recompile the stored filter expression of every revision. This is needed
+    whenever the way filters are rendered to JEXL changes.
+    """
+
+    help = "Updates the stored filter expressions of recipe revisions"
+
+    @transaction.atomic
+    def handle(self, *args, **options):
+        revisions = RecipeRevision.objects.select_related("action").prefetch_related(
+            "channels", "countries", "locales"
+        )
+
+        update_count = 0
+        for revision in revisions:
+            filter_expression = revision.compile_filter_expression()
+            if revision.compiled_filter_expression != filter_expression:
+                RecipeRevision.objects.filter(id=revision.id).update(
+                    compiled_filter_expression=filter_expression
+                )
+                update_count += 1
+
+        if update_count:
+            # Updates don't send signals, so invalidate caches of recipe data here
+            CollectionVersion.bump()
+            SignedRecipeManifest.invalidate()
+
+        self.stdout.write(f"{update_count} revision{pluralize(update_count)} updated")
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.template.defaultfilters import pluralize
+
+from normandy.recipes.models import CollectionVersion, RecipeRevision, SignedRecipeManifest
+
+
+class Command(BaseCommand):
+    """
+    Recalculate the stored capabilities of every revision. This is needed
+    whenever the capabilities required by actions or filters change.
+    """
+
+    help = "Updates the stored capabilities of recipe revisions"
+
+    @transaction.atomic
+    def handle(self, *args, **options):
+        update_count = 0
+        for revision in RecipeRevision.objects.select_related("action"):
+            required_capabilities = sorted(revision.compute_required_capabilities())
+            if revision.required_capabilities != required_capabilities:
+                # Skip `save`, which would validate arguments of old revisions
+                RecipeRevision.objects.filter(id=revision.id).update(
+                    required_capabilities=required_capabilities
+                )
+                update_count += 1
+
+        if update_count:
+            # Updates don't send signals, so invalidate caches of recipe data here
+            CollectionVersion.bump()
+            SignedRecipeManifest.invalidate()
+
+        self.stdout.write(f"{update_count} revision{pluralize(update_count)} updated")
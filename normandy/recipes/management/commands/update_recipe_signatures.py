@@ -6,7 +6,7 @@ from django.core.management.base import BaseCommand
 from django.db.models import Q
 from django.utils import timezone
 
-from normandy.recipes.models import Recipe
+from normandy.recipes.models import Recipe, SignedRecipeManifest
 from normandy.recipes.exports import RemoteSettings
 
 
@@ -34,18 +34,18 @@ class Command(BaseCommand):
         else:
             recipes_to_update = self.get_outdated_recipes()
 
-        count = recipes_to_update.count()
+        recipes_to_update = list(recipes_to_update.select_related("approved_revision"))
+        count = len(recipes_to_update)
         if count == 0:
             self.stdout.write("No out of date recipes to sign")
         else:
             self.stdout.write(f"Signing {count} recipes:")
             for recipe in recipes_to_update:
                 self.stdout.write(" * " + recipe.approved_revision.name)
-                recipe.update_signature()
+            Recipe.update_signatures(recipes_to_update)
+            for recipe in recipes_to_update:
                 recipe.save()
-                remote_settings.publish(recipe, approve_changes=False)
-            # Approve all Remote Settings changes.
-            remote_settings.approve_changes()
+            remote_settings.publish_many(recipes_to_update)
 
         metrics.gauge("signed", count, tags=["force"] if force else [])
 
@@ -63,6 +63,10 @@ class Command(BaseCommand):
                 sig.delete()
 
         metrics.gauge("unsigned", count, tags=["force"] if force else [])
+
+        # Changes rebuild the signed recipe manifest, but settings changes
+        # don't, so catch up with them here.
+        SignedRecipeManifest.rebuild()
         self.stdout.write("all signing done")
 
     def get_outdated_recipes(self):
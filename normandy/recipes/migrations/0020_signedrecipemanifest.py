@@ -0,0 +1,31 @@
+# Generated by Django 2.2.28 on 2026-10-18 19:35
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("recipes", "0019_reciperevision_metadata"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SignedRecipeManifest",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name="ID"
+                    ),
+                ),
+                ("version", models.IntegerField(default=0)),
+                ("built_version", models.IntegerField(null=True)),
+                ("settings_hash", models.CharField(blank=True, max_length=64)),
+                ("content", models.BinaryField(null=True)),
+                ("etag", models.CharField(blank=True, max_length=255)),
+                ("updated", models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 2.2.28 on 2026-10-18 19:40
+
+from django.db import migrations, models
+
+
+def create_collection_version(apps, schema_editor):
+    CollectionVersion = apps.get_model("recipes", "CollectionVersion")
+    CollectionVersion.objects.get_or_create(id=1)
+
+
+def remove_collection_version(apps, schema_editor):
+    CollectionVersion = apps.get_model("recipes", "CollectionVersion")
+    CollectionVersion.objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [("recipes", "0020_signedrecipemanifest")]
+
+    operations = [
+        migrations.CreateModel(
+            name="CollectionVersion",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name="ID"
+                    ),
+                ),
+                ("version", models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(create_collection_version, remove_collection_version),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 2.2.28 on 2026-10-18 19:48
+
+import django.contrib.postgres.fields
+import django.contrib.postgres.indexes
+import json
+
+from django.db import migrations, models
+
+
+def backfill_required_capabilities(apps, schema_editor):
+    # Importing the current filter definitions is unavoidable here, since
+    # capabilities are defined by them and not stored anywhere else yet.
+    from normandy.recipes import filters
+
+    RecipeRevision = apps.get_model("recipes", "RecipeRevision")
+
+    for revision in RecipeRevision.objects.select_related("action"):
+        capabilities = set(revision.extra_capabilities)
+        capabilities.add(f"action.{revision.action.name}")
+        for filter_data in json.loads(revision.filter_object_json or "[]"):
+            capabilities.update(filters.from_data(filter_data).get_capabilities())
+        revision.required_capabilities = sorted(capabilities)
+        revision.save(update_fields=["required_capabilities"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("recipes", "0021_collectionversion"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="reciperevision",
+            name="required_capabilities",
+            field=django.contrib.postgres.fields.ArrayField(
+                base_field=models.CharField(max_length=255), default=list, size=None
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="reciperevision",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["required_capabilities"], name="recipes_rec_require_272b0c_gin"
+            ),
+        ),
+        migrations.RunPython(backfill_required_capabilities, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 2.2.28 on 2026-10-18 19:52
+
+import django.contrib.postgres.fields.jsonb
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("recipes", "0022_reciperevision_required_capabilities"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="reciperevision",
+            name="filter_object_data",
+            field=django.contrib.postgres.fields.jsonb.JSONField(null=True),
+        ),
+        migrations.RunSQL(
+            """
+            UPDATE recipes_reciperevision
+            SET filter_object_data = filter_object_json::jsonb
+            WHERE filter_object_json IS NOT NULL
+            """,
+            migrations.RunSQL.noop,
+        ),
+    ]
@@ -0,0 +1,29 @@
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+# Text search on recipes matches each token case-insensitively anywhere in
+# these fields, which Django does with `UPPER(field::text) LIKE UPPER(%token%)`.
+# Trigram indexes on the same expressions let Postgres use an index for it.
+# Expression indexes can't be declared on models in this version of Django.
+SEARCHED_FIELDS = ["name", "extra_filter_expression", "arguments_json"]
+
+
+def create_index_sql(field):
+    return (
+        f"CREATE INDEX recipes_reciperevision_{field}_trgm "
+        f"ON recipes_reciperevision USING gin (UPPER({field}::text) gin_trgm_ops)"
+    )
+
+
+def drop_index_sql(field):
+    return f"DROP INDEX recipes_reciperevision_{field}_trgm"
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [("recipes", "0023_reciperevision_filter_object_data")]
+
+    operations = [TrigramExtension()] + [
+        migrations.RunSQL(create_index_sql(field), drop_index_sql(field))
+        for field in SEARCHED_FIELDS
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 2.2.28 on 2026-10-18 20:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("recipes", "0024_reciperevision_search_indexes"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="approvalrequest",
+            index=models.Index(fields=["created", "id"], name="recipes_app_created_c7211f_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="reciperevision",
+            index=models.Index(fields=["created", "id"], name="recipes_rec_created_257839_idx"),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 2.2.28 on 2026-10-18 20:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("recipes", "0025_cursor_pagination_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="reciperevision",
+            name="compiled_filter_expression",
+            field=models.TextField(null=True),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 2.2.28 on 2026-10-18 20:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("recipes", "0027_outboxevent"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PublishedRecord",
+            fields=[
+                ("recipe_id", models.IntegerField(primary_key=True, serialize=False)),
+                ("record_hash", models.CharField(max_length=64)),
+                ("signature", models.TextField(blank=True)),
+                ("last_modified", models.BigIntegerField(null=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name="RemoteSettingsState",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name="ID"
+                    ),
+                ),
+                ("last_modified", models.BigIntegerField(null=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,93 @@
+# Generated by Django 2.2.28 on 2026-10-18 20:44
+
+import hashlib
+import json
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+# A copy of `Action.unique_arguments` as of this migration
+UNIQUE_ARGUMENTS = {
+    "preference-experiment": "slug",
+    "multi-preference-experiment": "slug",
+    "preference-rollout": "slug",
+    "show-heartbeat": "surveyId",
+    "opt-out-study": "name",
+}
+
+
+def dump_value(value):
+    # A copy of `canonical_json_dumps` as of this migration
+    return json.dumps(value, ensure_ascii=True, separators=(",", ":"), sort_keys=True)
+
+
+def backfill_unique_argument_values(apps, schema_editor):
+    Recipe = apps.get_model("recipes", "Recipe")
+    UniqueArgumentValue = apps.get_model("recipes", "UniqueArgumentValue")
+
+    values = []
+    recipes = Recipe.objects.filter(
+        latest_revision__action__name__in=UNIQUE_ARGUMENTS.keys()
+    ).select_related("latest_revision__action")
+    for recipe in recipes:
+        revision = recipe.latest_revision
+        key = UNIQUE_ARGUMENTS[revision.action.name]
+        value = json.loads(revision.arguments_json).get(key)
+        if value is not None:
+            dumped = dump_value(value)
+            values.append(
+                UniqueArgumentValue(
+                    recipe=recipe,
+                    action=revision.action,
+                    key=key,
+                    value=dumped,
+                    value_hash=hashlib.sha256(dumped.encode()).hexdigest(),
+                )
+            )
+    # Duplicates from before uniqueness was enforced keep the first value.
+    UniqueArgumentValue.objects.bulk_create(values, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("recipes", "0028_publishedrecord_remotesettingsstate"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="UniqueArgumentValue",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name="ID"
+                    ),
+                ),
+                ("key", models.CharField(max_length=255)),
+                ("value", models.TextField()),
+                ("value_hash", models.CharField(max_length=64)),
+                (
+                    "action",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="recipes.Action",
+                    ),
+                ),
+                (
+                    "recipe",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="unique_argument_values",
+                        to="recipes.Recipe",
+                    ),
+                ),
+            ],
+            options={
+                "unique_together": {("action", "key", "value_hash")},
+            },
+        ),
+        migrations.RunPython(backfill_unique_argument_values, migrations.RunPython.noop),
+    ]
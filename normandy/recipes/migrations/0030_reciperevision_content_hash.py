@@ -0,0 +1,54 @@
+# Generated by Django 2.2.28 on 2026-10-18 20:56
+
+import hashlib
+import json
+
+from django.db import migrations, models
+
+
+def backfill_content_hashes(apps, schema_editor):
+    RecipeRevision = apps.get_model("recipes", "RecipeRevision")
+
+    revisions = RecipeRevision.objects.filter(content_hash="").prefetch_related(
+        "channels", "countries", "locales"
+    )
+    for revision in revisions:
+        # A copy of `RecipeRevision.hash_content` as of this migration
+        content = {
+            "action": revision.action_id,
+            "user": revision.user_id,
+            "channels": sorted(channel.pk for channel in revision.channels.all()),
+            "countries": sorted(country.pk for country in revision.countries.all()),
+            "locales": sorted(locale.pk for locale in revision.locales.all()),
+        }
+        for field in [
+            "name",
+            "arguments_json",
+            "extra_filter_expression",
+            "filter_object_json",
+            "identicon_seed",
+            "comment",
+            "experimenter_slug",
+            "extra_capabilities",
+            "metadata",
+        ]:
+            content[field] = getattr(revision, field)
+        dumped = json.dumps(content, ensure_ascii=True, separators=(",", ":"), sort_keys=True)
+        revision.content_hash = hashlib.sha256(dumped.encode()).hexdigest()
+        revision.save(update_fields=["content_hash"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("recipes", "0029_uniqueargumentvalue"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="reciperevision",
+            name="content_hash",
+            field=models.CharField(blank=True, db_index=True, max_length=64),
+        ),
+        migrations.RunPython(backfill_content_hashes, migrations.RunPython.noop),
+    ]
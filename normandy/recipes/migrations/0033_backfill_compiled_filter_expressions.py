@@ -0,0 +1,54 @@
+import json
+
+from django.db import migrations
+
+
+def backfill_compiled_filter_expressions(apps, schema_editor):
+    # Importing the current filter definitions is unavoidable here, since the
+    # JEXL for filter objects is defined by them.
+    from normandy.recipes import filters
+
+    RecipeRevision = apps.get_model("recipes", "RecipeRevision")
+
+    revisions = (
+        RecipeRevision.objects.filter(compiled_filter_expression=None)
+        .select_related("action")
+        .prefetch_related("channels", "countries", "locales")
+    )
+    for revision in revisions:
+        # Some filters read the arguments, which historical models can't parse.
+        revision.arguments = json.loads(revision.arguments_json)
+
+        # A copy of `RecipeRevision.compile_filter_expression` as of this migration
+        parts = []
+        locales = revision.locales.all()
+        if locales:
+            codes = ", ".join(f"'{locale.code}'" for locale in locales)
+            parts.append(f"normandy.locale in [{codes}]")
+        countries = revision.countries.all()
+        if countries:
+            codes = ", ".join(f"'{country.code}'" for country in countries)
+            parts.append(f"normandy.country in [{codes}]")
+        channels = revision.channels.all()
+        if channels:
+            slugs = ", ".join(f"'{channel.slug}'" for channel in channels)
+            parts.append(f"normandy.channel in [{slugs}]")
+        for filter_data in json.loads(revision.filter_object_json or "[]"):
+            parts.append(filters.from_data(filter_data).to_jexl(revision))
+        if revision.extra_filter_expression:
+            parts.append(revision.extra_filter_expression)
+
+        expression = ") && (".join(parts)
+        revision.compiled_filter_expression = f"({expression})" if len(parts) > 1 else expression
+        revision.save(update_fields=["compiled_filter_expression"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("recipes", "0030_reciperevision_content_hash"),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_compiled_filter_expressions, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 2.2.28 on 2026-10-18 22:15
+
+from django.db import migrations, models
+
+
+def create_reference_data_version(apps, schema_editor):
+    ReferenceDataVersion = apps.get_model("recipes", "ReferenceDataVersion")
+    ReferenceDataVersion.objects.get_or_create(id=1)
+
+
+def remove_reference_data_version(apps, schema_editor):
+    ReferenceDataVersion = apps.get_model("recipes", "ReferenceDataVersion")
+    ReferenceDataVersion.objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [("recipes", "0033_backfill_compiled_filter_expressions")]
+
+    operations = [
+        migrations.CreateModel(
+            name="ReferenceDataVersion",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True, primary_key=True, serialize=False, verbose_name="ID"
+                    ),
+                ),
+                ("version", models.BigIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(create_reference_data_version, remove_reference_data_version),
+    ]
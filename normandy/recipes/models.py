@@ -1,12 +1,15 @@
+import hashlib
 import json
 import logging
+import time
 from collections import defaultdict
 
 from django.conf import settings
 from django.contrib.auth.models import User
 from django.contrib.postgres.fields import ArrayField, JSONField
+from django.contrib.postgres.indexes import GinIndex
 from django.core.exceptions import ImproperlyConfigured, ValidationError
-from django.db import models, transaction
+from django.db import IntegrityError, models, transaction
 from django.utils import timezone
 from django.utils.functional import cached_property
 
@@ -15,25 +18,25 @@ from rest_framework import serializers
 from rest_framework.reverse import reverse
 
 from normandy.base.api.renderers import CanonicalJSONRenderer
-from normandy.base.utils import filter_m2m, get_client_ip, sri_hash
+from normandy.base.utils import canonical_json_dumps, get_client_ip, sri_hash
 from normandy.recipes import filters
 from normandy.recipes.exports import RemoteSettings
 from normandy.recipes.geolocation import get_country_code
 from normandy.recipes.fields import IdenticonSeedField
 from normandy.recipes.signing import Autographer
-from normandy.recipes.validators import JSONSchemaValidator, validate_json
+from normandy.recipes.validators import get_arguments_validator, validate_json
 
 
 INFO_REQUESTING_RECIPE_SIGNATURES = "normandy.recipes.I001"
 INFO_CREATE_REVISION = "normandy.recipes.I002"
 INFO_REQUESTING_ACTION_SIGNATURES = "normandy.recipes.I003"
 WARNING_BYPASSING_PEER_APPROVAL = "normandy.recipes.W001"
-
+WARNING_MANIFEST_REBUILD_FAILED = "normandy.recipes.W002"
 
 logger = logging.getLogger(__name__)
 
 
-class Channel(models.Model):
+class Channel(DirtyFieldsMixin, models.Model):
     slug = models.CharField(max_length=255, unique=True)
     name = models.CharField(max_length=255)
 
@@ -55,7 +58,7 @@ class WindowsVersion(models.Model):
         return "<Windows Version {}>".format(self.nt_version)
 
 
-class Country(models.Model):
+class Country(DirtyFieldsMixin, models.Model):
     code = models.CharField(max_length=255, unique=True)
     name = models.CharField(max_length=255)
 
@@ -66,7 +69,7 @@ class Country(models.Model):
         return "<Country {}>".format(self.code)
 
 
-class Locale(models.Model):
+class Locale(DirtyFieldsMixin, models.Model):
     code = models.CharField(max_length=255, unique=True)
     name = models.CharField(max_length=255)
 
@@ -77,6 +80,79 @@ class Locale(models.Model):
         return "<Locale {}>".format(self.code)
 
 
+class ReferenceData(object):
+    """
+    A copy of the channels, countries, locales and Windows versions that
+    recipes are filtered on.
+
+    These tables almost never change, so each process keeps a copy, loaded
+    with one query per table. The copy is tagged with the version stored in
+    `ReferenceDataVersion`, which `invalidate` bumps whenever one of the
+    tables changes. Each process checks that version at most every
+    ``REFERENCE_DATA_CHECK_INTERVAL`` seconds, and reloads its copy when
+    the version changed.
+    """
+
+    _current = None
+
+    def __init__(self, version):
+        self.version = version
+        self.checked = time.monotonic()
+        self.channels = dict(Channel.objects.values_list("slug", "name"))
+        self.countries = dict(Country.objects.values_list("code", "name"))
+        self.locales = dict(Locale.objects.values_list("code", "name"))
+        self.windows_versions = dict(WindowsVersion.objects.values_list("nt_version", "name"))
+
+    @classmethod
+    def get(cls):
+        current = cls._current
+        now = time.monotonic()
+        if current is not None and now - current.checked < settings.REFERENCE_DATA_CHECK_INTERVAL:
+            return current
+
+        version = ReferenceDataVersion.get_current()
+        if current is None or current.version != version:
+            current = cls(version)
+            cls._current = current
+        else:
+            current.checked = now
+        return current
+
+    @classmethod
+    def invalidate(cls):
+        """Drop the copy of this process, and make every other process reload theirs."""
+        cls.reset()
+        ReferenceDataVersion.bump()
+
+    @classmethod
+    def reset(cls):
+        """Drop the copy of this process."""
+        cls._current = None
+
+
+class ReferenceDataVersion(models.Model):
+    """
+    A counter that is bumped by every write to the reference data, so that
+    every process can tell when its copy in `ReferenceData` is outdated.
+    """
+
+    SINGLETON_ID = 1
+
+    version = models.BigIntegerField(default=0)
+
+    @classmethod
+    def get_current(cls):
+        version = cls.objects.filter(id=cls.SINGLETON_ID).values_list("version", flat=True)
+        return version.first() or 0
+
+    @classmethod
+    def bump(cls):
+        updated = cls.objects.filter(id=cls.SINGLETON_ID).update(version=models.F("version") + 1)
+        if not updated:
+            # The row is created by a migration, but may have been removed since.
+            cls.objects.get_or_create(id=cls.SINGLETON_ID, defaults={"version": 1})
+
+
 class Signature(models.Model):
     signature = models.TextField()
     timestamp = models.DateTimeField(default=timezone.now)
@@ -84,6 +160,19 @@ class Signature(models.Model):
     x5u = models.TextField(null=True)
 
 
+def create_signatures(autographer, instances):
+    """
+    Sign the canonical JSON of each of `instances` and set their `signature`.
+
+    The signatures are requested together and saved with a single query, but
+    the instances themselves still need to be saved.
+    """
+    signature_data = autographer.sign_data([instance.canonical_json() for instance in instances])
+    signatures = Signature.objects.bulk_create(Signature(**data) for data in signature_data)
+    for instance, signature in zip(instances, signatures):
+        instance.signature = signature
+
+
 class RecipeQuerySet(models.QuerySet):
     def only_enabled(self):
         return self.filter(approved_revision__enabled_state__enabled=True)
@@ -91,6 +180,13 @@ class RecipeQuerySet(models.QuerySet):
     def only_disabled(self):
         return self.exclude(approved_revision__enabled_state__enabled=True)
 
+    def only_baseline_capabilities(self):
+        return self.filter(
+            approved_revision__required_capabilities__contained_by=list(
+                settings.BASELINE_CAPABILITIES
+            )
+        )
+
 
 class Recipe(DirtyFieldsMixin, models.Model):
     """A set of actions to be fetched and executed by users."""
@@ -138,25 +234,53 @@ class Recipe(DirtyFieldsMixin, models.Model):
         return CanonicalJSONRenderer().render(data)
 
     def update_signature(self):
+        self.update_signatures([self])
+
+    def request_signature(self):
+        """
+        Update the signature, or queue it to be updated by the outbox worker
+        if :envvar:`DJANGO_RECIPE_OUTBOX_ENABLED` is set. The recipe must be
+        saved afterwards.
+        """
+        if settings.RECIPE_OUTBOX_ENABLED:
+            # The old signature doesn't match the new content, so the recipe
+            # is left out of the signed listings until the worker signs it.
+            self.signature = None
+            OutboxEvent.objects.create(recipe=self, kind=OutboxEvent.SIGN)
+        else:
+            self.update_signature()
+
+    @classmethod
+    def update_signatures(cls, recipes):
+        """
+        Request new signatures for all of `recipes` at once.
+
+        Recipes that aren't enabled are left alone. The recipes must be saved
+        afterwards.
+        """
         try:
             autographer = Autographer()
         except ImproperlyConfigured:
-            self.signature = None
+            for recipe in recipes:
+                recipe.signature = None
             return
 
         # Don't sign recipe that aren't enabled
-        if not (self.approved_revision and self.approved_revision.enabled):
+        recipes = [
+            recipe
+            for recipe in recipes
+            if recipe.approved_revision and recipe.approved_revision.enabled
+        ]
+        if not recipes:
             return
 
+        recipe_ids = [recipe.id for recipe in recipes]
         logger.info(
-            f"Requesting signature for recipe with id {self.id} from Autograph",
-            extra={"code": INFO_REQUESTING_RECIPE_SIGNATURES, "recipe_ids": [self.id]},
+            f"Requesting signatures for recipes with ids {recipe_ids} from Autograph",
+            extra={"code": INFO_REQUESTING_RECIPE_SIGNATURES, "recipe_ids": recipe_ids},
         )
 
-        signature_data = autographer.sign_data([self.canonical_json()])[0]
-        signature = Signature(**signature_data)
-        signature.save()
-        self.signature = signature
+        create_signatures(autographer, recipes)
 
     @transaction.atomic
     def revise(self, force=False, **data):
@@ -172,39 +296,33 @@ class Recipe(DirtyFieldsMixin, models.Model):
             data["filter_object_json"] = json.dumps(data.pop("filter_object"))
 
         if revision:
-            revisions = RecipeRevision.objects.filter(id=revision.id)
-
-            revision_data = revision.data
-            revision_data.update(data)
-
-            channels = revision_data.pop("channels")
-            revisions = filter_m2m(revisions, "channels", channels)
-
-            countries = revision_data.pop("countries")
-            revisions = filter_m2m(revisions, "countries", countries)
-
-            locales = revision_data.pop("locales")
-            revisions = filter_m2m(revisions, "locales", locales)
-
-            data = revision_data
-            revisions = revisions.filter(**data)
-
-            is_clean = revisions.exists()
+            # The proposed content is built from the columns of the current
+            # revision, reading only the relations that aren't given, and
+            # compared to its stored hash. The user is only compared if a
+            # new one is given.
+            content = {"user": revision.user_id, "action": revision.action_id}
+            for field in RecipeRevision.CONTENT_FIELDS:
+                content[field] = getattr(revision, field)
+            for relation in ["channels", "countries", "locales"]:
+                if relation not in data:
+                    content[relation] = getattr(revision, relation).values_list("pk", flat=True)
+            content.update(data)
+            is_clean = RecipeRevision.objects.filter(
+                id=revision.id, content_hash=RecipeRevision.hash_content(content)
+            ).exists()
         else:
-            channels = data.pop("channels", [])
-            countries = data.pop("countries", [])
-            locales = data.pop("locales", [])
             is_clean = False
 
         if arguments is not None:
-            schema = None
+            schema_validator = None
             if "action_id" in data:
-                schema = Action.objects.get(action_id=data["action_id"]).arguments_schema
+                schema_validator = Action.objects.get(
+                    action_id=data["action_id"]
+                ).arguments_validator
             elif revision:
-                schema = revision.action.arguments_schema
+                schema_validator = revision.action.arguments_validator
 
-            if schema is not None:
-                schema_validator = JSONSchemaValidator(schema)
+            if schema_validator is not None:
                 schema_validator.validate(arguments)
 
         if not is_clean or force:
@@ -213,6 +331,14 @@ class Recipe(DirtyFieldsMixin, models.Model):
                 extra={"code": INFO_CREATE_REVISION},
             )
 
+            if revision:
+                revision_data = revision.data
+                revision_data.update(data)
+                data = revision_data
+            channels = data.pop("channels", [])
+            countries = data.pop("countries", [])
+            locales = data.pop("locales", [])
+
             if revision and revision.approval_status == RecipeRevision.PENDING:
                 revision.approval_request.delete()
 
@@ -220,16 +346,46 @@ class Recipe(DirtyFieldsMixin, models.Model):
                 recipe=self, parent=revision, **data
             )
 
-            for channel in channels:
-                self.latest_revision.channels.add(channel)
+            # Each change to the relations recompiles the filter expression,
+            # so add all of the items of each relation at once.
+            if channels:
+                self.latest_revision.channels.add(*channels)
+            if countries:
+                self.latest_revision.countries.add(*countries)
+            if locales:
+                self.latest_revision.locales.add(*locales)
 
-            for country in countries:
-                self.latest_revision.countries.add(country)
+            self.save()
+
+    def update_unique_argument_values(self):
+        """
+        Index the unique arguments of the latest revision. If another recipe
+        started using one of the values concurrently, raise a validation
+        error like `Action.validate_arguments` would.
+        """
+        self.unique_argument_values.all().delete()
+        revision = self.latest_revision
+        if revision is None:
+            return
 
-            for locale in locales:
-                self.latest_revision.locales.add(locale)
+        action = revision.action
+        unique_argument = action.get_unique_argument(revision.arguments)
+        if unique_argument is None:
+            return
 
-            self.save()
+        key, value = unique_argument
+        try:
+            with transaction.atomic():
+                UniqueArgumentValue.objects.create(
+                    recipe=self,
+                    action=action,
+                    key=key,
+                    value=UniqueArgumentValue.dump_value(value),
+                    value_hash=UniqueArgumentValue.hash_value(value),
+                )
+        except IntegrityError:
+            _, error = action.unique_arguments[action.name]
+            raise serializers.ValidationError({"arguments": {key: action.errors[error]}})
 
     @transaction.atomic
     def save(self, *args, **kwargs):
@@ -255,7 +411,9 @@ class Recipe(DirtyFieldsMixin, models.Model):
                 super().save(*args, **kwargs)
                 kwargs["force_insert"] = False
 
-                self.update_signature()
+                if "latest_revision" in dirty_field_names:
+                    self.update_unique_argument_values()
+                self.request_signature()
 
         super().save(*args, **kwargs)
 
@@ -265,6 +423,20 @@ class RecipeRevision(DirtyFieldsMixin, models.Model):
     REJECTED = "rejected"
     PENDING = "pending"
 
+    # The fields that are hashed along with the action, user and relations.
+    # See `hash_content`.
+    CONTENT_FIELDS = [
+        "name",
+        "arguments_json",
+        "extra_filter_expression",
+        "filter_object_json",
+        "identicon_seed",
+        "comment",
+        "experimenter_slug",
+        "extra_capabilities",
+        "metadata",
+    ]
+
     # Bookkeeping fields
     parent = models.OneToOneField(
         "self", null=True, on_delete=models.CASCADE, related_name="child"
@@ -282,6 +454,8 @@ class RecipeRevision(DirtyFieldsMixin, models.Model):
     arguments_json = models.TextField(default="{}", validators=[validate_json])
     extra_filter_expression = models.TextField(blank=False)
     filter_object_json = models.TextField(validators=[validate_json], null=True)
+    # A copy of `filter_object_json` that can be queried. Kept in sync on save.
+    filter_object_data = JSONField(null=True)
     channels = models.ManyToManyField(Channel)
     countries = models.ManyToManyField(Country)
     locales = models.ManyToManyField(Locale)
@@ -293,9 +467,24 @@ class RecipeRevision(DirtyFieldsMixin, models.Model):
     experimenter_slug = models.CharField(null=True, max_length=255, blank=True)
     extra_capabilities = ArrayField(models.CharField(max_length=255), default=list)
     metadata = JSONField(default=dict)
+    # Derived from the fields above on save, so that recipes can be filtered by
+    # capabilities in SQL. See `compute_required_capabilities`.
+    required_capabilities = ArrayField(models.CharField(max_length=255), default=list)
+    # Derived from the fields above on save, and when the many-to-many fields
+    # change. Null if it hasn't been compiled yet. See `filter_expression`.
+    compiled_filter_expression = models.TextField(null=True)
+    # Derived like `compiled_filter_expression`, and used to tell whether a
+    # revision changes anything. See `hash_content`.
+    content_hash = models.CharField(max_length=64, blank=True, db_index=True)
 
     class Meta:
         ordering = ("-created",)
+        # Text search also uses trigram indexes, created by migration 0024.
+        indexes = [
+            GinIndex(fields=["required_capabilities"]),
+            # For cursor pagination
+            models.Index(fields=["created", "id"]),
+        ]
 
     @property
     def data(self):
@@ -318,6 +507,11 @@ class RecipeRevision(DirtyFieldsMixin, models.Model):
 
     @property
     def filter_expression(self):
+        if self.compiled_filter_expression is None:
+            return self.compile_filter_expression()
+        return self.compiled_filter_expression
+
+    def compile_filter_expression(self):
         parts = []
 
         if self.locales.count():
@@ -344,7 +538,7 @@ class RecipeRevision(DirtyFieldsMixin, models.Model):
     @property
     def filter_object(self):
         if self.filter_object_json is not None:
-            return [filters.from_data(obj) for obj in json.loads(self.filter_object_json)]
+            return list(filters.from_json(self.filter_object_json))
         else:
             return []
 
@@ -387,12 +581,23 @@ class RecipeRevision(DirtyFieldsMixin, models.Model):
     def enabled(self):
         return self.enabled_state.enabled if self.enabled_state else False
 
-    @property
-    def capabilities(self):
-        """Calculates the set of capabilities required for this recipe."""
+    def compute_required_capabilities(self):
+        """
+        Calculates the set of capabilities required by the action, filters
+        and extra capabilities of this revision.
+
+        Unlike `capabilities`, this doesn't depend on settings, so it is safe
+        to store.
+        """
         capabilities = set(self.extra_capabilities) | self.action.capabilities
         for filter in self.filter_object:
             capabilities.update(filter.get_capabilities())
+        return capabilities
+
+    @property
+    def capabilities(self):
+        """Calculates the set of capabilities required for this recipe."""
+        capabilities = self.compute_required_capabilities()
 
         # "capabilities-v1" is not a baseline capability. If all of the other
         # capabilities are baseline capabilities, don't add it to the recipe.
@@ -407,16 +612,67 @@ class RecipeRevision(DirtyFieldsMixin, models.Model):
 
     def save(self, *args, **kwargs):
         self.action.validate_arguments(self.arguments, self)
+        self.required_capabilities = sorted(self.compute_required_capabilities())
+        if self.filter_object_json is None:
+            self.filter_object_data = None
+        else:
+            self.filter_object_data = json.loads(self.filter_object_json)
+
+        # Many-to-many fields can only be read once the revision exists
+        is_new = self.pk is None
+        if not is_new:
+            self.compiled_filter_expression = self.compile_filter_expression()
+            self.content_hash = self.compute_content_hash()
 
         if not self.created:
             self.created = timezone.now()
         self.updated = timezone.now()
         super().save(*args, **kwargs)
 
+        if is_new:
+            self.update_derived_fields()
+
+    def update_derived_fields(self):
+        """
+        Recompile the stored filter expression and content hash, without
+        saving anything else.
+        """
+        self.compiled_filter_expression = self.compile_filter_expression()
+        self.content_hash = self.compute_content_hash()
+        RecipeRevision.objects.filter(id=self.id).update(
+            compiled_filter_expression=self.compiled_filter_expression,
+            content_hash=self.content_hash,
+        )
+
+    @classmethod
+    def hash_content(cls, data):
+        """
+        Hash the content of a revision, given as in `data` along with the
+        ``user``. Related objects may be given as instances or ids, and
+        bookkeeping fields such as ``created`` are ignored.
+        """
+
+        def pk(value):
+            return getattr(value, "pk", value)
+
+        content = {
+            "action": pk(data["action_id"] if "action_id" in data else data.get("action")),
+            "user": pk(data.get("user")),
+            "channels": sorted(pk(channel) for channel in data.get("channels", [])),
+            "countries": sorted(pk(country) for country in data.get("countries", [])),
+            "locales": sorted(pk(locale) for locale in data.get("locales", [])),
+        }
+        for field in cls.CONTENT_FIELDS:
+            content[field] = data.get(field)
+        return hashlib.sha256(canonical_json_dumps(content).encode()).hexdigest()
+
+    def compute_content_hash(self):
+        return self.hash_content({"user": self.user_id, **self.data})
+
     def request_approval(self, creator):
         approval_request = ApprovalRequest(revision=self, creator=creator)
         approval_request.save()
-        self.recipe.update_signature()
+        self.recipe.request_signature()
         self.recipe.save()
         return approval_request
 
@@ -431,7 +687,7 @@ class RecipeRevision(DirtyFieldsMixin, models.Model):
         self.save()
 
         self.recipe.approved_revision.refresh_from_db()
-        self.recipe.update_signature()
+        self.recipe.request_signature()
         self.recipe.save()
 
     def enable(self, user, carryover_from=None):
@@ -442,7 +698,10 @@ class RecipeRevision(DirtyFieldsMixin, models.Model):
 
         self._create_new_enabled_state(creator=user, enabled=True, carryover_from=carryover_from)
 
-        RemoteSettings().publish(self.recipe)
+        if settings.RECIPE_OUTBOX_ENABLED:
+            OutboxEvent.objects.create(recipe=self.recipe, kind=OutboxEvent.PUBLISH)
+        else:
+            RemoteSettings().publish(self.recipe)
 
     def disable(self, user):
         if not self.enabled:
@@ -450,7 +709,10 @@ class RecipeRevision(DirtyFieldsMixin, models.Model):
 
         self._create_new_enabled_state(creator=user, enabled=False)
 
-        RemoteSettings().unpublish(self.recipe)
+        if settings.RECIPE_OUTBOX_ENABLED:
+            OutboxEvent.objects.create(recipe=self.recipe, kind=OutboxEvent.PUBLISH)
+        else:
+            RemoteSettings().unpublish(self.recipe)
 
     def _validate_preference_rollout_rollback_enabled_invariance(self):
         """Raise ValidationError if you're trying to enable a preference-rollback
@@ -519,6 +781,8 @@ class ApprovalRequest(models.Model):
 
     class Meta:
         ordering = ("id",)
+        # For cursor pagination
+        indexes = [models.Index(fields=["created", "id"])]
 
     class NotActionable(Exception):
         pass
@@ -579,7 +843,7 @@ class ApprovalRequest(models.Model):
         self.save()
 
         recipe = self.revision.recipe
-        recipe.update_signature()
+        recipe.request_signature()
         recipe.save()
 
     @transaction.atomic
@@ -587,7 +851,7 @@ class ApprovalRequest(models.Model):
         self.delete()
 
         recipe = self.revision.recipe
-        recipe.update_signature()
+        recipe.request_signature()
         recipe.save()
 
 
@@ -615,6 +879,17 @@ class Action(DirtyFieldsMixin, models.Model):
         "duplicate_study_name": "Study name must be globally unique",
     }
 
+    # The argument that must be unique among the latest revisions of the
+    # recipes using each action, and the error for duplicates. The values
+    # are indexed by `UniqueArgumentValue`.
+    unique_arguments = {
+        "preference-experiment": ("slug", "duplicate_experiment_slug"),
+        "multi-preference-experiment": ("slug", "duplicate_experiment_slug"),
+        "preference-rollout": ("slug", "duplicate_rollout_slug"),
+        "show-heartbeat": ("surveyId", "duplicate_survey_id"),
+        "opt-out-study": ("name", "duplicate_study_name"),
+    }
+
     @property
     def arguments_schema(self):
         return json.loads(self.arguments_schema_json)
@@ -623,6 +898,11 @@ class Action(DirtyFieldsMixin, models.Model):
     def arguments_schema(self, value):
         self.arguments_schema_json = json.dumps(value)
 
+    @property
+    def arguments_validator(self):
+        """A JSON Schema validator for the arguments of this action."""
+        return get_arguments_validator(self.id, self.arguments_schema_json)
+
     @property
     def recipes_used_by(self):
         """Set of enabled recipes that are using this action."""
@@ -656,21 +936,32 @@ class Action(DirtyFieldsMixin, models.Model):
         return sri_hash(self.implementation.encode(), url_safe=True)
 
     def update_signature(self):
+        self.update_signatures([self])
+
+    @classmethod
+    def update_signatures(cls, actions):
+        """
+        Request new signatures for all of `actions` at once.
+
+        The actions must be saved afterwards.
+        """
         try:
             autographer = Autographer()
         except ImproperlyConfigured:
-            self.signature = None
+            for action in actions:
+                action.signature = None
+            return
+
+        if not actions:
             return
 
+        action_names = [action.name for action in actions]
         logger.info(
-            f"Requesting signature for action named {self.name} from Autograph",
-            extra={"code": INFO_REQUESTING_ACTION_SIGNATURES, "action_names": [self.name]},
+            f"Requesting signatures for actions named {action_names} from Autograph",
+            extra={"code": INFO_REQUESTING_ACTION_SIGNATURES, "action_names": action_names},
         )
 
-        signature_data = autographer.sign_data([self.canonical_json()])[0]
-        signature = Signature(**signature_data)
-        signature.save()
-        self.signature = signature
+        create_signatures(autographer, actions)
 
     @transaction.atomic
     def save(self, *args, **kwargs):
@@ -714,8 +1005,7 @@ class Action(DirtyFieldsMixin, models.Model):
         errors = default()
 
         # Check for any JSON Schema violations
-        schemaValidator = JSONSchemaValidator(self.arguments_schema)
-        for error in schemaValidator.iter_errors(arguments):
+        for error in self.arguments_validator.iter_errors(arguments):
             current_level = errors
             path = list(error.path)
             for part in path[:-1]:
@@ -742,13 +1032,7 @@ class Action(DirtyFieldsMixin, models.Model):
                 branch_values.add(branch["value"])
 
             # Experiment slugs should be unique.
-            experiment_recipes = Recipe.objects.filter(latest_revision__action=self)
-            if revision.recipe and revision.recipe.id:
-                experiment_recipes = experiment_recipes.exclude(id=revision.recipe.id)
-            existing_slugs = set(
-                r.latest_revision.arguments.get("slug") for r in experiment_recipes
-            )
-            if arguments.get("slug") in existing_slugs:
+            if self.argument_value_is_taken("slug", arguments.get("slug"), revision):
                 msg = self.errors["duplicate_experiment_slug"]
                 errors["slug"] = msg
 
@@ -763,60 +1047,288 @@ class Action(DirtyFieldsMixin, models.Model):
                 branch_slugs.add(branch["slug"])
 
             # Experiment slugs should be unique.
-            experiment_recipes = Recipe.objects.filter(latest_revision__action=self)
-            if revision.recipe and revision.recipe.id:
-                experiment_recipes = experiment_recipes.exclude(id=revision.recipe.id)
-            existing_slugs = set(
-                r.latest_revision.arguments.get("slug") for r in experiment_recipes
-            )
-            if arguments.get("slug") in existing_slugs:
+            if self.argument_value_is_taken("slug", arguments.get("slug"), revision):
                 msg = self.errors["duplicate_experiment_slug"]
                 errors["slug"] = msg
 
         elif self.name == "preference-rollout":
             # Rollout slugs should be unique
-            rollout_recipes = Recipe.objects.filter(latest_revision__action=self)
-            if revision.recipe and revision.recipe.id:
-                rollout_recipes = rollout_recipes.exclude(id=revision.recipe.id)
-            existing_slugs = set(r.latest_revision.arguments.get("slug") for r in rollout_recipes)
-            if arguments.get("slug") in existing_slugs:
+            if self.argument_value_is_taken("slug", arguments.get("slug"), revision):
                 msg = self.errors["duplicate_rollout_slug"]
                 errors["slug"] = msg
 
         elif self.name == "preference-rollback":
             # Rollback slugs should match rollouts
-            rollouts = Recipe.objects.filter(latest_revision__action__name="preference-rollout")
-            rollout_slugs = set(r.latest_revision.arguments["slug"] for r in rollouts)
-            if arguments["rolloutSlug"] not in rollout_slugs:
+            rollouts = UniqueArgumentValue.objects.filter(
+                action__name="preference-rollout",
+                key="slug",
+                value_hash=UniqueArgumentValue.hash_value(arguments["rolloutSlug"]),
+            )
+            if not rollouts.exists():
                 errors["slug"] = self.errors["rollout_slug_not_found"]
 
         elif self.name == "show-heartbeat":
             # Survey ID should be unique across all recipes
-            other_recipes = Recipe.objects.filter(latest_revision__action=self)
-            if revision.recipe and revision.recipe.id:
-                other_recipes = other_recipes.exclude(id=revision.recipe.id)
             # So it *could* be that a different recipe's *latest_revision*'s argument
             # has this same surveyId but its *approved_revision* has a different surveyId.
             # It's unlikely in the real-world that different revisions, within a recipe,
             # has different surveyIds *and* that any of these clash with an entirely
             # different recipe.
-            for recipe in other_recipes:
-                if recipe.latest_revision.arguments["surveyId"] == arguments["surveyId"]:
-                    errors["surveyId"] = self.errors["duplicate_survey_id"]
+            if self.argument_value_is_taken("surveyId", arguments["surveyId"], revision):
+                errors["surveyId"] = self.errors["duplicate_survey_id"]
 
         elif self.name == "opt-out-study":
             # Name should be unique across all recipes
-            other_recipes = Recipe.objects.filter(latest_revision__action=self)
-            if revision.recipe and revision.recipe.id:
-                other_recipes = other_recipes.exclude(id=revision.recipe.id)
-            for recipe in other_recipes:
-                if recipe.latest_revision.arguments["name"] == arguments["name"]:
-                    errors["name"] = self.errors["duplicate_study_name"]
+            if self.argument_value_is_taken("name", arguments["name"], revision):
+                errors["name"] = self.errors["duplicate_study_name"]
 
         # Raise errors, if any
         if errors:
             raise serializers.ValidationError({"arguments": errors})
 
+    def argument_value_is_taken(self, key, value, revision):
+        """
+        Check if the latest revision of another recipe using this action has
+        `value` for the unique argument `key`.
+        """
+        if value is None:
+            return False
+        other_values = UniqueArgumentValue.objects.filter(
+            action=self, key=key, value_hash=UniqueArgumentValue.hash_value(value)
+        )
+        if revision.recipe and revision.recipe.id:
+            other_values = other_values.exclude(recipe_id=revision.recipe.id)
+        return other_values.exists()
+
+    def get_unique_argument(self, arguments):
+        """Get the key and value of the unique argument in `arguments`, if any."""
+        if self.name not in self.unique_arguments:
+            return None
+        key, _ = self.unique_arguments[self.name]
+        if arguments.get(key) is None:
+            return None
+        return key, arguments[key]
+
+
+class UniqueArgumentValue(models.Model):
+    """
+    The values of the unique arguments of the latest revision of each recipe.
+
+    This lets `Action.validate_arguments` check that a value isn't used by
+    another recipe with an indexed lookup, and the unique constraint keeps
+    concurrent changes from using the same value. Values are stored as
+    canonical JSON, so that values of different types don't match, and the
+    constraint is on a hash of it, so that it holds for values of any size.
+    """
+
+    recipe = models.ForeignKey(
+        Recipe, related_name="unique_argument_values", on_delete=models.CASCADE
+    )
+    action = models.ForeignKey(Action, related_name="+", on_delete=models.CASCADE)
+    key = models.CharField(max_length=255)
+    value = models.TextField()
+    value_hash = models.CharField(max_length=64)
+
+    class Meta:
+        unique_together = [("action", "key", "value_hash")]
+
+    @staticmethod
+    def dump_value(value):
+        return canonical_json_dumps(value)
+
+    @classmethod
+    def hash_value(cls, value):
+        return hashlib.sha256(cls.dump_value(value).encode()).hexdigest()
+
+
+def get_serialization_settings_hash():
+    """Hash of the settings that change how recipes and actions are serialized."""
+    relevant_settings = {
+        "AUTOGRAPH_X5U_CACHE_BUST": settings.AUTOGRAPH_X5U_CACHE_BUST,
+        "BASELINE_CAPABILITIES": sorted(settings.BASELINE_CAPABILITIES),
+        "CDN_URL": settings.CDN_URL,
+    }
+    return hashlib.sha256(canonical_json_dumps(relevant_settings).encode()).hexdigest()
+
+
+class CollectionVersion(models.Model):
+    """
+    A counter that is bumped by every write to recipe data.
+
+    Read APIs derive their ETags from it, so revalidation requests for
+    unchanged data can be answered without building any querysets.
+    """
+
+    SINGLETON_ID = 1
+
+    version = models.BigIntegerField(default=0)
+
+    @classmethod
+    def get_current(cls):
+        version = cls.objects.filter(id=cls.SINGLETON_ID).values_list("version", flat=True)
+        return version.first() or 0
+
+    @classmethod
+    def bump(cls):
+        updated = cls.objects.filter(id=cls.SINGLETON_ID).update(version=models.F("version") + 1)
+        if not updated:
+            # The row is created by a migration, but may have been removed since.
+            cls.objects.get_or_create(id=cls.SINGLETON_ID, defaults={"version": 1})
+
+
+class SignedRecipeManifest(models.Model):
+    """
+    A prebuilt copy of the default signed recipe listing.
+
+    Building the listing walks every enabled recipe, so the rendered bytes are
+    stored here and served as-is until something they depend on changes.
+    Changes bump `version` and rebuild the content once they are committed.
+    The stored content is only used if it was built from the current version
+    with the current settings, and reading it never writes.
+    """
+
+    SINGLETON_ID = 1
+
+    version = models.IntegerField(default=0)
+    built_version = models.IntegerField(null=True)
+    settings_hash = models.CharField(max_length=64, blank=True)
+    content = models.BinaryField(null=True)
+    etag = models.CharField(max_length=255, blank=True)
+    updated = models.DateTimeField(default=timezone.now)
+
+    @classmethod
+    def invalidate(cls):
+        cls.objects.filter(id=cls.SINGLETON_ID).update(version=models.F("version") + 1)
+        transaction.on_commit(cls.rebuild_after_commit)
+
+    @classmethod
+    def get_current(cls):
+        """Return the stored manifest if it is up to date, or None."""
+        manifest = cls.objects.filter(id=cls.SINGLETON_ID).first()
+        if manifest is None or not manifest.is_current():
+            return None
+        manifest.content = bytes(manifest.content)
+        return manifest
+
+    @classmethod
+    def build(cls):
+        """Return a manifest built from the current recipes, without saving it."""
+        from normandy.recipes.api.v1.views import render_default_signed_recipes
+
+        content = bytes(render_default_signed_recipes())
+        return cls(
+            id=cls.SINGLETON_ID,
+            settings_hash=get_serialization_settings_hash(),
+            content=content,
+            etag='"{}"'.format(hashlib.sha256(content).hexdigest()),
+        )
+
+    @classmethod
+    def rebuild(cls):
+        """Build and store the manifest, unless the stored one is up to date."""
+        manifest, _ = cls.objects.get_or_create(id=cls.SINGLETON_ID)
+        if manifest.is_current():
+            return
+
+        # The version is read before building, so if anything changes while
+        # the content is being built the update below won't match, and the
+        # rebuild queued by that change will store it instead.
+        built = cls.build()
+        cls.objects.filter(id=cls.SINGLETON_ID, version=manifest.version).update(
+            content=built.content,
+            built_version=manifest.version,
+            settings_hash=built.settings_hash,
+            etag=built.etag,
+            updated=built.updated,
+        )
+
+    @classmethod
+    def rebuild_after_commit(cls):
+        # The change is already committed, so a failure is only logged, and
+        # the listing is built for each request until the next rebuild.
+        try:
+            cls.rebuild()
+        except Exception:
+            logger.exception(
+                "Could not rebuild the signed recipe manifest",
+                extra={"code": WARNING_MANIFEST_REBUILD_FAILED},
+            )
+
+    def is_current(self):
+        return (
+            self.built_version == self.version
+            and self.settings_hash == get_serialization_settings_hash()
+        )
+
+
+class OutboxEvent(models.Model):
+    """
+    Work on a recipe that depends on an external service, queued by the same
+    transaction that changed the recipe.
+
+    Events are handled by the ``process_outbox`` management command. All of
+    the events for a recipe are handled together, based on the state of the
+    recipe at that time, so they only record what kind of work is needed.
+    """
+
+    # Update the recipe's signature
+    SIGN = "sign"
+    # Publish the recipe to Remote Settings if it is enabled, or unpublish it otherwise
+    PUBLISH = "publish"
+    KIND_CHOICES = ((SIGN, "Sign"), (PUBLISH, "Publish"))
+
+    recipe = models.ForeignKey(Recipe, related_name="outbox_events", on_delete=models.CASCADE)
+    kind = models.CharField(max_length=32, choices=KIND_CHOICES)
+    created = models.DateTimeField(default=timezone.now)
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+
+    class Meta:
+        ordering = ("created", "id")
+
+
+class PublishedRecord(models.Model):
+    """
+    What was last published to Remote Settings for a recipe.
+
+    This lets ``sync_remote_settings`` find the recipes that are out of date
+    without downloading every record, and find remote changes without
+    comparing every record. The recipe is not a foreign key, so that records
+    of deleted recipes are kept until they are unpublished.
+    """
+
+    recipe_id = models.IntegerField(primary_key=True)
+    # A hash of the canonical JSON of the published record
+    record_hash = models.CharField(max_length=64)
+    # The signature that was included in the published record
+    signature = models.TextField(blank=True)
+    # The timestamp of the record in the publish bucket, once it has been seen there
+    last_modified = models.BigIntegerField(null=True)
+
+
+class RemoteSettingsState(models.Model):
+    """
+    The timestamp of the newest change to the published Remote Settings
+    collection that ``sync_remote_settings`` has checked.
+    """
+
+    SINGLETON_ID = 1
+
+    last_modified = models.BigIntegerField(null=True)
+
+    @classmethod
+    def get_last_modified(cls):
+        last_modified = cls.objects.filter(id=cls.SINGLETON_ID).values_list(
+            "last_modified", flat=True
+        )
+        return last_modified.first()
+
+    @classmethod
+    def set_last_modified(cls, last_modified):
+        cls.objects.update_or_create(
+            id=cls.SINGLETON_ID, defaults={"last_modified": last_modified}
+        )
+
 
 class Client(object):
     """A client attempting to fetch a set of recipes."""
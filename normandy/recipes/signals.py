@@ -0,0 +1,159 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from normandy.recipes.models import (
+    Action,
+    ApprovalRequest,
+    Channel,
+    CollectionVersion,
+    Country,
+    EnabledState,
+    Locale,
+    Recipe,
+    RecipeRevision,
+    ReferenceData,
+    Signature,
+    SignedRecipeManifest,
+    WindowsVersion,
+)
+
+
+# The fields of `RecipeRevision` for its relations to reference data.
+RELATION_FIELDS = {
+    RecipeRevision.channels.through: "channels",
+    RecipeRevision.countries.through: "countries",
+    RecipeRevision.locales.through: "locales",
+}
+
+REFERENCE_FIELDS = {Channel: "channels", Country: "countries", Locale: "locales"}
+
+# The fields of reference data that are included in filter expressions.
+FILTER_KEYS = {Channel: "slug", Country: "code", Locale: "code"}
+
+
+@receiver(post_save, sender=Action)
+@receiver(post_save, sender=EnabledState)
+@receiver(post_save, sender=Recipe)
+@receiver(post_save, sender=RecipeRevision)
+@receiver(post_save, sender=Signature)
+@receiver(post_delete, sender=Action)
+@receiver(post_delete, sender=EnabledState)
+@receiver(post_delete, sender=Recipe)
+@receiver(post_delete, sender=RecipeRevision)
+@receiver(post_delete, sender=Signature)
+def invalidate_signed_recipe_manifest(sender, **kwargs):
+    SignedRecipeManifest.invalidate()
+
+
+@receiver(post_save, sender=Action)
+@receiver(post_save, sender=ApprovalRequest)
+@receiver(post_save, sender=Channel)
+@receiver(post_save, sender=Country)
+@receiver(post_save, sender=EnabledState)
+@receiver(post_save, sender=Locale)
+@receiver(post_save, sender=Recipe)
+@receiver(post_save, sender=RecipeRevision)
+@receiver(post_save, sender=Signature)
+@receiver(post_delete, sender=Action)
+@receiver(post_delete, sender=ApprovalRequest)
+@receiver(post_delete, sender=Channel)
+@receiver(post_delete, sender=Country)
+@receiver(post_delete, sender=EnabledState)
+@receiver(post_delete, sender=Locale)
+@receiver(post_delete, sender=Recipe)
+@receiver(post_delete, sender=RecipeRevision)
+@receiver(post_delete, sender=Signature)
+def bump_collection_version(sender, **kwargs):
+    CollectionVersion.bump()
+
+
+@receiver(post_save, sender=Channel)
+@receiver(post_save, sender=Country)
+@receiver(post_save, sender=Locale)
+@receiver(post_save, sender=WindowsVersion)
+@receiver(post_delete, sender=Channel)
+@receiver(post_delete, sender=Country)
+@receiver(post_delete, sender=Locale)
+@receiver(post_delete, sender=WindowsVersion)
+def invalidate_reference_data(sender, **kwargs):
+    ReferenceData.invalidate()
+
+
+@receiver(m2m_changed, sender=RecipeRevision.channels.through)
+@receiver(m2m_changed, sender=RecipeRevision.countries.through)
+@receiver(m2m_changed, sender=RecipeRevision.locales.through)
+def bump_collection_version_for_relations(sender, action, **kwargs):
+    if action.startswith("post_"):
+        CollectionVersion.bump()
+
+
+@receiver(m2m_changed, sender=RecipeRevision.channels.through)
+@receiver(m2m_changed, sender=RecipeRevision.countries.through)
+@receiver(m2m_changed, sender=RecipeRevision.locales.through)
+def update_derived_fields(sender, instance, action, reverse, pk_set, **kwargs):
+    if reverse and action == "pre_clear":
+        # post_clear isn't given the revisions, so find them while they are related.
+        field = RELATION_FIELDS[sender]
+        instance._cleared_revision_ids = get_revision_ids(field, instance)
+        return
+
+    if not action.startswith("post_"):
+        return
+
+    if reverse:
+        if action == "post_clear":
+            pk_set = instance.__dict__.pop("_cleared_revision_ids", [])
+        revisions = RecipeRevision.objects.filter(id__in=pk_set or [])
+    else:
+        revisions = [instance]
+    for revision in revisions:
+        revision.update_derived_fields()
+
+
+@receiver(pre_save, sender=Channel)
+@receiver(pre_save, sender=Country)
+@receiver(pre_save, sender=Locale)
+def find_changed_filter_keys(sender, instance, **kwargs):
+    # The saved state is reset once the instance is saved.
+    instance._filter_key_changed = (
+        not instance._state.adding and FILTER_KEYS[sender] in instance.get_dirty_fields()
+    )
+
+
+@receiver(post_save, sender=Channel)
+@receiver(post_save, sender=Country)
+@receiver(post_save, sender=Locale)
+def update_derived_fields_for_reference_data(sender, instance, created, **kwargs):
+    # Filter expressions include channel slugs and locale and country codes.
+    if instance.__dict__.pop("_filter_key_changed", False):
+        update_revisions(get_revision_ids(REFERENCE_FIELDS[sender], instance))
+
+
+@receiver(pre_delete, sender=Channel)
+@receiver(pre_delete, sender=Country)
+@receiver(pre_delete, sender=Locale)
+def find_revisions_for_deleted_reference_data(sender, instance, **kwargs):
+    # Deleting the relations sends no m2m_changed signal, and once they are
+    # gone the revisions that used them can't be found anymore.
+    instance._deleted_revision_ids = get_revision_ids(REFERENCE_FIELDS[sender], instance)
+
+
+@receiver(post_delete, sender=Channel)
+@receiver(post_delete, sender=Country)
+@receiver(post_delete, sender=Locale)
+def update_derived_fields_for_deleted_reference_data(sender, instance, **kwargs):
+    update_revisions(instance.__dict__.pop("_deleted_revision_ids", []))
+
+
+def get_revision_ids(field, instance):
+    return list(RecipeRevision.objects.filter(**{field: instance}).values_list("id", flat=True))
+
+
+def update_revisions(revision_ids):
+    """Update the derived fields of revisions after the data they use changed."""
+    if not revision_ids:
+        return
+    for revision in RecipeRevision.objects.filter(id__in=revision_ids):
+        revision.update_derived_fields()
+    # The revisions are updated without sending signals.
+    SignedRecipeManifest.invalidate()
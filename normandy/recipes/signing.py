@@ -3,8 +3,14 @@ import binascii
 import hashlib
 import logging
 import re
-from datetime import datetime
-
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from functools import lru_cache
+
+import markus
 import pytz
 import requests
 import ecdsa.util
@@ -27,6 +33,7 @@ INFO_RECEIVED_SIGNATURES = "normandy.autograph.I001"
 
 
 logger = logging.getLogger(__name__)
+metrics = markus.get_metrics("normandy.autograph")
 
 
 class Autographer(object):
@@ -36,6 +43,11 @@ class Autographer(object):
     If Autograph signing is not configured using `settings.AUTOGRAPH`,
     raises `ImproperlyConfigured`. If the Autograph server can't be reached
     or returns an HTTP error, an error will be raised by `requests`.
+
+    The connections to Autograph are shared by all of the Autographers in a
+    process. Requests that fail because of connection problems or server
+    errors are retried, and while Autograph keeps failing, requests fail
+    immediately with `AutographUnavailable`.
     """
 
     def __init__(self):
@@ -43,11 +55,11 @@ class Autographer(object):
 
     @cached_property
     def session(self):
-        session = requests.Session()
-        session.auth = HawkAuth(
-            id=str(settings.AUTOGRAPH_HAWK_ID), key=str(settings.AUTOGRAPH_HAWK_SECRET_KEY)
-        )
-        return session
+        return get_autograph_connection().session
+
+    @cached_property
+    def circuit_breaker(self):
+        return get_autograph_connection().circuit_breaker
 
     def check_config(self):
         required_keys = ["URL", "HAWK_ID", "HAWK_SECRET_KEY"]
@@ -60,7 +72,9 @@ class Autographer(object):
         """
         Fetches Signatures objects from Autograph for each item in `content_list`.
 
-        The items in `content_list` must be bytes objects.
+        The items in `content_list` must be bytes objects. They are sent to
+        Autograph in batches of at most `settings.AUTOGRAPH_SIGNING_BATCH_SIZE`
+        items per request.
         """
         ts = timezone.now()
         url = "{}sign/data".format(settings.AUTOGRAPH_URL)
@@ -74,9 +88,12 @@ class Autographer(object):
                 request["keyid"] = settings.AUTOGRAPH_KEYID
             signing_request.append(request)
 
-        res = self.session.post(url, json=signing_request)
-        res.raise_for_status()
-        signing_responses = res.json()
+        batch_size = settings.AUTOGRAPH_SIGNING_BATCH_SIZE
+        signing_responses = []
+        while signing_request:
+            batch, signing_request = signing_request[:batch_size], signing_request[batch_size:]
+            res = self.post(url, batch)
+            signing_responses.extend(res.json())
 
         logger.info(
             f"Got {len(signing_responses)} signatures from Autograph",
@@ -93,6 +110,141 @@ class Autographer(object):
             signatures.append({"timestamp": ts, "signature": res["signature"], "x5u": res["x5u"]})
         return signatures
 
+    def post(self, url, data):
+        """
+        Send a request to Autograph, retrying connection problems and server
+        errors up to `settings.AUTOGRAPH_RETRIES` times with an increasing
+        delay.
+        """
+        if not self.circuit_breaker.allow():
+            metrics.incr("error", tags=["reason:circuit_open"])
+            raise AutographUnavailable("Autograph is failing, not sending requests for now")
+
+        timeout = (settings.AUTOGRAPH_CONNECT_TIMEOUT, settings.AUTOGRAPH_READ_TIMEOUT)
+        attempt = 0
+        while True:
+            start = time.monotonic()
+            try:
+                res = self.session.post(url, json=data, timeout=timeout)
+                res.raise_for_status()
+            except requests.RequestException as e:
+                elapsed = (time.monotonic() - start) * 1000
+                metrics.timing("request", value=elapsed, tags=["result:error"])
+                if isinstance(e, requests.HTTPError):
+                    status_code = e.response.status_code
+                    metrics.incr("error", tags=[f"reason:http_{status_code}"])
+                    retryable = status_code >= 500
+                else:
+                    metrics.incr("error", tags=[f"reason:{type(e).__name__}"])
+                    retryable = isinstance(e, (requests.ConnectionError, requests.Timeout))
+
+                if not retryable:
+                    # Autograph is up, it just didn't like this request.
+                    self.circuit_breaker.record_success()
+                    raise
+                if attempt >= settings.AUTOGRAPH_RETRIES:
+                    self.circuit_breaker.record_failure()
+                    raise
+
+                time.sleep(settings.AUTOGRAPH_RETRY_BACKOFF * 2**attempt)
+                attempt += 1
+                continue
+
+            elapsed = (time.monotonic() - start) * 1000
+            metrics.timing("request", value=elapsed, tags=["result:ok"])
+            self.circuit_breaker.record_success()
+            return res
+
+
+class AutographUnavailable(requests.RequestException):
+    """Autograph has been failing, so the request was not sent."""
+
+
+class CircuitBreaker(object):
+    """
+    Tracks failures of a service to avoid sending it requests while it is down.
+
+    After `failure_threshold` consecutive failures, `allow` returns False
+    until `reset_timeout` seconds have passed. Then one request is allowed
+    through: if it succeeds requests are allowed again, and if it fails they
+    are blocked for another `reset_timeout` seconds. A `failure_threshold` of
+    0 disables the breaker.
+    """
+
+    def __init__(self, failure_threshold, reset_timeout):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            now = time.monotonic()
+            if now - self.opened_at >= self.reset_timeout:
+                # Let this request check if the service is back, but keep
+                # blocking the others until it's done.
+                self.opened_at = now
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.failure_threshold and self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+
+
+class AutographConnection(object):
+    """A session and a circuit breaker for an Autograph server."""
+
+    def __init__(self):
+        self.session = requests.Session()
+        self.session.auth = HawkAuth(
+            id=str(settings.AUTOGRAPH_HAWK_ID), key=str(settings.AUTOGRAPH_HAWK_SECRET_KEY)
+        )
+        self.circuit_breaker = CircuitBreaker(
+            failure_threshold=settings.AUTOGRAPH_CIRCUIT_BREAKER_THRESHOLD,
+            reset_timeout=settings.AUTOGRAPH_CIRCUIT_BREAKER_RESET_TIMEOUT,
+        )
+
+
+_autograph_connections = {}
+_autograph_connections_lock = threading.Lock()
+
+
+def get_autograph_connection():
+    """
+    Get the connection to the configured Autograph server that is shared
+    by the process.
+    """
+    key = (
+        settings.AUTOGRAPH_URL,
+        settings.AUTOGRAPH_HAWK_ID,
+        settings.AUTOGRAPH_HAWK_SECRET_KEY,
+        settings.AUTOGRAPH_CIRCUIT_BREAKER_THRESHOLD,
+        settings.AUTOGRAPH_CIRCUIT_BREAKER_RESET_TIMEOUT,
+    )
+    with _autograph_connections_lock:
+        if key not in _autograph_connections:
+            _autograph_connections[key] = AutographConnection()
+        return _autograph_connections[key]
+
+
+def reset_autograph_connections():
+    """Forget the shared Autograph connections, closing their sessions."""
+    with _autograph_connections_lock:
+        for connection in _autograph_connections.values():
+            connection.session.close()
+        _autograph_connections.clear()
+
 
 BASE64_WRONG_LENGTH_RE = re.compile(
     r"Invalid base64-encoded string: number of data characters \(\d+\) cannot "
@@ -107,10 +259,70 @@ def verify_signature_x5u(data, signature, x5u):
     If the signature is valid, returns True. If the signature is invalid, raise
     an exception explaining why.
     """
+    return verify_signature_pubkey(data, signature, get_x5u_public_key(x5u))
+
+
+def get_x5u_public_key(x5u):
+    """
+    Verify the certificate chain at a URL, and return the public key of the
+    signing certificate, base64 encoded.
+    """
     cert = verify_x5u(x5u)
     encoded = der_encode(cert["tbsCertificate"]["subjectPublicKeyInfo"])
-    cert_b64 = base64.b64encode(encoded).decode()
-    return verify_signature_pubkey(data, signature, cert_b64)
+    return base64.b64encode(encoded).decode()
+
+
+def verify_signatures(items):
+    """
+    Verify many signatures at once.
+
+    `items` is a list of ``(data, signature, x5u, pubkey)`` tuples, where
+    `pubkey` is only used if `x5u` is empty. The certificate chain at each
+    distinct x5u is only verified once, and the signatures are checked by up
+    to `settings.SIGNATURE_VERIFICATION_WORKERS` processes.
+
+    Returns a list with an entry for each item, which is None if its signature
+    is valid, or the exception explaining why it isn't. Problems with the
+    certificate chain are reported as `BadCertificate` or
+    `requests.RequestException`.
+    """
+    results = [None] * len(items)
+    pubkeys_by_x5u = {}
+    to_verify = []
+
+    for index, (data, signature, x5u, pubkey) in enumerate(items):
+        if x5u:
+            if x5u not in pubkeys_by_x5u:
+                try:
+                    pubkeys_by_x5u[x5u] = get_x5u_public_key(x5u)
+                except (BadCertificate, requests.RequestException) as e:
+                    pubkeys_by_x5u[x5u] = e
+            pubkey = pubkeys_by_x5u[x5u]
+            if isinstance(pubkey, Exception):
+                results[index] = pubkey
+                continue
+        to_verify.append((index, (data, signature, pubkey)))
+
+    workers = settings.SIGNATURE_VERIFICATION_WORKERS
+    verify_args = [args for _, args in to_verify]
+    if workers > 1 and len(verify_args) > 1:
+        # Send the work in a few chunks per worker, to keep the overhead low.
+        chunksize = max(1, len(verify_args) // (workers * 4))
+        chunks = []
+        remaining = verify_args
+        while remaining:
+            chunks.append(remaining[:chunksize])
+            remaining = remaining[chunksize:]
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            outcomes = [
+                outcome for chunk in executor.map(verify_many, chunks) for outcome in chunk
+            ]
+    else:
+        outcomes = verify_many(verify_args)
+
+    for (index, _), outcome in zip(to_verify, outcomes):
+        results[index] = outcome
+    return results
 
 
 def verify_signature_pubkey(data, signature, pubkey):
@@ -120,20 +332,53 @@ def verify_signature_pubkey(data, signature, pubkey):
     If the signature is valid, returns True. If the signature is invalid, raise
     an exception explaining why.
     """
-    # Data must be encoded as bytes
-    if isinstance(data, str):
-        data = data.encode()
+    return _verify_with_key(data, signature, decode_public_key(pubkey))
 
-    # Content signature implicitly adds a prefix to signed data
-    data = b"Content-Signature:\x00" + data
 
+def verify_many(items):
+    """
+    Verify many signatures with their public keys.
+
+    `items` is a list of ``(data, signature, pubkey)`` tuples. Each distinct
+    public key is only decoded once. Returns a list with an entry for each
+    item, which is None if its signature is valid, or the `BadSignature`
+    explaining why it isn't.
+    """
+    results = []
+    for data, signature, pubkey in items:
+        try:
+            _verify_with_key(data, signature, decode_public_key(pubkey))
+        except BadSignature as e:
+            results.append(e)
+        else:
+            results.append(None)
+    return results
+
+
+# We only have a few signing keys, so decoded keys are kept for reuse.
+PUBLIC_KEY_CACHE_SIZE = 64
+
+
+@lru_cache(maxsize=PUBLIC_KEY_CACHE_SIZE)
+def decode_public_key(pubkey):
+    """
+    Decode a base64 encoded, unarmored public key into a point on the P-384
+    curve. The returned point is shared, and must not be modified.
+    """
     # fastecdsa expects ASCII armored keys, but ours is unarmored. Add the
     # armor before passing the key to the library.
     EC_PUBLIC_HEADER = "-----BEGIN PUBLIC KEY-----"
     EC_PUBLIC_FOOTER = "-----END PUBLIC KEY-----"
-    verifying_pubkey = PEMEncoder.decode_public_key(
-        "\n".join([EC_PUBLIC_HEADER, pubkey, EC_PUBLIC_FOOTER])
-    )
+    return PEMEncoder.decode_public_key("\n".join([EC_PUBLIC_HEADER, pubkey, EC_PUBLIC_FOOTER]))
+
+
+def _verify_with_key(data, signature, verifying_pubkey):
+    # Data must be encoded as bytes
+    if isinstance(data, str):
+        data = data.encode()
+
+    # Content signature implicitly adds a prefix to signed data
+    data = b"Content-Signature:\x00" + data
 
     try:
         signature = base64.urlsafe_b64decode(signature)
@@ -186,13 +431,25 @@ def read_timestamp_object(obj):
         )
 
 
+# Certificate chains that have already been verified, by URL, content and settings.
+VERIFIED_CHAIN_CACHE_SIZE = 32
+_verified_chains = OrderedDict()
+_verified_chains_lock = threading.Lock()
+
+
+def reset_verified_chains():
+    """Forget the certificate chains that were verified by this process."""
+    with _verified_chains_lock:
+        _verified_chains.clear()
+
+
 def verify_x5u(url, expire_early=None):
     """
     Verify the certificate chain at a URL.
 
     If the certificates are valid, return the end of the
     chain. Otherwise, raise an exception explaining why they are not
-    valid.
+    valid. Chains that were verified recently are not parsed again.
     """
     cache_key = f"fetch-x5u-pem::{url}"
 
@@ -218,9 +475,55 @@ def verify_x5u(url, expire_early=None):
         if settings.X5U_CACHE_TIME:
             cache.set(cache_key, pem, settings.X5U_CACHE_TIME)
 
+    if not settings.X5U_CACHE_TIME:
+        signing_cert, _ = verify_certificate_chain(pem, expire_early)
+        return signing_cert
+
+    # Parsing the chain is slow, so reuse the result of verifying the same
+    # chain with the same settings, for as long as that result holds.
+    chain_key = (
+        url,
+        sha256(pem.encode()).hexdigest(),
+        expire_early,
+        settings.CERTIFICATES_CHECK_VALIDITY,
+        settings.CERTIFICATES_EXPECTED_ROOT_HASH,
+        settings.CERTIFICATES_EXPECTED_SUBJECT_CN,
+    )
+    now = datetime.utcnow().replace(tzinfo=pytz.utc)
+    with _verified_chains_lock:
+        cached = _verified_chains.get(chain_key)
+        if cached is not None:
+            _verified_chains.move_to_end(chain_key)
+    if cached is not None and now < cached[1]:
+        return cached[0]
+
+    signing_cert, valid_until = verify_certificate_chain(pem, expire_early)
+
+    cache_until = now + timedelta(seconds=settings.X5U_CACHE_TIME)
+    if valid_until is not None:
+        cache_until = min(cache_until, valid_until)
+    if cache_until > now:
+        with _verified_chains_lock:
+            _verified_chains[chain_key] = (signing_cert, cache_until)
+            _verified_chains.move_to_end(chain_key)
+            while len(_verified_chains) > VERIFIED_CHAIN_CACHE_SIZE:
+                _verified_chains.popitem(last=False)
+
+    return signing_cert
+
+
+def verify_certificate_chain(pem, expire_early=None):
+    """
+    Verify a PEM encoded certificate chain.
+
+    If the certificates are valid, return the end of the chain, and the time
+    until which the validity checks will keep passing, or None if they weren't
+    made. Otherwise, raise an exception explaining why they are not valid.
+    """
     der_encoded_certs = extract_certs_from_pem(pem)
     decoded_certs = [parse_cert_from_der(der) for der in der_encoded_certs]
 
+    valid_until = None
     if settings.CERTIFICATES_CHECK_VALIDITY:
         for cert in decoded_certs:
             # Check that the certificate is currently valid, and optionally check
@@ -233,6 +536,10 @@ def verify_x5u(url, expire_early=None):
                 raise BadCertificate(f"Certificate does not have expected shape: KeyError {e}")
             check_validity(not_before, not_after, expire_early)
 
+            cert_valid_until = not_after - expire_early if expire_early else not_after
+            if valid_until is None or cert_valid_until < valid_until:
+                valid_until = cert_valid_until
+
     # If an root hash has been configured, check that the root certificate in
     # the chain matches the expected value.
     if settings.CERTIFICATES_EXPECTED_ROOT_HASH:
@@ -267,7 +574,7 @@ def verify_x5u(url, expire_early=None):
         if common_name != expected:
             raise CertificateHasWrongSubject(expected=expected, actual=common_name)
 
-    return decoded_certs[0]
+    return decoded_certs[0], valid_until
 
 
 def check_validity(not_before, not_after, expire_early):
@@ -30,10 +30,14 @@ class ProductDetailsRelationalStorage(PDDatabaseStorage):
         # If we are updating firefox versions, update the table.
         if name == "languages.json":
             languages = json.loads(content)
+            # Saving a locale invalidates everything that depends on the
+            # reference data, so only the locales that changed are saved.
+            current_names = dict(Locale.objects.values_list("code", "name"))
             for locale_code, names in languages.items():
-                Locale.objects.update_or_create(
-                    code=locale_code, defaults={"name": names["English"]}
-                )
+                if current_names.get(locale_code) != names["English"]:
+                    Locale.objects.update_or_create(
+                        code=locale_code, defaults={"name": names["English"]}
+                    )
 
             # Remove obsolete locales.
             Locale.objects.exclude(code__in=languages.keys()).delete()
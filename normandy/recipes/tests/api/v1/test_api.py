@@ -1,4 +1,5 @@
 import hashlib
+import json
 from unittest.mock import patch
 
 from django.db import connection
@@ -9,6 +10,7 @@ from rest_framework.reverse import reverse
 
 from normandy.base.tests import UserFactory, Whatever
 from normandy.base.utils import aware_datetime
+from normandy.recipes.models import SignedRecipeManifest
 from normandy.recipes.tests import (
     ActionFactory,
     ApprovalRequestFactory,
@@ -463,6 +465,79 @@ class TestRecipeAPI(object):
             assert len(res.data) == 1
             assert res.data[0]["recipe"]["id"] == baseline_recipe.id
 
+        def test_default_listing_is_served_from_manifest(self, api_client, settings):
+            r1 = RecipeFactory(approver=UserFactory(), enabler=UserFactory(), signed=True)
+            settings.BASELINE_CAPABILITIES |= r1.approved_revision.capabilities
+            res = api_client.get("/api/v1/recipe/signed/")
+            assert res.status_code == 200
+            assert [r["recipe"]["id"] for r in res.data] == [r1.id]
+
+            # Tests never commit, so rebuild the manifest like a commit would.
+            SignedRecipeManifest.rebuild()
+            queries = CaptureQueriesContext(connection)
+            with queries:
+                cached_res = api_client.get("/api/v1/recipe/signed/")
+            assert cached_res.status_code == 200
+            assert cached_res.content == res.content
+            assert len(queries) == 1
+
+        def test_manifest_is_rebuilt_when_recipes_change(self, api_client, settings):
+            r1 = RecipeFactory(approver=UserFactory(), enabler=UserFactory(), signed=True)
+            settings.BASELINE_CAPABILITIES |= r1.approved_revision.capabilities
+            res = api_client.get("/api/v1/recipe/signed/")
+            assert [r["recipe"]["id"] for r in res.data] == [r1.id]
+
+            r1.signature = None
+            r1.save()
+            res = api_client.get("/api/v1/recipe/signed/")
+            assert res.data == []
+
+        def test_reading_the_listing_does_not_write(self, api_client, settings):
+            r1 = RecipeFactory(approver=UserFactory(), enabler=UserFactory(), signed=True)
+            settings.BASELINE_CAPABILITIES |= r1.approved_revision.capabilities
+            res = api_client.get("/api/v1/recipe/signed/")
+            assert [r["recipe"]["id"] for r in res.data] == [r1.id]
+            assert not SignedRecipeManifest.objects.exists()
+
+            SignedRecipeManifest.rebuild()
+            manifest = SignedRecipeManifest.objects.get()
+            r1.signature = None
+            r1.save()
+            res = api_client.get("/api/v1/recipe/signed/")
+            assert res.data == []
+            assert SignedRecipeManifest.objects.get().etag == manifest.etag
+
+        def test_manifest_is_rebuilt_once_changes_are_committed(self, settings):
+            r1 = RecipeFactory(approver=UserFactory(), enabler=UserFactory(), signed=True)
+            settings.BASELINE_CAPABILITIES |= r1.approved_revision.capabilities
+            SignedRecipeManifest.rebuild()
+
+            with patch("django.db.transaction.on_commit", side_effect=lambda func: func()):
+                r1.signature = None
+                r1.save()
+            manifest = SignedRecipeManifest.get_current()
+            assert manifest is not None
+            assert json.loads(manifest.content) == []
+
+        def test_manifest_is_rebuilt_when_settings_change(self, api_client, settings):
+            r1 = RecipeFactory(approver=UserFactory(), enabler=UserFactory(), signed=True)
+            res = api_client.get("/api/v1/recipe/signed/")
+            assert res.data == []
+
+            settings.BASELINE_CAPABILITIES |= r1.approved_revision.capabilities
+            res = api_client.get("/api/v1/recipe/signed/")
+            assert [r["recipe"]["id"] for r in res.data] == [r1.id]
+
+        def test_manifest_supports_etags(self, api_client):
+            res = api_client.get("/api/v1/recipe/signed/")
+            assert res.status_code == 200
+            etag = res["ETag"]
+
+            res = api_client.get("/api/v1/recipe/signed/", HTTP_IF_NONE_MATCH=etag)
+            assert res.status_code == 304
+            assert res["ETag"] == etag
+            assert "max-age=" in res["Cache-Control"]
+
 
 @pytest.mark.django_db
 class TestRecipeRevisionAPI(object):
@@ -1,6 +1,8 @@
+from base64 import urlsafe_b64encode
 from datetime import timedelta, datetime
 
 from django.conf import settings
+from django.core.cache import cache
 from django.db import connection
 from django.test.utils import CaptureQueriesContext
 
@@ -9,6 +11,7 @@ from rest_framework import serializers
 from rest_framework.reverse import reverse
 from pathlib import Path
 
+from normandy.base.api.pagination import KeysetPagination
 from normandy.base.api.permissions import AdminEnabledOrReadOnly
 from normandy.base.tests import UserFactory, Whatever
 from normandy.base.utils import canonical_json_dumps
@@ -145,6 +148,106 @@ class TestRecipeAPI(object):
             assert res.status_code == 200
             assert "Cookies" not in res
 
+        def test_list_supports_etags(self, api_client):
+            RecipeFactory()
+            res = api_client.get("/api/v3/recipe/")
+            assert res.status_code == 200
+            etag = res["ETag"]
+
+            queries = CaptureQueriesContext(connection)
+            with queries:
+                res = api_client.get("/api/v3/recipe/", HTTP_IF_NONE_MATCH=etag)
+            assert res.status_code == 304
+            assert res["ETag"] == etag
+            assert "max-age=" in res["Cache-Control"]
+            # Only the collection version is looked up
+            assert len(queries) == 1
+
+        def test_list_etag_depends_on_query(self, api_client):
+            res1 = api_client.get("/api/v3/recipe/")
+            res2 = api_client.get("/api/v3/recipe/?enabled=true")
+            assert res1["ETag"] != res2["ETag"]
+
+        def test_list_etag_changes_when_recipes_change(self, api_client):
+            recipe = RecipeFactory(name="before")
+            etag = api_client.get("/api/v3/recipe/")["ETag"]
+
+            recipe.revise(name="after")
+            res = api_client.get("/api/v3/recipe/", HTTP_IF_NONE_MATCH=etag)
+            assert res.status_code == 200
+            assert res["ETag"] != etag
+            assert res.data["results"][0]["latest_revision"]["name"] == "after"
+
+            channel = ChannelFactory()
+            etag = res["ETag"]
+            recipe.latest_revision.channels.add(channel)
+            assert api_client.get("/api/v3/recipe/")["ETag"] != etag
+
+        def test_list_is_served_from_response_cache(self, api_client, settings):
+            settings.API_RESPONSE_CACHE_ENABLED = True
+            cache.clear()
+            recipe = RecipeFactory(name="before")
+            res = api_client.get("/api/v3/recipe/")
+            assert res.status_code == 200
+
+            queries = CaptureQueriesContext(connection)
+            with queries:
+                cached_res = api_client.get("/api/v3/recipe/")
+            assert cached_res.status_code == 200
+            assert cached_res.content == res.content
+            assert "max-age=" in cached_res["Cache-Control"]
+            assert cached_res["ETag"] == res["ETag"]
+            # Only the collection version is looked up, for the ETag and the cache key
+            assert len(queries) == 2
+
+            recipe.revise(name="after")
+            res = api_client.get("/api/v3/recipe/")
+            assert res.data["results"][0]["latest_revision"]["name"] == "after"
+
+        def test_list_can_paginate_by_cursor(self, api_client, monkeypatch):
+            monkeypatch.setattr(KeysetPagination, "page_size", 2)
+            recipes = [RecipeFactory() for _ in range(3)]
+
+            res = api_client.get("/api/v3/recipe/?cursor=")
+            assert res.status_code == 200
+            assert [r["id"] for r in res.data["results"]] == [recipes[2].id, recipes[1].id]
+            res = api_client.get(res.data["next"])
+            assert [r["id"] for r in res.data["results"]] == [recipes[0].id]
+            assert res.data["next"] is None
+
+        def test_list_cannot_be_reordered_when_paginating_by_cursor(self, api_client):
+            RecipeFactory()
+            res = api_client.get("/api/v3/recipe/?cursor=&ordering=name")
+            assert res.status_code == 400
+            assert "ordering" in res.data
+
+        def test_list_can_select_fields(self, api_client):
+            recipe = RecipeFactory(name="selected")
+
+            res = api_client.get("/api/v3/recipe/?fields=id,latest_revision.name")
+            assert res.status_code == 200
+            assert res.data["results"] == [
+                {"id": recipe.id, "latest_revision": {"name": "selected"}}
+            ]
+
+            res = api_client.get("/api/v3/recipe/?omit=approved_revision,latest_revision.action")
+            assert res.status_code == 200
+            [result] = res.data["results"]
+            assert "approved_revision" not in result
+            assert "action" not in result["latest_revision"]
+            assert result["latest_revision"]["name"] == "selected"
+
+        def test_list_selected_fields_limit_queries(self, api_client):
+            for _ in range(3):
+                RecipeFactory(approver=UserFactory(), enabler=UserFactory())
+
+            with CaptureQueriesContext(connection) as queries:
+                res = api_client.get("/api/v3/recipe/?fields=id,latest_revision.name")
+            assert res.status_code == 200
+            joined_tables = {"recipes_action", "recipes_approvalrequest", "auth_user"}
+            for query in queries.captured_queries:
+                assert not any(table in query["sql"] for table in joined_tables)
+
         def test_list_can_filter_baseline_recipes(
             self, rs_settings, api_client, mocked_remotesettings
         ):
@@ -218,6 +321,73 @@ class TestRecipeAPI(object):
             assert res.status_code == 200
             assert res.data["count"] == 0
 
+        def test_filter_object_values_match_like_python_strings(self, api_client):
+            recipe1 = RecipeFactory(
+                filter_object=[
+                    filter_objects.PrefExistsFilter.create(pref="app.normandy.debug", value=True),
+                    filter_objects.ChannelFilter.create(
+                        channels=[ChannelFactory(slug="beta").slug]
+                    ),
+                ]
+            )
+            recipe2 = RecipeFactory(
+                filter_object=[
+                    filter_objects.PrefExistsFilter.create(pref="app.update", value=False),
+                    filter_objects.ChannelFilter.create(
+                        channels=[ChannelFactory(slug="release").slug]
+                    ),
+                ]
+            )
+
+            def matches(query):
+                res = api_client.get(f"/api/v3/recipe/?filter_object={query}")
+                assert res.status_code == 200
+                return {r["id"] for r in res.data["results"]}
+
+            # Booleans are written as in Python
+            assert matches("value:True") == {recipe1.id}
+            assert matches("value:False") == {recipe2.id}
+            assert matches("value:true") == set()
+            # Lists match if one of their items does
+            assert matches("channels:release") == {recipe2.id}
+            assert matches("channels:eta") == {recipe1.id}
+            assert matches("channels:[") == set()
+
+        def test_list_can_filter_by_multiple_filter_object_fields(self, api_client):
+            locale = LocaleFactory()
+            recipe = RecipeFactory(
+                filter_object=[
+                    filter_objects.PresetFilter.create(name="pocket-1"),
+                    filter_objects.LocaleFilter.create(locales=[locale.code]),
+                ]
+            )
+            RecipeFactory(filter_object=[filter_objects.PresetFilter.create(name="pocket-1")])
+
+            res = api_client.get(
+                f"/api/v3/recipe/?filter_object=name:pocket,locales:{locale.code}"
+            )
+            assert res.status_code == 200
+            assert {r["id"] for r in res.data["results"]} == {recipe.id}
+
+        def test_filter_object_filter_works_with_sparse_fieldsets(self, api_client):
+            recipe = RecipeFactory(
+                approver=UserFactory(),
+                filter_object=[filter_objects.PresetFilter.create(name="pocket-1")],
+            )
+            pref_filter = filter_objects.PrefExistsFilter.create(pref="app.other", value=True)
+            recipe.revise(filter_object=[pref_filter.initial_data])
+
+            def matches(query):
+                res = api_client.get(f"/api/v3/recipe/?{query}")
+                assert res.status_code == 200
+                return {r["id"] for r in res.data["results"]}
+
+            # Only the latest revision is matched, whichever fields are requested
+            assert matches("fields=id&filter_object=pref:app.other") == {recipe.id}
+            assert matches("fields=id&filter_object=name:pocket") == set()
+            assert matches("fields=approved_revision&filter_object=pref:app.other") == {recipe.id}
+            assert matches("fields=approved_revision&filter_object=name:pocket") == set()
+
         def test_list_invalid_filter_by_filter_object(self, api_client):
             # The filter is supposed to be of the form
             # `key1:val1,key2:val2,...`. What if we don't follow that format?
@@ -1225,6 +1395,19 @@ class TestRecipeAPI(object):
             assert res.status_code == 200
             assert [r["id"] for r in res.data["results"]] == [r1.id]
 
+        def test_search_ranks_name_matches_first(self, api_client):
+            r1 = RecipeFactory(name="other", arguments={"apple": "banana"})
+            r2 = RecipeFactory(name="apple banana")
+            r3 = RecipeFactory(name="apple", arguments={"banana": 1})
+
+            res = api_client.get("/api/v3/recipe/?text=apple banana")
+            assert res.status_code == 200
+            assert [r["id"] for r in res.data["results"]] == [r2.id, r3.id, r1.id]
+
+            res = api_client.get("/api/v3/recipe/?text=apple banana&ordering=name")
+            assert res.status_code == 200
+            assert [r["id"] for r in res.data["results"]] == [r3.id, r2.id, r1.id]
+
         def test_list_filter_action_legacy(self, api_client):
             a1 = ActionFactory()
             a2 = ActionFactory()
@@ -1352,6 +1535,61 @@ class TestRecipeRevisionAPI(object):
         assert res.status_code == 200
         assert res.data == {"count": 0, "next": None, "previous": None, "results": []}
 
+    def test_it_can_paginate_by_cursor(self, api_client, monkeypatch):
+        monkeypatch.setattr(KeysetPagination, "page_size", 2)
+        recipe = RecipeFactory()
+        for i in range(4):
+            recipe.revise(name=f"revision {i}")
+        revision_ids = list(
+            RecipeRevision.objects.order_by("-created", "-id").values_list("id", flat=True)
+        )
+        assert len(revision_ids) == 5
+
+        with CaptureQueriesContext(connection) as queries:
+            res = api_client.get("/api/v3/recipe_revision/?cursor=")
+        assert res.status_code == 200
+        assert "count" not in res.data
+        assert not any("COUNT(" in q["sql"] for q in queries.captured_queries)
+        assert res.data["previous"] is None
+        seen_ids = [r["id"] for r in res.data["results"]]
+
+        while res.data["next"]:
+            res = api_client.get(res.data["next"])
+            assert res.status_code == 200
+            seen_ids += [r["id"] for r in res.data["results"]]
+        assert seen_ids == revision_ids
+
+        res = api_client.get(res.data["previous"])
+        assert [r["id"] for r in res.data["results"]] == revision_ids[2:4]
+
+    def test_it_can_select_fields(self, api_client):
+        recipe = RecipeFactory()
+        res = api_client.get(
+            f"/api/v3/recipe_revision/{recipe.latest_revision.id}/?fields=id,action"
+        )
+        assert res.status_code == 200
+        assert res.data == {
+            "id": recipe.latest_revision.id,
+            "action": Whatever(
+                lambda action: action["name"] == recipe.latest_revision.action.name
+            ),
+        }
+
+    @pytest.mark.parametrize("param", ["fields=id,action.name", "omit=action.name"])
+    def test_it_rejects_selecting_fields_of_method_fields(self, api_client, param):
+        recipe = RecipeFactory()
+        res = api_client.get(f"/api/v3/recipe_revision/{recipe.latest_revision.id}/?{param}")
+        assert res.status_code == 400
+        assert res.data == {"fields": ["The fields of `action` cannot be selected."]}
+
+    def test_it_rejects_invalid_cursors(self, api_client):
+        res = api_client.get("/api/v3/recipe_revision/?cursor=nonsense")
+        assert res.status_code == 404
+
+        cursor = urlsafe_b64encode(b'{"reverse": false, "position": ["nonsense", 1]}').decode()
+        res = api_client.get(f"/api/v3/recipe_revision/?cursor={cursor}")
+        assert res.status_code == 404
+
     def test_it_serves_revisions(self, api_client):
         recipe = RecipeFactory()
         res = api_client.get("/api/v3/recipe_revision/%s/" % recipe.latest_revision.id)
@@ -1470,6 +1708,16 @@ class TestApprovalRequestAPI(object):
         assert res.status_code == 200
         assert res.data == {"count": 0, "next": None, "previous": None, "results": []}
 
+    def test_it_can_paginate_by_cursor(self, api_client):
+        approval_request = ApprovalRequestFactory()
+        res = api_client.get("/api/v3/approval_request/?cursor=")
+        assert res.status_code == 200
+        assert res.data == {
+            "next": None,
+            "previous": None,
+            "results": [Whatever(lambda r: r["id"] == approval_request.id)],
+        }
+
     def test_approve(self, api_client):
         r = RecipeFactory()
         a = ApprovalRequestFactory(revision=r.latest_revision)
@@ -2075,3 +2323,18 @@ class TestFilters(object):
                 {"key": "disabled", "value": "Disabled"},
             ],
         }
+
+    def test_it_is_served_from_response_cache(self, api_client, settings):
+        settings.API_RESPONSE_CACHE_ENABLED = True
+        cache.clear()
+        res = api_client.get("/api/v3/filters/")
+        assert res.status_code == 200
+        assert res.data["channels"] == []
+
+        with CaptureQueriesContext(connection) as queries:
+            assert api_client.get("/api/v3/filters/").content == res.content
+        assert len(queries) == 1
+
+        channel = ChannelFactory()
+        res = api_client.get("/api/v3/filters/")
+        assert res.data["channels"] == [{"key": channel.slug, "value": channel.name}]
@@ -74,6 +74,26 @@ class TestSignaturesUseGoodCertificates(object):
 
 @pytest.mark.django_db
 class TestRecipeSignatureAreCorrect:
+    def test_it_reports_bad_signatures(self, mocker):
+        recipe = RecipeFactory(approver=UserFactory(), enabler=UserFactory(), signed=True)
+        mock_verify_signatures = mocker.patch("normandy.recipes.checks.signing.verify_signatures")
+        mock_verify_signatures.return_value = [signing.SignatureDoesNotMatch()]
+
+        errors = checks.recipe_signatures_are_correct(None)
+
+        (items,), _ = mock_verify_signatures.call_args
+        assert items == [
+            (
+                recipe.canonical_json(),
+                recipe.signature.signature,
+                recipe.signature.x5u,
+                recipe.signature.public_key,
+            )
+        ]
+        assert len(errors) == 1
+        assert errors[0].id == checks.ERROR_INVALID_RECIPE_SIGNATURE
+        assert str(recipe.id) in errors[0].msg
+
     def test_it_warns_if_a_field_isnt_available(self, mocker):
         """This is to allow for un-applied to migrations to not break running migrations."""
         RecipeFactory(approver=UserFactory(), signed=True)
@@ -7,6 +7,8 @@ import requests_mock
 from django.conf import settings
 from django.core.management import call_command, CommandError
 from django.core.exceptions import ImproperlyConfigured
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 
 import pytest
 import requests.exceptions
@@ -14,9 +16,18 @@ from markus.testing import MetricsMock
 from markus import GAUGE
 
 from normandy.base.tests import UserFactory, Whatever
-from normandy.recipes import exports
-from normandy.recipes.models import Action, Recipe
-from normandy.recipes.tests import ActionFactory, RecipeFactory
+from normandy.recipes import exports, signing
+from normandy.recipes.management.commands import process_outbox
+from normandy.recipes.models import (
+    Action,
+    OutboxEvent,
+    PublishedRecord,
+    Recipe,
+    RecipeRevision,
+    RemoteSettingsState,
+    SignedRecipeManifest,
+)
+from normandy.recipes.tests import ActionFactory, fake_sign, RecipeFactory
 from normandy.studies.tests import ExtensionFactory
 
 
@@ -174,6 +185,31 @@ class TestUpdateSignatures(object):
         update_recipe_signatures.return_value.execute.assert_called_once()
 
 
+@pytest.mark.django_db
+class TestBenchmarkSignatureVerification(object):
+    def test_it_works_without_signatures(self, capsys):
+        call_command("benchmark_signature_verification")
+        assert "No signed recipes or actions" in capsys.readouterr().out
+
+    def test_it_verifies_the_signed_set(self, mocker, capsys):
+        recipe = RecipeFactory(approver=UserFactory(), enabler=UserFactory(), signed=True)
+        ActionFactory(signed=True)
+        mock_get_public_key = mocker.patch(
+            "normandy.recipes.signing.get_x5u_public_key",
+            return_value=recipe.signature.public_key,
+        )
+        mock_verify_many = mocker.spy(signing, "verify_many")
+
+        call_command("benchmark_signature_verification", "--repeat", "2")
+
+        mock_get_public_key.assert_called_once_with(recipe.signature.x5u)
+        assert mock_verify_many.call_count == 2
+        assert len(mock_verify_many.call_args[0][0]) == 2
+        out = capsys.readouterr().out
+        assert "Verified 2 signatures, best of 2" in out
+        assert "speedup" in out
+
+
 @pytest.mark.django_db
 class TestUpdateRecipeSignatures(object):
     def test_it_works(self):
@@ -220,6 +256,27 @@ class TestUpdateRecipeSignatures(object):
         r.refresh_from_db()
         assert r.signature.signature != "old signature"
 
+    def test_it_rebuilds_the_signed_recipe_manifest(self, mocked_autograph):
+        call_command("update_recipe_signatures")
+        assert SignedRecipeManifest.get_current() is not None
+
+    def test_it_signs_recipes_in_one_batch(self, mocked_autograph):
+        recipes = RecipeFactory.create_batch(
+            3, approver=UserFactory(), enabler=UserFactory(), signed=False
+        )
+        mocked_autograph.return_value.sign_data.reset_mock()
+        call_command("update_recipe_signatures")
+
+        sign_data = mocked_autograph.return_value.sign_data
+        assert sign_data.call_count == 1
+        assert len(sign_data.call_args[0][0]) == 3
+        signature_ids = set()
+        for recipe in recipes:
+            recipe.refresh_from_db()
+            assert recipe.signature is not None
+            signature_ids.add(recipe.signature.id)
+        assert len(signature_ids) == 3
+
     def test_it_updates_remote_settings_if_enabled(self, mocker, mocked_autograph):
         mocked_remotesettings = mocker.patch(
             "normandy.recipes.management.commands.update_recipe_signatures.RemoteSettings"
@@ -232,8 +289,10 @@ class TestUpdateRecipeSignatures(object):
 
         call_command("update_recipe_signatures", "--force")
 
-        assert mocked_remotesettings.return_value.publish.call_count == 3
-        assert mocked_remotesettings.return_value.approve_changes.call_count == 1
+        assert not mocked_remotesettings.return_value.publish.called
+        assert mocked_remotesettings.return_value.publish_many.call_count == 1
+        (published,), _ = mocked_remotesettings.return_value.publish_many.call_args
+        assert len(published) == 3
 
     def test_it_does_not_resign_up_to_date_recipes(self, settings, mocked_autograph):
         r = RecipeFactory(approver=UserFactory(), enabler=UserFactory(), signed=True)
@@ -294,7 +353,10 @@ class TestUpdateRecipeSignatures(object):
             )
         ]
 
-        # one publish to the capabilities collection per recipe
+        # One batch to the capabilities collection, containing every recipe
+        assert client_mock.batch.call_count == 1
+        assert not client_mock.update_record.called
+        batch_mock = client_mock.batch.return_value.__enter__.return_value
         expected_calls = []
         for recipe in recipes:
             expected_calls.append(
@@ -304,8 +366,8 @@ class TestUpdateRecipeSignatures(object):
                     collection=settings.REMOTE_SETTINGS_CAPABILITIES_COLLECTION_ID,
                 )
             )
-        client_mock.update_record.has_calls(expected_calls, any_order=True)  # all expected calls
-        assert client_mock.update_record.call_count == len(expected_calls)  # no extra calls
+        batch_mock.update_record.has_calls(expected_calls, any_order=True)  # all expected calls
+        assert batch_mock.update_record.call_count == len(expected_calls)  # no extra calls
 
 
 @pytest.mark.django_db
@@ -339,6 +401,18 @@ class TestUpdateActionSignatures(object):
         a.refresh_from_db()
         assert a.signature.signature != "old signature"
 
+    def test_it_signs_actions_in_one_batch(self, mocked_autograph):
+        actions = ActionFactory.create_batch(3, signed=False)
+        mocked_autograph.return_value.sign_data.reset_mock()
+        call_command("update_action_signatures")
+
+        sign_data = mocked_autograph.return_value.sign_data
+        assert sign_data.call_count == 1
+        assert len(sign_data.call_args[0][0]) == 3
+        for action in actions:
+            action.refresh_from_db()
+            assert action.signature is not None
+
     def test_it_does_not_resign_up_to_date_actions(self, settings, mocked_autograph):
         a = ActionFactory(signed=True)
         a.signature.signature = "original signature"
@@ -355,6 +429,184 @@ class TestUpdateActionSignatures(object):
             assert mm.has_record(GAUGE, stat="normandy.signing.actions.signed", value=3)
 
 
+@pytest.mark.django_db
+class TestProcessOutbox(object):
+    @pytest.fixture
+    def outbox_settings(self, settings):
+        settings.RECIPE_OUTBOX_ENABLED = True
+        settings.RECIPE_OUTBOX_MAX_ATTEMPTS = 2
+        return settings
+
+    @pytest.fixture
+    def mocked_remotesettings(self, mocker):
+        return mocker.patch("normandy.recipes.management.commands.process_outbox.RemoteSettings")
+
+    def test_it_works(self):
+        call_command("process_outbox")
+
+    def test_it_signs_and_publishes_enabled_recipes(
+        self, outbox_settings, mocked_autograph, mocked_remotesettings
+    ):
+        recipe = RecipeFactory(approver=UserFactory(), enabler=UserFactory())
+        assert recipe.outbox_events.exists()
+
+        call_command("process_outbox")
+
+        recipe.refresh_from_db()
+        assert recipe.signature is not None
+        mocked_remotesettings.return_value.publish.assert_called_once_with(recipe)
+        assert not OutboxEvent.objects.exists()
+
+    def test_changed_recipes_are_not_signed_until_processed(
+        self, outbox_settings, mocked_autograph, mocked_remotesettings, api_client
+    ):
+        recipe = RecipeFactory(approver=UserFactory(), enabler=UserFactory())
+        call_command("process_outbox")
+        outbox_settings.BASELINE_CAPABILITIES |= recipe.approved_revision.capabilities
+
+        def signed_ids():
+            res = api_client.get("/api/v1/recipe/signed/")
+            assert res.status_code == 200
+            return [r["recipe"]["id"] for r in res.data]
+
+        assert signed_ids() == [recipe.id]
+
+        recipe.revise(name="Changed")
+        approval_request = recipe.latest_revision.request_approval(UserFactory())
+        approval_request.approve(UserFactory(), "r+")
+        recipe.refresh_from_db()
+        assert recipe.signature is None
+        assert signed_ids() == []
+
+        call_command("process_outbox")
+        assert signed_ids() == [recipe.id]
+
+    def test_it_unpublishes_disabled_recipes(
+        self, outbox_settings, mocked_autograph, mocked_remotesettings
+    ):
+        recipe = RecipeFactory(approver=UserFactory(), enabler=UserFactory())
+        recipe.approved_revision.disable(user=UserFactory())
+
+        call_command("process_outbox")
+
+        assert not mocked_remotesettings.return_value.publish.called
+        mocked_remotesettings.return_value.unpublish.assert_called_once_with(recipe)
+
+    def test_it_coalesces_events_per_recipe(
+        self, outbox_settings, mocked_autograph, mocked_remotesettings
+    ):
+        recipe = RecipeFactory(approver=UserFactory(), enabler=UserFactory())
+        recipe.approved_revision.disable(user=UserFactory())
+        recipe.approved_revision.enable(user=UserFactory())
+        assert recipe.outbox_events.count() > 2
+        mocked_autograph.return_value.sign_data.reset_mock()
+
+        call_command("process_outbox")
+
+        assert mocked_autograph.return_value.sign_data.call_count == 1
+        assert mocked_remotesettings.return_value.publish.call_count == 1
+        assert not mocked_remotesettings.return_value.unpublish.called
+
+    def test_it_retries_failures(self, outbox_settings, mocked_autograph, mocked_remotesettings):
+        recipe = RecipeFactory(approver=UserFactory(), enabler=UserFactory())
+        mocked_remotesettings.return_value.publish.side_effect = Exception("Kinto is down")
+
+        call_command("process_outbox")
+        recipe.refresh_from_db()
+        # The signature was committed before publishing
+        assert recipe.signature is not None
+        for event in recipe.outbox_events.all():
+            assert event.attempts == 1
+            assert "Kinto is down" in event.last_error
+
+        mocked_remotesettings.return_value.publish.side_effect = None
+        call_command("process_outbox")
+        recipe.refresh_from_db()
+        assert recipe.signature is not None
+        assert not recipe.outbox_events.exists()
+
+    def test_it_does_not_publish_in_a_transaction(
+        self, outbox_settings, mocked_autograph, mocked_remotesettings
+    ):
+        recipe = RecipeFactory(approver=UserFactory(), enabler=UserFactory())
+        # Tests run in a transaction, so check that no block was added to it.
+        depth = len(connection.savepoint_ids)
+        publish_depths = []
+        mocked_remotesettings.return_value.publish.side_effect = lambda recipe: (
+            publish_depths.append(len(connection.savepoint_ids))
+        )
+
+        call_command("process_outbox")
+
+        assert publish_depths == [depth]
+        assert not recipe.outbox_events.exists()
+
+    def test_it_skips_recipes_locked_by_another_worker(
+        self, outbox_settings, mocked_autograph, mocked_remotesettings
+    ):
+        recipe = RecipeFactory(approver=UserFactory(), enabler=UserFactory())
+        lock_args = [process_outbox.ADVISORY_LOCK_ID, recipe.id]
+        other_connection = connection.copy()
+        try:
+            with other_connection.cursor() as cursor:
+                cursor.execute("SELECT pg_advisory_lock(%s, %s)", lock_args)
+            call_command("process_outbox")
+        finally:
+            other_connection.close()
+
+        assert not mocked_remotesettings.return_value.publish.called
+        assert recipe.outbox_events.exists()
+
+    def test_it_only_saves_the_signature(
+        self, outbox_settings, mocked_autograph, mocked_remotesettings
+    ):
+        recipe = RecipeFactory(approver=UserFactory(), enabler=UserFactory())
+        new_revision_id = []
+
+        def sign_data(data):
+            # Another request revises the recipe while Autograph is called.
+            Recipe.objects.get(id=recipe.id).revise(name="changed while signing")
+            new_revision_id.append(Recipe.objects.get(id=recipe.id).latest_revision_id)
+            return fake_sign(data)
+
+        mocked_autograph.return_value.sign_data.side_effect = sign_data
+        call_command("process_outbox")
+
+        recipe.refresh_from_db()
+        assert recipe.signature is not None
+        assert recipe.latest_revision_id == new_revision_id[0]
+
+    def test_it_retries_recipes_changed_while_signing(
+        self, outbox_settings, mocked_autograph, mocked_remotesettings
+    ):
+        recipe = RecipeFactory(approver=UserFactory(), enabler=UserFactory())
+
+        def sign_data(data):
+            Recipe.objects.get(id=recipe.id).approved_revision.disable(user=UserFactory())
+            return fake_sign(data)
+
+        mocked_autograph.return_value.sign_data.side_effect = sign_data
+        call_command("process_outbox")
+
+        recipe.refresh_from_db()
+        assert recipe.signature is None
+        assert not mocked_remotesettings.return_value.publish.called
+        for event in recipe.outbox_events.all():
+            assert event.attempts == 0
+
+    def test_it_gives_up_after_max_attempts(
+        self, outbox_settings, mocked_autograph, mocked_remotesettings
+    ):
+        RecipeFactory(approver=UserFactory(), enabler=UserFactory())
+        mocked_remotesettings.return_value.publish.side_effect = Exception("Kinto is down")
+
+        for i in range(3):
+            call_command("process_outbox")
+
+        assert mocked_remotesettings.return_value.publish.call_count == 2
+        assert OutboxEvent.objects.exists()
+
+
 addonUrl = "addonUrl"
 
 
@@ -428,6 +680,31 @@ class TestUpdateAddonUrls(object):
         assert recipe2.latest_revision.arguments[addonUrl] == extension2.xpi.url
 
 
+@pytest.mark.django_db
+class TestUpdateFilterExpressions(object):
+    def test_it_works(self):
+        recipe = RecipeFactory(extra_filter_expression="2 + 2 == 4", filter_object_json=None)
+        RecipeRevision.objects.update(compiled_filter_expression=None)
+
+        call_command("update_filter_expressions")
+
+        revision = RecipeRevision.objects.get(id=recipe.latest_revision.id)
+        assert revision.compiled_filter_expression == "2 + 2 == 4"
+
+
+@pytest.mark.django_db
+class TestUpdateRecipeCapabilities(object):
+    def test_it_works(self):
+        recipe = RecipeFactory(extra_capabilities=["test.foo"])
+        RecipeRevision.objects.update(required_capabilities=[])
+
+        call_command("update_recipe_capabilities")
+
+        revision = RecipeRevision.objects.get(id=recipe.latest_revision.id)
+        assert "test.foo" in revision.required_capabilities
+        assert set(revision.required_capabilities) == (revision.capabilities - {"capabilities-v1"})
+
+
 @pytest.mark.django_db
 class TestSyncRemoteSettings(object):
     capabilities_workspace_collection_url = (
@@ -439,6 +716,16 @@ class TestSyncRemoteSettings(object):
         f"/{settings.REMOTE_SETTINGS_CAPABILITIES_COLLECTION_ID}/records"
     )
 
+    @pytest.fixture
+    def batch_url(self, rs_settings, requestsmock):
+        # The batch size limit is read from the server root before the first batch.
+        requestsmock.get(
+            f"{rs_settings.REMOTE_SETTINGS_URL}/", json={"settings": {"batch_max_requests": 25}}
+        )
+        url = f"{rs_settings.REMOTE_SETTINGS_URL}/batch"
+        requestsmock.post(url, json={"responses": [{"status": 200, "body": {}}]})
+        return url
+
     @pytest.mark.django_db
     def test_it_works(self, rs_settings, requestsmock):
         """
@@ -471,7 +758,7 @@ class TestSyncRemoteSettings(object):
         assert not mocked_remotesettings.publish.called
         assert not mocked_remotesettings.unpublish.called
 
-    def test_publishes_missing_recipes(self, rs_settings, requestsmock):
+    def test_publishes_missing_recipes(self, rs_settings, requestsmock, batch_url):
         # Some records will be created with PUT.
         requestsmock.put(requests_mock.ANY, json={})
         # A signature request will be sent.
@@ -498,16 +785,20 @@ class TestSyncRemoteSettings(object):
         # First request should be to get the existing records
         assert requests[0].method == "GET"
         assert requests[0].url.endswith(self.capabilities_published_records_url)
-        # The next should be to PUT the missing recipe2
-        assert requests[1].method == "PUT"
-        assert requests[1].url.endswith(r2_capabilities_url)
+        # The next should be a batch to PUT the missing recipe2
+        assert requests[2].method == "POST"
+        assert requests[2].url == batch_url
+        batched = requests[2].json()["requests"]
+        assert [(r["method"], r["path"]) for r in batched] == [
+            ("PUT", r2_capabilities_url.replace("/v1", ""))
+        ]
         # The final one should be to approve the changes
-        assert requests[2].method == "PATCH"
-        assert requests[2].url.endswith(self.capabilities_workspace_collection_url)
+        assert requests[3].method == "PATCH"
+        assert requests[3].url.endswith(self.capabilities_workspace_collection_url)
         # And there are no extra requests
-        assert len(requests) == 3
+        assert len(requests) == 4
 
-    def test_republishes_outdated_recipes(self, rs_settings, requestsmock):
+    def test_republishes_outdated_recipes(self, rs_settings, requestsmock, batch_url):
         # Some records will be created with PUT.
         requestsmock.put(requests_mock.ANY, json={})
         # A signature request will be sent.
@@ -534,16 +825,20 @@ class TestSyncRemoteSettings(object):
         # The first request should be to get the existing records
         assert requests[0].method == "GET"
         assert requests[0].url.endswith(self.capabilities_published_records_url)
-        # The next one should be to PUT the outdated recipe2
-        assert requests[1].method == "PUT"
-        assert requests[1].url.endswith(r2_capabilities_url)
+        # The next one should be a batch to PUT the outdated recipe2
+        assert requests[2].method == "POST"
+        assert requests[2].url == batch_url
+        batched = requests[2].json()["requests"]
+        assert [(r["method"], r["path"]) for r in batched] == [
+            ("PUT", r2_capabilities_url.replace("/v1", ""))
+        ]
         # The final one should be to approve the changes
-        assert requests[2].method == "PATCH"
-        assert requests[2].url.endswith(self.capabilities_workspace_collection_url)
+        assert requests[3].method == "PATCH"
+        assert requests[3].url.endswith(self.capabilities_workspace_collection_url)
         # And there are no extra requests
-        assert len(requests) == 3
+        assert len(requests) == 4
 
-    def test_unpublishes_extra_recipes(self, rs_settings, requestsmock):
+    def test_unpublishes_extra_recipes(self, rs_settings, requestsmock, batch_url):
         # Some records will be created with PUT.
         requestsmock.put(requests_mock.ANY, json={})
         # A signature request will be sent.
@@ -569,11 +864,169 @@ class TestSyncRemoteSettings(object):
         # The first request should be to get the existing records
         assert requests[0].method == "GET"
         assert requests[0].url.endswith(self.capabilities_published_records_url)
-        # The next one should be to PUT the outdated recipe2
-        assert requests[1].method == "DELETE"
-        assert requests[1].url.endswith(r2_capabilities_url)
+        # The next one should be a batch to DELETE the extra recipe2
+        assert requests[2].method == "POST"
+        assert requests[2].url == batch_url
+        batched = requests[2].json()["requests"]
+        assert [(r["method"], r["path"]) for r in batched] == [
+            ("DELETE", r2_capabilities_url.replace("/v1", ""))
+        ]
         # The final one should be to approve the changes
-        assert requests[2].method == "PATCH"
-        assert requests[2].url.endswith(self.capabilities_workspace_collection_url)
+        assert requests[3].method == "PATCH"
+        assert requests[3].url.endswith(self.capabilities_workspace_collection_url)
         # And there are no extra requests
-        assert len(requests) == 3
+        assert len(requests) == 4
+
+    def published_record(self, recipe, last_modified):
+        return {**exports.recipe_as_record(recipe), "last_modified": last_modified}
+
+    def test_it_remembers_what_is_in_sync(self, rs_settings, requestsmock):
+        requestsmock.put(requests_mock.ANY, json={})
+        requestsmock.patch(self.capabilities_workspace_collection_url, json={})
+        r1 = RecipeFactory(name="Test 1", enabler=UserFactory(), approver=UserFactory())
+        requestsmock.get(
+            self.capabilities_published_records_url,
+            json={"data": [self.published_record(r1, 42)]},
+        )
+
+        call_command("sync_remote_settings")
+
+        assert RemoteSettingsState.get_last_modified() == 42
+        assert PublishedRecord.objects.get(recipe_id=r1.id).last_modified == 42
+
+    def test_it_only_fetches_changes_after_the_first_sync(
+        self, rs_settings, requestsmock, batch_url
+    ):
+        requestsmock.put(requests_mock.ANY, json={})
+        requestsmock.patch(self.capabilities_workspace_collection_url, json={})
+        RecipeFactory(name="Test 1", enabler=UserFactory(), approver=UserFactory())
+        RemoteSettingsState.set_last_modified(42)
+        requestsmock.get(self.capabilities_published_records_url, json={"data": []})
+
+        requestsmock._adapter.request_history = []
+        call_command("sync_remote_settings")
+
+        requests = requestsmock.request_history
+        assert len(requests) == 1
+        assert requests[0].qs == {"_since": ["42"]}
+
+    def test_it_publishes_local_changes_after_the_first_sync(
+        self, rs_settings, requestsmock, batch_url
+    ):
+        requestsmock.put(requests_mock.ANY, json={})
+        requestsmock.patch(self.capabilities_workspace_collection_url, json={})
+        r1 = RecipeFactory(name="Test 1", enabler=UserFactory(), approver=UserFactory())
+        PublishedRecord.objects.filter(recipe_id=r1.id).update(record_hash="an older hash")
+        RemoteSettingsState.set_last_modified(42)
+        requestsmock.get(self.capabilities_published_records_url, json={"data": []})
+
+        requestsmock._adapter.request_history = []
+        call_command("sync_remote_settings")
+
+        batch_requests = [r for r in requestsmock.request_history if r.url == batch_url]
+        assert len(batch_requests) == 1
+        batched = batch_requests[0].json()["requests"]
+        assert [r["method"] for r in batched] == ["PUT"]
+        assert batched[0]["body"]["data"]["id"] == str(r1.id)
+
+    def test_it_publishes_local_changes_without_a_new_signature(
+        self, rs_settings, requestsmock, batch_url
+    ):
+        requestsmock.put(requests_mock.ANY, json={})
+        requestsmock.patch(self.capabilities_workspace_collection_url, json={})
+        r1 = RecipeFactory(name="Test 1", enabler=UserFactory(), approver=UserFactory())
+        RecipeRevision.objects.filter(id=r1.approved_revision.id).update(
+            compiled_filter_expression="2 + 2 == 5"
+        )
+        r1 = Recipe.objects.get(id=r1.id)
+        RemoteSettingsState.set_last_modified(42)
+        requestsmock.get(self.capabilities_published_records_url, json={"data": []})
+
+        requestsmock._adapter.request_history = []
+        call_command("sync_remote_settings")
+
+        batch_requests = [r for r in requestsmock.request_history if r.url == batch_url]
+        assert len(batch_requests) == 1
+        batched = batch_requests[0].json()["requests"]
+        assert [r["method"] for r in batched] == ["PUT"]
+        assert batched[0]["body"]["data"]["recipe"]["filter_expression"] == "2 + 2 == 5"
+
+    def test_it_unpublishes_deleted_recipes_after_the_first_sync(
+        self, rs_settings, requestsmock, batch_url
+    ):
+        requestsmock.put(requests_mock.ANY, json={})
+        requestsmock.patch(self.capabilities_workspace_collection_url, json={})
+        r1 = RecipeFactory(name="Test 1", enabler=UserFactory(), approver=UserFactory())
+        assert PublishedRecord.objects.filter(recipe_id=r1.id).exists()
+        recipe_id = r1.id
+        r1.delete()
+        RemoteSettingsState.set_last_modified(42)
+        requestsmock.get(self.capabilities_published_records_url, json={"data": []})
+
+        requestsmock._adapter.request_history = []
+        call_command("sync_remote_settings")
+
+        batch_requests = [r for r in requestsmock.request_history if r.url == batch_url]
+        assert len(batch_requests) == 1
+        batched = batch_requests[0].json()["requests"]
+        assert [(r["method"], r["path"].rsplit("/", 1)[-1]) for r in batched] == [
+            ("DELETE", str(recipe_id))
+        ]
+        assert not PublishedRecord.objects.filter(recipe_id=recipe_id).exists()
+
+    def test_it_compares_local_changes_with_a_bounded_number_of_queries(
+        self, rs_settings, requestsmock, batch_url
+    ):
+        requestsmock.put(requests_mock.ANY, json={})
+        requestsmock.patch(self.capabilities_workspace_collection_url, json={})
+        RecipeFactory(enabler=UserFactory(), approver=UserFactory())
+        RemoteSettingsState.set_last_modified(42)
+        requestsmock.get(self.capabilities_published_records_url, json={"data": []})
+
+        def count_queries():
+            with CaptureQueriesContext(connection) as queries:
+                call_command("sync_remote_settings")
+            return len(queries)
+
+        queries_for_one = count_queries()
+        RecipeFactory.create_batch(5, enabler=UserFactory(), approver=UserFactory())
+        assert count_queries() == queries_for_one
+
+    def test_it_repairs_remote_changes_after_the_first_sync(
+        self, rs_settings, requestsmock, batch_url
+    ):
+        requestsmock.put(requests_mock.ANY, json={})
+        requestsmock.patch(self.capabilities_workspace_collection_url, json={})
+        r1 = RecipeFactory(name="Test 1", enabler=UserFactory(), approver=UserFactory())
+        r2 = RecipeFactory(name="Test 2", enabler=UserFactory(), approver=UserFactory())
+        r3 = RecipeFactory(name="Test 3", enabler=UserFactory(), approver=UserFactory())
+        r4 = RecipeFactory(name="Test 4", approver=UserFactory())
+        RemoteSettingsState.set_last_modified(42)
+        requestsmock.get(
+            self.capabilities_published_records_url,
+            json={
+                "data": [
+                    # Our own change, which is in sync
+                    self.published_record(r1, 43),
+                    # Changed remotely
+                    {**self.published_record(r2, 44), "name": "Outdated name"},
+                    # Deleted remotely
+                    {"id": str(r3.id), "deleted": True, "last_modified": 45},
+                    # Published, but not enabled locally
+                    self.published_record(r4, 46),
+                ]
+            },
+        )
+
+        requestsmock._adapter.request_history = []
+        call_command("sync_remote_settings")
+
+        # One batch to publish, and one to unpublish
+        batch_requests = [r for r in requestsmock.request_history if r.url == batch_url]
+        assert len(batch_requests) == 2
+        batched = [r for b in batch_requests for r in b.json()["requests"]]
+        assert sorted((r["method"], r["path"].rsplit("/", 1)[-1]) for r in batched) == sorted(
+            [("PUT", str(r3.id)), ("PUT", str(r2.id)), ("DELETE", str(r4.id))]
+        )
+        assert RemoteSettingsState.get_last_modified() == 46
+        assert PublishedRecord.objects.get(recipe_id=r1.id).last_modified == 43
@@ -8,6 +8,7 @@ from kinto_http.session import USER_AGENT as KINTO_USER_AGENT
 
 from normandy.base.tests import UserFactory
 from normandy.recipes import exports
+from normandy.recipes.models import PublishedRecord
 from normandy.recipes.tests import RecipeFactory
 from normandy.base.tests import Whatever
 
@@ -414,3 +415,89 @@ class TestRemoteSettings:
         # so it rollsback collection
         assert requests[2].method == "PATCH"
         assert requests[2].url == rs_urls["workspace"]["collection"]
+
+    @pytest.fixture
+    def batch_url(self, rs_settings, requestsmock):
+        # The batch size limit is read from the server root before the first batch.
+        requestsmock.get(
+            f"{rs_settings.REMOTE_SETTINGS_URL}/", json={"settings": {"batch_max_requests": 25}}
+        )
+        return f"{rs_settings.REMOTE_SETTINGS_URL}/batch"
+
+    def test_publish_many_sends_one_batch_and_approves_once(
+        self, rs_urls, rs_settings, requestsmock, batch_url
+    ):
+        recipes = RecipeFactory.create_batch(3, approver=UserFactory())
+        requestsmock.post(
+            batch_url, json={"responses": [{"status": 200, "body": {}} for r in recipes]}
+        )
+        requestsmock.patch(rs_urls["workspace"]["collection"], json={"data": {}})
+
+        remotesettings = exports.RemoteSettings()
+        remotesettings.publish_many(recipes)
+
+        requests = [r for r in requestsmock.request_history if r.method != "GET"]
+        assert [r.method for r in requests] == ["POST", "PATCH"]
+        batched = requests[0].json()["requests"]
+        assert [r["method"] for r in batched] == ["PUT"] * 3
+        assert [r["body"]["data"] for r in batched] == [
+            exports.recipe_as_record(recipe) for recipe in recipes
+        ]
+
+    def test_publish_many_is_noop_without_recipes(self, rs_settings, requestsmock):
+        remotesettings = exports.RemoteSettings()
+        remotesettings.publish_many([])
+        remotesettings.unpublish_many([])
+        assert requestsmock.call_count == 0
+
+    def test_unpublish_many_ignores_missing_records(
+        self, rs_urls, rs_settings, requestsmock, batch_url, mock_logger
+    ):
+        published, missing = RecipeFactory.create_batch(2, approver=UserFactory())
+        requestsmock.post(
+            batch_url,
+            json={
+                "responses": [
+                    {"status": 200, "body": {"data": {"deleted": True}}},
+                    {"status": 404, "body": {"message": "not found"}},
+                ]
+            },
+        )
+        requestsmock.patch(rs_urls["workspace"]["collection"], json={"data": {}})
+
+        remotesettings = exports.RemoteSettings()
+        # Assert doesn't raise.
+        remotesettings.unpublish_many([published, missing])
+
+        requests = [r for r in requestsmock.request_history if r.method != "GET"]
+        assert [r.method for r in requests] == ["POST", "PATCH"]
+        assert [r["method"] for r in requests[0].json()["requests"]] == ["DELETE", "DELETE"]
+        assert mock_logger.warning.call_args_list == [
+            call(
+                f"The recipe '{missing.id}' was not published in the capabilities collection. Skip."
+            )
+        ]
+
+    def test_unpublish_many_raises_other_errors(self, rs_settings, requestsmock, batch_url):
+        recipe = RecipeFactory(approver=UserFactory())
+        requestsmock.post(
+            batch_url, json={"responses": [{"status": 403, "body": {"message": "forbidden"}}]}
+        )
+
+        remotesettings = exports.RemoteSettings()
+        with pytest.raises(kinto_http.KintoBatchException):
+            remotesettings.unpublish_many([recipe])
+
+    def test_it_remembers_published_records(self, rs_urls, rs_settings, requestsmock):
+        recipe = RecipeFactory(name="Test", approver=UserFactory())
+        requestsmock.put(rs_urls["workspace"]["record"].format(recipe.id), json={"data": {}})
+        requestsmock.delete(rs_urls["workspace"]["record"].format(recipe.id), json={"data": {}})
+        requestsmock.patch(rs_urls["workspace"]["collection"], json={"data": {}})
+        remotesettings = exports.RemoteSettings()
+
+        remotesettings.publish(recipe)
+        published = PublishedRecord.objects.get(recipe_id=recipe.id)
+        assert published.record_hash == exports.record_hash(exports.recipe_as_record(recipe))
+
+        remotesettings.unpublish(recipe)
+        assert not PublishedRecord.objects.filter(recipe_id=recipe.id).exists()
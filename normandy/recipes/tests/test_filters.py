@@ -1,4 +1,8 @@
 from datetime import datetime
+import json
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 
 import factory.fuzzy
 import pytest
@@ -208,6 +212,20 @@ class TestChannelFilter(FilterTestsBase):
         filter = self.create_basic_filter(channels=["release", "beta"])
         assert filter.to_jexl(self.create_revision()) == 'normandy.channel in ["release","beta"]'
 
+    def test_validation_loads_the_reference_data_once(self):
+        for slug in ["release", "beta", "nightly"]:
+            ChannelFactory(slug=slug)
+        with CaptureQueriesContext(connection) as queries:
+            filters.ChannelFilter.create(channels=["release", "beta", "nightly"])
+            filters.ChannelFilter.create(channels=["release"])
+        # One query for each reference table, not one per channel.
+        assert len(queries) == 4
+
+    def test_unknown_channels_are_rejected(self):
+        ChannelFactory(slug="release")
+        with pytest.raises(AssertionError):
+            filters.ChannelFilter.create(channels=["release", "aurora"])
+
 
 class TestLocaleFilter(FilterTestsBase):
     def create_basic_filter(self, locales=None):
@@ -652,3 +670,29 @@ class TestQaOnlyFilter(FilterTestsBase):
             filter.to_jexl(rev)
             == f"\"{slug}\" in 'app.normandy.testing-for-recipes'|preferenceValue"
         )
+
+
+class TestFromData:
+    def test_it_builds_filters_by_type(self):
+        filter = filters.from_data({"type": "channel", "channels": ["release"]})
+        assert isinstance(filter, filters.ChannelFilter)
+        assert filter.initial_data == {"type": "channel", "channels": ["release"]}
+
+    def test_it_reuses_filters_with_the_same_content(self):
+        a = filters.from_data({"type": "channel", "channels": ["beta"]})
+        b = filters.from_data({"channels": ["beta"], "type": "channel"})
+        c = filters.from_data({"type": "channel", "channels": ["nightly"]})
+        assert a is b
+        assert a is not c
+
+    def test_it_rejects_unknown_types(self):
+        with pytest.raises(ValueError):
+            filters.from_data({"type": "not-a-filter"})
+
+    def test_from_json_builds_each_filter(self):
+        filter_object_json = json.dumps(
+            [{"type": "channel", "channels": ["beta"]}, {"type": "locale", "locales": ["en-US"]}]
+        )
+        parsed = filters.from_json(filter_object_json)
+        assert [type(f) for f in parsed] == [filters.ChannelFilter, filters.LocaleFilter]
+        assert parsed[0] is filters.from_data({"type": "channel", "channels": ["beta"]})
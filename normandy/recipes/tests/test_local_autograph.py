@@ -0,0 +1,60 @@
+import requests
+
+import pytest
+from django.core.management import call_command
+
+from normandy.base.tests import UserFactory
+from normandy.recipes import checks, signing
+from normandy.recipes.models import Recipe
+from normandy.recipes.tests import ActionFactory, RecipeFactory
+
+
+class TestLocalAutograph(object):
+    def test_signatures_verify_against_its_certificate_chain(self, local_autograph):
+        autographer = signing.Autographer()
+        signatures = autographer.sign_data([b"first", b"second"])
+
+        assert [s["x5u"] for s in signatures] == [local_autograph.x5u] * 2
+        assert signing.verify_signature_x5u(
+            b"first", signatures[0]["signature"], signatures[0]["x5u"]
+        )
+        with pytest.raises(signing.SignatureDoesNotMatch):
+            signing.verify_signature_x5u(
+                b"first", signatures[1]["signature"], signatures[1]["x5u"]
+            )
+
+    def test_it_requires_hawk_authentication(self, local_autograph):
+        res = requests.post(f"{local_autograph.url}sign/data", json=[{"input": ""}])
+        assert res.status_code == 401
+
+    def test_it_counts_signing_requests(self, local_autograph, settings):
+        settings.AUTOGRAPH_SIGNING_BATCH_SIZE = 2
+        signing.Autographer().sign_data([b"a", b"b", b"c"])
+        assert local_autograph.requests_count == 2
+
+
+@pytest.mark.django_db
+class TestSigningEndToEnd(object):
+    def test_signed_recipes_and_actions_pass_the_checks(self, local_autograph):
+        action = ActionFactory(signed=False)
+        RecipeFactory(approver=UserFactory(), enabler=UserFactory(), action=action)
+        call_command("update_signatures")
+
+        assert Recipe.objects.filter(signature=None).count() == 0
+        assert checks.signatures_use_good_certificates(None) == []
+        assert checks.recipe_signatures_are_correct(None) == []
+        assert checks.action_signatures_are_correct(None) == []
+
+
+class TestRunLocalAutograph(object):
+    def test_it_prints_the_settings_to_use(self, mocker, capsys):
+        mock_serve = mocker.patch(
+            "normandy.recipes.local_autograph.ThreadingHTTPServer.serve_forever",
+            side_effect=KeyboardInterrupt,
+        )
+        call_command("run_local_autograph", "--port", "0")
+
+        mock_serve.assert_called_once()
+        out = capsys.readouterr().out
+        assert "DJANGO_AUTOGRAPH_URL=http://127.0.0.1:" in out
+        assert "DJANGO_CERTIFICATES_EXPECTED_ROOT_HASH=" in out
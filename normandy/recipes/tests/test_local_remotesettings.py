@@ -0,0 +1,122 @@
+import time
+
+import kinto_http
+import pytest
+from django.core.management import call_command
+
+from normandy.base.tests import UserFactory
+from normandy.recipes import exports
+from normandy.recipes.models import PublishedRecord
+from normandy.recipes.tests import RecipeFactory
+
+
+@pytest.mark.django_db
+class TestLocalRemoteSettings(object):
+    def published_ids(self, local_remotesettings):
+        return sorted(r["id"] for r in local_remotesettings.published_records())
+
+    def test_the_configuration_checks_pass(self, local_remotesettings):
+        exports.RemoteSettings().check_config()
+
+    def test_it_publishes_approved_records(self, local_remotesettings):
+        recipe = RecipeFactory(approver=UserFactory(), signed=True)
+        remote_settings = exports.RemoteSettings()
+
+        remote_settings.publish(recipe)
+        assert self.published_ids(local_remotesettings) == [str(recipe.id)]
+        assert remote_settings.published_recipes() == local_remotesettings.published_records()
+
+        remote_settings.unpublish(recipe)
+        assert self.published_ids(local_remotesettings) == []
+
+    def test_publish_many_sends_batches_and_approves_once(self, local_remotesettings):
+        local_remotesettings.batch_max_requests = 2
+        recipes = RecipeFactory.create_batch(5, approver=UserFactory(), signed=True)
+
+        exports.RemoteSettings().publish_many(recipes)
+
+        assert local_remotesettings.requests.count(("POST", "/batch")) == 3
+        assert [r for r in local_remotesettings.requests if r[0] == "PATCH"] == [
+            ("PATCH", "/buckets/main-workspace/collections/normandy-recipes-capabilities")
+        ]
+        assert self.published_ids(local_remotesettings) == sorted(str(r.id) for r in recipes)
+
+    def test_unpublish_many_ignores_missing_records(self, local_remotesettings):
+        published, missing = RecipeFactory.create_batch(2, approver=UserFactory(), signed=True)
+        remote_settings = exports.RemoteSettings()
+        remote_settings.publish(published)
+
+        remote_settings.unpublish_many([published, missing])
+
+        assert self.published_ids(local_remotesettings) == []
+
+    def test_changes_are_rolled_back_if_approval_fails(self, local_remotesettings):
+        first, second = RecipeFactory.create_batch(2, approver=UserFactory(), signed=True)
+        remote_settings = exports.RemoteSettings()
+        remote_settings.publish(first)
+
+        local_remotesettings.fail("PATCH", "/collections/normandy-recipes-capabilities$")
+        with pytest.raises(kinto_http.KintoException):
+            remote_settings.publish(second)
+
+        workspace = local_remotesettings.records("main-workspace", "normandy-recipes-capabilities")
+        assert [r["id"] for r in workspace] == [str(first.id)]
+        assert self.published_ids(local_remotesettings) == [str(first.id)]
+
+    def test_failed_approvals_are_not_remembered_as_published(self, local_remotesettings):
+        published, new = RecipeFactory.create_batch(2, approver=UserFactory(), signed=True)
+        remote_settings = exports.RemoteSettings()
+        remote_settings.publish(published)
+        published_hash = PublishedRecord.objects.get(recipe_id=published.id).record_hash
+        PublishedRecord.objects.filter(recipe_id=new.id).delete()
+        published.signature.signature = "a new signature"
+        published.signature.save()
+
+        local_remotesettings.fail("PATCH", "/collections/normandy-recipes-capabilities$")
+        with pytest.raises(kinto_http.KintoException):
+            remote_settings.publish_many([published, new])
+        assert PublishedRecord.objects.get(recipe_id=published.id).record_hash == published_hash
+        assert not PublishedRecord.objects.filter(recipe_id=new.id).exists()
+
+        local_remotesettings.fail("PATCH", "/collections/normandy-recipes-capabilities$")
+        with pytest.raises(kinto_http.KintoException):
+            remote_settings.unpublish(published)
+        assert PublishedRecord.objects.filter(recipe_id=published.id).exists()
+
+    def test_batched_requests_can_fail_individually(self, local_remotesettings):
+        recipes = RecipeFactory.create_batch(2, approver=UserFactory(), signed=True)
+        local_remotesettings.fail("PUT", f"/records/{recipes[1].id}$", status=403)
+
+        with pytest.raises(kinto_http.KintoBatchException):
+            exports.RemoteSettings().publish_many(recipes)
+
+    def test_it_adds_latency(self, local_remotesettings):
+        local_remotesettings.latency = 0.05
+        start = time.monotonic()
+        exports.RemoteSettings().client.server_info()
+        assert time.monotonic() - start >= 0.05
+
+    def test_sync_remote_settings_uses_changes_since_the_last_sync(self, local_remotesettings):
+        recipe = RecipeFactory(approver=UserFactory(), enabler=UserFactory(), signed=True)
+        call_command("sync_remote_settings")
+        assert self.published_ids(local_remotesettings) == [str(recipe.id)]
+
+        del local_remotesettings.requests[:]
+        call_command("sync_remote_settings")
+        records_requests = [r for r in local_remotesettings.requests if r[1].endswith("/records")]
+        assert records_requests == [
+            ("GET", "/buckets/main/collections/normandy-recipes-capabilities/records")
+        ]
+        assert not [r for r in local_remotesettings.requests if r[0] != "GET"]
+
+
+class TestRunLocalRemoteSettings(object):
+    def test_it_prints_the_settings_to_use(self, mocker, capsys):
+        mock_serve = mocker.patch(
+            "normandy.recipes.local_remotesettings.ThreadingHTTPServer.serve_forever",
+            side_effect=KeyboardInterrupt,
+        )
+        call_command("run_local_remotesettings", "--port", "0", "--latency", "0.1")
+
+        mock_serve.assert_called_once()
+        assert "DJANGO_REMOTE_SETTINGS_URL=http://127.0.0.1:" in capsys.readouterr().out
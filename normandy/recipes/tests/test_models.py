@@ -1,7 +1,10 @@
 import json
+from decimal import Decimal
 from unittest.mock import patch
 
 from django.core.exceptions import ImproperlyConfigured, ValidationError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 
 import pytest
 from rest_framework import serializers
@@ -9,26 +12,37 @@ from kinto_http import exceptions as remote_settings_exceptions
 
 from normandy.base.tests import UserFactory, Whatever
 from normandy.recipes.models import (
+    Action,
     ApprovalRequest,
+    Channel,
     Client,
     EnabledState,
     INFO_CREATE_REVISION,
     INFO_REQUESTING_RECIPE_SIGNATURES,
     INFO_REQUESTING_ACTION_SIGNATURES,
+    Locale,
+    OutboxEvent,
     Recipe,
     RecipeRevision,
+    ReferenceData,
+    ReferenceDataVersion,
+    UniqueArgumentValue,
     WARNING_BYPASSING_PEER_APPROVAL,
 )
 from normandy.recipes.tests import (
     ActionFactory,
     ApprovalRequestFactory,
+    ChannelFactory,
+    CountryFactory,
     fake_sign,
+    LocaleFactory,
     MultiPreferenceExperimentArgumentsFactory,
     OptOutStudyArgumentsFactory,
     PreferenceExperimentArgumentsFactory,
     RecipeFactory,
     RecipeRevisionFactory,
     SignatureFactory,
+    WindowsVersionFactory,
 )
 from normandy.recipes.filters import StableSampleFilter
 
@@ -365,6 +379,127 @@ class TestArgumentValidation(object):
             )
 
 
+@pytest.mark.django_db
+class TestUniqueArgumentValues(object):
+    def values(self):
+        return list(UniqueArgumentValue.objects.values_list("recipe_id", "key", "value"))
+
+    def test_it_follows_the_latest_revision(self):
+        action = ActionFactory(name="opt-out-study")
+        recipe = RecipeFactory(action=action, arguments=OptOutStudyArgumentsFactory(name="a"))
+        assert self.values() == [(recipe.id, "name", '"a"')]
+
+        recipe.revise(arguments=OptOutStudyArgumentsFactory(name="b"))
+        assert self.values() == [(recipe.id, "name", '"b"')]
+
+        recipe.delete()
+        assert self.values() == []
+
+    def test_actions_without_unique_arguments_are_not_indexed(self):
+        RecipeFactory(action=ActionFactory(name="console-log"))
+        assert self.values() == []
+
+    def test_values_of_different_types_are_distinct(self):
+        action = ActionFactory(name="show-heartbeat")
+        RecipeFactory(action=action, arguments={"surveyId": 1})
+        revision = RecipeRevisionFactory.build()
+
+        assert action.argument_value_is_taken("surveyId", 1, revision)
+        assert not action.argument_value_is_taken("surveyId", "1", revision)
+
+    def test_long_values_are_indexed(self):
+        action = ActionFactory(name="opt-out-study")
+        name = "a" * 10000
+        recipe = RecipeFactory(action=action, arguments=OptOutStudyArgumentsFactory(name=name))
+        assert self.values() == [(recipe.id, "name", f'"{name}"')]
+
+        with pytest.raises(serializers.ValidationError):
+            RecipeFactory(action=action, arguments=OptOutStudyArgumentsFactory(name=name))
+
+    def test_validation_does_not_load_other_recipes(self):
+        action = ActionFactory(name="opt-out-study")
+        for name in ["a", "b", "c"]:
+            RecipeFactory(action=action, arguments=OptOutStudyArgumentsFactory(name=name))
+
+        arguments = OptOutStudyArgumentsFactory(name="d")
+        revision = RecipeRevisionFactory.build()
+        with CaptureQueriesContext(connection) as queries:
+            action.validate_arguments(arguments, revision)
+        assert len(queries) == 1
+
+    def test_concurrent_duplicates_are_rejected(self, mocker):
+        action = ActionFactory(name="opt-out-study")
+        arguments = OptOutStudyArgumentsFactory(name="a")
+        RecipeFactory(action=action, arguments=arguments)
+
+        # Pretend the other recipe was saved after this one was validated.
+        mocker.patch.object(Action, "argument_value_is_taken", return_value=False)
+        with pytest.raises(serializers.ValidationError) as exc_info:
+            RecipeFactory(action=action, arguments=arguments)
+        error = action.errors["duplicate_study_name"]
+        assert exc_info.value.detail == {"arguments": {"name": error}}
+
+
+@pytest.mark.django_db
+class TestReferenceData(object):
+    def test_it_loads_all_tables(self):
+        channel = ChannelFactory()
+        country = CountryFactory()
+        locale = LocaleFactory()
+        windows_version = WindowsVersionFactory(nt_version=Decimal("6.1"))
+
+        reference_data = ReferenceData.get()
+        assert reference_data.channels == {channel.slug: channel.name}
+        assert reference_data.countries == {country.code: country.name}
+        assert reference_data.locales == {locale.code: locale.name}
+        assert list(reference_data.windows_versions) == [windows_version.nt_version]
+
+    def test_it_is_loaded_once(self):
+        ChannelFactory()
+        ReferenceData.get()
+        with CaptureQueriesContext(connection) as queries:
+            ReferenceData.get()
+        assert len(queries) == 0
+
+    def test_changes_invalidate_it(self):
+        channel = ChannelFactory(name="Beta")
+        assert ReferenceData.get().channels == {channel.slug: "Beta"}
+
+        channel.name = "Aurora"
+        channel.save()
+        assert ReferenceData.get().channels == {channel.slug: "Aurora"}
+
+        channel.delete()
+        assert ReferenceData.get().channels == {}
+
+    def test_it_is_reloaded_when_the_shared_version_changes(self, settings):
+        settings.REFERENCE_DATA_CHECK_INTERVAL = 0
+        locale = LocaleFactory(name="English")
+        ReferenceData.get()
+
+        # Updates through querysets don't send signals, like changes made
+        # by another process.
+        Locale.objects.filter(id=locale.id).update(name="English (US)")
+        assert ReferenceData.get().locales == {locale.code: "English"}
+
+        ReferenceDataVersion.bump()
+        assert ReferenceData.get().locales == {locale.code: "English (US)"}
+
+    def test_it_checks_the_shared_version_after_the_interval(self, settings, mocker):
+        settings.REFERENCE_DATA_CHECK_INTERVAL = 5
+        monotonic = mocker.patch("normandy.recipes.models.time.monotonic", return_value=100)
+        locale = LocaleFactory(name="English")
+        ReferenceData.get()
+
+        Locale.objects.filter(id=locale.id).update(name="English (US)")
+        ReferenceDataVersion.bump()
+        monotonic.return_value = 104
+        assert ReferenceData.get().locales == {locale.code: "English"}
+
+        monotonic.return_value = 105
+        assert ReferenceData.get().locales == {locale.code: "English (US)"}
+
+
 @pytest.mark.django_db
 class TestValidateArgumentShowHeartbeat(object):
     """
@@ -478,6 +613,72 @@ class TestRecipe(object):
         r = RecipeFactory(extra_filter_expression="2 + 2 == 4", filter_object_json=None)
         assert r.latest_revision.filter_expression == "2 + 2 == 4"
 
+    def test_filter_expression_is_stored(self):
+        channel = ChannelFactory(slug="release")
+        recipe = RecipeFactory(extra_filter_expression="2 + 2 == 4", filter_object_json=None)
+        recipe.revise(channels=[channel])
+
+        revision = RecipeRevision.objects.get(id=recipe.latest_revision.id)
+        expected = "(normandy.channel in ['release']) && (2 + 2 == 4)"
+        assert revision.compiled_filter_expression == expected
+        with CaptureQueriesContext(connection) as queries:
+            assert revision.filter_expression == expected
+        assert len(queries) == 0
+
+        revision.channels.remove(channel)
+        revision = RecipeRevision.objects.get(id=revision.id)
+        assert revision.compiled_filter_expression == "2 + 2 == 4"
+
+    def test_filter_expression_follows_reverse_clears(self):
+        channel = ChannelFactory(slug="release")
+        recipe = RecipeFactory(extra_filter_expression="2 + 2 == 4", filter_object_json=None)
+        recipe.revise(channels=[channel])
+
+        channel.reciperevision_set.clear()
+        revision = RecipeRevision.objects.get(id=recipe.latest_revision.id)
+        assert revision.compiled_filter_expression == "2 + 2 == 4"
+
+    def test_filter_expression_follows_reference_data(self):
+        channel = ChannelFactory(slug="release")
+        locale = LocaleFactory(code="en-US")
+        recipe = RecipeFactory(extra_filter_expression="", filter_object_json=None)
+        recipe.revise(channels=[channel], locales=[locale])
+        revision_id = recipe.latest_revision.id
+
+        channel.slug = "beta"
+        channel.save()
+        revision = RecipeRevision.objects.get(id=revision_id)
+        expected = "(normandy.locale in ['en-US']) && (normandy.channel in ['beta'])"
+        assert revision.compiled_filter_expression == expected
+
+        locale.delete()
+        revision = RecipeRevision.objects.get(id=revision_id)
+        assert revision.compiled_filter_expression == "normandy.channel in ['beta']"
+
+    def test_filter_expression_is_kept_when_reference_data_names_change(self, mocker):
+        channel = ChannelFactory(slug="release")
+        recipe = RecipeFactory()
+        recipe.revise(channels=[channel])
+        update = mocker.patch.object(RecipeRevision, "update_derived_fields")
+
+        channel.name = "Release"
+        channel.save()
+        Channel.objects.update_or_create(slug="release", defaults={"name": "Release"})
+        assert not update.called
+
+    def test_revise_compiles_each_relation_once(self, mocker):
+        channels = [ChannelFactory(), ChannelFactory(), ChannelFactory()]
+        recipe = RecipeFactory()
+        update = mocker.patch.object(
+            RecipeRevision,
+            "update_derived_fields",
+            autospec=True,
+            side_effect=RecipeRevision.update_derived_fields,
+        )
+        recipe.revise(channels=channels, locales=[LocaleFactory()])
+        # Once after the revision is inserted, then once for each relation
+        assert update.call_count == 3
+
     def test_canonical_json(self):
         recipe = RecipeFactory(
             action=ActionFactory(name="action"),
@@ -642,6 +843,51 @@ class TestRecipe(object):
         recipe.revise(name="my name", force=True)
         assert revision_id != recipe.latest_revision.id
 
+    def test_recipe_doesnt_revise_when_relations_are_unchanged(self):
+        channels = [ChannelFactory(slug="beta"), ChannelFactory(slug="release")]
+        recipe = RecipeFactory()
+        recipe.revise(channels=channels, countries=[CountryFactory()])
+        revision_id = recipe.latest_revision.id
+
+        recipe.revise(channels=list(reversed(channels)))
+        assert recipe.latest_revision.id == revision_id
+
+        recipe.revise(channels=channels[:1])
+        assert recipe.latest_revision.id != revision_id
+        assert list(recipe.latest_revision.channels.all()) == channels[:1]
+
+    def test_recipe_revises_when_the_user_changes(self):
+        recipe = RecipeFactory(name="my name")
+        revision_id = recipe.latest_revision.id
+        user = UserFactory()
+
+        recipe.revise(name="my name", user=user)
+        assert recipe.latest_revision.id != revision_id
+        revision_id = recipe.latest_revision.id
+
+        recipe.revise(name="my name", user=user)
+        assert recipe.latest_revision.id == revision_id
+
+    def test_change_detection_uses_the_content_hash(self):
+        recipe = RecipeFactory(name="my name")
+        recipe.revise(channels=[ChannelFactory()])
+        recipe = Recipe.objects.select_related("latest_revision").get(id=recipe.id)
+        with CaptureQueriesContext(connection) as queries:
+            recipe.revise(name="my name")
+        # Comparing the stored hash, not filtering on every column.
+        assert not any("COUNT" in query["sql"] for query in queries)
+
+    def test_change_detection_only_reads_the_stored_hash(self):
+        recipe = RecipeFactory(name="my name")
+        revision_id = recipe.latest_revision.id
+        recipe = Recipe.objects.select_related("latest_revision").get(id=recipe.id)
+        with CaptureQueriesContext(connection) as queries:
+            recipe.revise(name="my name", channels=[], countries=[], locales=[])
+        assert recipe.latest_revision.id == revision_id
+        selects = [query["sql"] for query in queries if query["sql"].startswith("SELECT")]
+        assert len(selects) == 1
+        assert "content_hash" in selects[0]
+
     def test_update_logging(self, mock_logger):
         recipe = RecipeFactory(name="my name")
         recipe.revise(name="my name", force=True)
@@ -768,6 +1014,12 @@ class TestRecipeRevision(object):
         with pytest.raises(EnabledState.NotActionable):
             recipe.latest_revision.disable(user=UserFactory())
 
+    def test_filter_object_data_is_stored(self):
+        filter_object = StableSampleFilter.create(input=["A"], rate=0.1)
+        recipe = RecipeFactory(filter_object=[filter_object])
+        revision = RecipeRevision.objects.get(id=recipe.latest_revision.id)
+        assert revision.filter_object_data == json.loads(revision.filter_object_json)
+
     @pytest.mark.django_db
     class TestRemoteSettings:
         def test_it_publishes_when_enabled(self, mocked_remotesettings):
@@ -828,6 +1080,20 @@ class TestRecipeRevision(object):
             assert mocked_remotesettings.return_value.unpublish.call_count == 1
             assert mocked_remotesettings.return_value.publish.call_count == 2
 
+        def test_it_queues_publishing_if_outbox_is_enabled(
+            self, settings, mocked_autograph, mocked_remotesettings
+        ):
+            settings.RECIPE_OUTBOX_ENABLED = True
+            recipe = RecipeFactory(name="Test", approver=UserFactory())
+            mocked_autograph.return_value.sign_data.reset_mock()
+
+            recipe.approved_revision.enable(user=UserFactory())
+
+            assert not mocked_remotesettings.return_value.publish.called
+            assert not mocked_autograph.return_value.sign_data.called
+            kinds = set(recipe.outbox_events.values_list("kind", flat=True))
+            assert kinds == {OutboxEvent.SIGN, OutboxEvent.PUBLISH}
+
         def test_it_does_not_rollback_changes_if_rs_error_happens_on_publish(
             self, mocked_remotesettings
         ):
@@ -920,6 +1186,17 @@ class TestRecipeRevision(object):
             assert filter_object.get_capabilities()
             assert filter_object.get_capabilities() <= recipe.latest_revision.capabilities
 
+        def test_required_capabilities_are_stored(self, settings):
+            filter_object = StableSampleFilter.create(input=["A"], rate=0.1)
+            recipe = RecipeFactory(extra_capabilities=["test.foo"], filter_object=[filter_object])
+            revision = RecipeRevision.objects.get(id=recipe.latest_revision.id)
+            assert set(revision.required_capabilities) == (
+                recipe.latest_revision.capabilities - {"capabilities-v1"}
+            )
+            # The stored capabilities don't depend on the baseline
+            settings.BASELINE_CAPABILITIES |= set(revision.required_capabilities)
+            assert "capabilities-v1" not in revision.capabilities
+
 
 @pytest.mark.django_db
 class TestApprovalRequest(object):
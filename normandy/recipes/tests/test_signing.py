@@ -1,12 +1,17 @@
 import base64
 import os
+import time
 from datetime import datetime, timedelta
 from unittest.mock import MagicMock, call
 
+from django.core.cache import cache
 from django.core.exceptions import ImproperlyConfigured
 
 import pytest
 import pytz
+import requests
+from markus import INCR, TIMING
+from markus.testing import MetricsMock
 from pyasn1.type import useful as pyasn1_useful
 from pyasn1_modules import rfc5280
 
@@ -135,6 +140,120 @@ class TestAutographer(object):
             ]
         )
 
+    def test_it_signs_in_batches(self, settings):
+        settings.AUTOGRAPH_URL = "https://autograph.example.com/"
+        settings.AUTOGRAPH_HAWK_ID = "hawk id"
+        settings.AUTOGRAPH_HAWK_SECRET_KEY = "hawk secret key"
+        settings.AUTOGRAPH_SIGNING_BATCH_SIZE = 2
+
+        autographer = signing.Autographer()
+        autographer.session = MagicMock()
+
+        def fake_post(url, json, timeout):
+            response = MagicMock()
+            response.json.return_value = [
+                {"ref": "ref", "signature": item["input"], "x5u": "https://example.com/x5u"}
+                for item in json
+            ]
+            return response
+
+        autographer.session.post.side_effect = fake_post
+
+        items = [b"one", b"two", b"three", b"four", b"five"]
+        signatures = autographer.sign_data(items)
+
+        assert [len(c[1]["json"]) for c in autographer.session.post.call_args_list] == [2, 2, 1]
+        assert [s["signature"] for s in signatures] == [
+            base64.b64encode(item).decode() for item in items
+        ]
+
+
+class TestAutographerConnections(object):
+    url = "https://autograph.example.com/"
+
+    @pytest.fixture(autouse=True)
+    def autograph_settings(self, settings):
+        settings.AUTOGRAPH_URL = self.url
+        settings.AUTOGRAPH_HAWK_ID = "hawk id"
+        settings.AUTOGRAPH_HAWK_SECRET_KEY = "hawk secret key"
+        settings.AUTOGRAPH_RETRIES = 2
+        settings.AUTOGRAPH_RETRY_BACKOFF = 0
+        settings.AUTOGRAPH_CIRCUIT_BREAKER_THRESHOLD = 2
+        settings.AUTOGRAPH_CIRCUIT_BREAKER_RESET_TIMEOUT = 60
+        signing.reset_autograph_connections()
+        yield settings
+        signing.reset_autograph_connections()
+
+    def signed(self, request, context):
+        return [
+            {"ref": "ref", "signature": item["input"], "x5u": "https://example.com/x5u"}
+            for item in request.json()
+        ]
+
+    def test_the_session_is_shared(self):
+        first, second = signing.Autographer(), signing.Autographer()
+        assert first.session is second.session
+        assert first.circuit_breaker is second.circuit_breaker
+
+    def test_it_uses_timeouts(self, settings, requestsmock):
+        settings.AUTOGRAPH_CONNECT_TIMEOUT = 1.5
+        settings.AUTOGRAPH_READ_TIMEOUT = 10
+        requestsmock.post(self.url + "sign/data", json=self.signed)
+
+        signing.Autographer().sign_data([b"foo"])
+
+        assert requestsmock.last_request.timeout == (1.5, 10)
+
+    def test_it_retries_server_errors(self, requestsmock):
+        requestsmock.post(
+            self.url + "sign/data",
+            [{"status_code": 503}, {"exc": requests.ConnectionError}, {"json": self.signed}],
+        )
+
+        signatures = signing.Autographer().sign_data([b"foo"])
+
+        assert requestsmock.call_count == 3
+        assert signatures[0]["signature"] == base64.b64encode(b"foo").decode()
+
+    def test_it_does_not_retry_client_errors(self, requestsmock):
+        requestsmock.post(self.url + "sign/data", status_code=400)
+
+        with pytest.raises(requests.HTTPError):
+            signing.Autographer().sign_data([b"foo"])
+        assert requestsmock.call_count == 1
+
+    def test_it_fails_fast_while_autograph_is_down(self, mocker, requestsmock):
+        requestsmock.post(self.url + "sign/data", status_code=503)
+        autographer = signing.Autographer()
+
+        for _ in range(2):
+            with pytest.raises(requests.HTTPError):
+                autographer.sign_data([b"foo"])
+        assert requestsmock.call_count == 6
+
+        with pytest.raises(signing.AutographUnavailable):
+            autographer.sign_data([b"foo"])
+        assert requestsmock.call_count == 6
+
+        # After the reset timeout, one request checks if Autograph is back.
+        mock_time = mocker.patch("normandy.recipes.signing.time")
+        mock_time.monotonic.return_value = time.monotonic() + 61
+        requestsmock.post(self.url + "sign/data", json=self.signed)
+        assert autographer.sign_data([b"foo"])
+        assert autographer.circuit_breaker.allow()
+
+    def test_it_records_metrics(self, requestsmock):
+        requestsmock.post(self.url + "sign/data", [{"status_code": 502}, {"json": self.signed}])
+
+        with MetricsMock() as mm:
+            signing.Autographer().sign_data([b"foo"])
+
+        assert len(mm.filter_records(TIMING, stat="normandy.autograph.request")) == 2
+        assert mm.has_record(TIMING, stat="normandy.autograph.request", tags=["result:ok"])
+        assert mm.has_record(
+            INCR, stat="normandy.autograph.error", value=1, tags=["reason:http_502"]
+        )
+
 
 class TestVerifySignaturePubkey(object):
 
@@ -166,6 +285,35 @@ class TestVerifySignaturePubkey(object):
             signing.verify_signature_pubkey(self.data, signature, self.pubkey)
 
 
+class TestVerifyMany(object):
+    data = TestVerifySignaturePubkey.data
+    signature = TestVerifySignaturePubkey.signature
+    pubkey = TestVerifySignaturePubkey.pubkey
+
+    def test_it_reports_results_per_item(self):
+        results = signing.verify_many(
+            [
+                (self.data, self.signature, self.pubkey),
+                (self.data + "tampered", self.signature, self.pubkey),
+                (self.data, "aa==", self.pubkey),
+            ]
+        )
+
+        assert results[0] is None
+        assert isinstance(results[1], signing.SignatureDoesNotMatch)
+        assert isinstance(results[2], signing.WrongSignatureSize)
+
+    def test_it_decodes_each_public_key_once(self, mocker):
+        signing.decode_public_key.cache_clear()
+        decode = mocker.spy(signing.PEMEncoder, "decode_public_key")
+
+        results = signing.verify_many([(self.data, self.signature, self.pubkey)] * 3)
+        assert signing.verify_signature_pubkey(self.data, self.signature, self.pubkey)
+
+        assert results == [None, None, None]
+        assert decode.call_count == 1
+
+
 class TestVerifySignatureX5U(object):
     def test_happy_path(self, mocker):
         mock_verify_x5u = mocker.patch("normandy.recipes.signing.verify_x5u")
@@ -195,6 +343,52 @@ class TestVerifySignatureX5U(object):
         assert ret == mock_verify_signature_pubkey.return_value
 
 
+class TestVerifySignatures(object):
+    good = (TestVerifySignaturePubkey.data, TestVerifySignaturePubkey.signature)
+    pubkey = TestVerifySignaturePubkey.pubkey
+
+    def test_it_verifies_each_chain_once(self, mocker, settings):
+        settings.SIGNATURE_VERIFICATION_WORKERS = 1
+        mock_get_public_key = mocker.patch("normandy.recipes.signing.get_x5u_public_key")
+        mock_get_public_key.return_value = self.pubkey
+        x5u = "https://example.com/cert"
+
+        results = signing.verify_signatures([(*self.good, x5u, None)] * 3)
+
+        assert results == [None, None, None]
+        mock_get_public_key.assert_called_once_with(x5u)
+
+    def test_it_reports_errors_per_item(self, mocker, settings):
+        settings.SIGNATURE_VERIFICATION_WORKERS = 1
+        mock_get_public_key = mocker.patch("normandy.recipes.signing.get_x5u_public_key")
+        mock_get_public_key.side_effect = signing.BadCertificate("testing exception")
+        data, signature = self.good
+
+        results = signing.verify_signatures(
+            [
+                (data, signature, None, self.pubkey),
+                (data + "tampered", signature, None, self.pubkey),
+                (data, signature, "https://example.com/bad-cert", None),
+            ]
+        )
+
+        assert results[0] is None
+        assert isinstance(results[1], signing.SignatureDoesNotMatch)
+        assert isinstance(results[2], signing.BadCertificate)
+
+    def test_it_verifies_in_several_processes(self, settings):
+        settings.SIGNATURE_VERIFICATION_WORKERS = 2
+        data, signature = self.good
+
+        results = signing.verify_signatures(
+            [(data, signature, None, self.pubkey)] * 3
+            + [(data + "tampered", signature, None, self.pubkey)]
+        )
+
+        assert results[:3] == [None, None, None]
+        assert isinstance(results[3], signing.SignatureDoesNotMatch)
+
+
 class TestExtractCertsFromPem(object):
     def test_empty(self):
         assert signing.extract_certs_from_pem("") == []
@@ -414,6 +608,69 @@ class TestVerifyX5u(object):
         with pytest.raises(signing.CertificateHasWrongSubject):
             signing.verify_x5u("https://example.com/cert.pem")
 
+    def _mock_chain(self, mocker, pem, not_after):
+        mock_requests = mocker.patch("normandy.recipes.signing.requests")
+        mock_requests.get.return_value.content.decode.return_value = pem
+        mocker.patch("normandy.recipes.signing.extract_certs_from_pem", return_value=[b"a"])
+        now = datetime.now().replace(tzinfo=pytz.UTC)
+        fake_cert = self._fake_cert(not_before=now - timedelta(days=1), not_after=not_after)
+        return mocker.patch("normandy.recipes.signing.parse_cert_from_der", return_value=fake_cert)
+
+    def test_it_reuses_verified_chains(self, mocker, settings):
+        settings.CERTIFICATES_CHECK_VALIDITY = True
+        settings.CERTIFICATES_EXPECTED_ROOT_HASH = None
+        settings.CERTIFICATES_EXPECTED_SUBJECT_CN = None
+        settings.X5U_CACHE_TIME = 600
+        url = "https://example.com/reused-cert.pem"
+        now = datetime.now().replace(tzinfo=pytz.UTC)
+        mock_parse_cert_from_der = self._mock_chain(mocker, "pem", now + timedelta(days=10))
+
+        cert = signing.verify_x5u(url)
+        assert signing.verify_x5u(url) is cert
+        assert mock_parse_cert_from_der.call_count == 1
+
+        signing.reset_verified_chains()
+        signing.verify_x5u(url)
+        assert mock_parse_cert_from_der.call_count == 2
+
+        # Different settings are verified separately
+        settings.CERTIFICATES_EXPECTED_ROOT_HASH = "CO:FF:EE"
+        with pytest.raises(signing.CertificateHasWrongRoot):
+            signing.verify_x5u(url)
+        assert mock_parse_cert_from_der.call_count == 3
+
+    def test_it_verifies_changed_chains_again(self, mocker, settings):
+        settings.CERTIFICATES_CHECK_VALIDITY = True
+        settings.CERTIFICATES_EXPECTED_ROOT_HASH = None
+        settings.CERTIFICATES_EXPECTED_SUBJECT_CN = None
+        settings.X5U_CACHE_TIME = 600
+        url = "https://example.com/changed-cert.pem"
+        now = datetime.now().replace(tzinfo=pytz.UTC)
+        mock_parse_cert_from_der = self._mock_chain(mocker, "pem", now + timedelta(days=10))
+        signing.verify_x5u(url)
+
+        cache.delete(f"fetch-x5u-pem::{url}")
+        mock_requests = mocker.patch("normandy.recipes.signing.requests")
+        mock_requests.get.return_value.content.decode.return_value = "new pem"
+        signing.verify_x5u(url)
+        assert mock_parse_cert_from_der.call_count == 2
+
+    def test_it_does_not_reuse_chains_past_their_expiry(self, mocker, settings):
+        settings.CERTIFICATES_CHECK_VALIDITY = True
+        settings.CERTIFICATES_EXPECTED_ROOT_HASH = None
+        settings.CERTIFICATES_EXPECTED_SUBJECT_CN = None
+        settings.X5U_CACHE_TIME = 60 * 60 * 24 * 30
+        url = "https://example.com/expiring-cert.pem"
+        now = datetime.utcnow()
+        self._mock_chain(mocker, "pem", (now + timedelta(days=3)).replace(tzinfo=pytz.UTC))
+        signing.verify_x5u(url, expire_early=timedelta(days=1))
+
+        # Two days later, the certificate is expiring soon
+        mock_datetime = mocker.patch("normandy.recipes.signing.datetime")
+        mock_datetime.utcnow.return_value = now + timedelta(days=2)
+        with pytest.raises(signing.CertificateExpiringSoon):
+            signing.verify_x5u(url, expire_early=timedelta(days=1))
+
 
 class TestReadTimestampObject(object):
     def test_it_reads_utc_time_format(self):
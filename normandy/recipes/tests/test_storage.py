@@ -1,7 +1,7 @@
 import pytest
 
 from normandy.base.tests import Whatever
-from normandy.recipes.models import Locale
+from normandy.recipes.models import CollectionVersion, Locale, ReferenceDataVersion
 from normandy.recipes.storage import ProductDetailsRelationalStorage, INFO_UPDATE_PRODUCT_DETAILS
 
 
@@ -38,3 +38,18 @@ class TestProductDetailsRelationalStorage(object):
         )
         assert Locale.objects.count() == 12
         assert Locale.objects.filter(code="en-US", name="English (US)").exists()
+
+    def test_unchanged_locales_change_no_versions(self, tmpdir):
+        storage = ProductDetailsRelationalStorage(json_dir=tmpdir.strpath)
+        storage.update("languages.json", LANGUAGES_JSON, "1999-01-01")
+        collection_version = CollectionVersion.get_current()
+        reference_data_version = ReferenceDataVersion.get_current()
+
+        storage.update("languages.json", LANGUAGES_JSON, "1999-01-02")
+        assert CollectionVersion.get_current() == collection_version
+        assert ReferenceDataVersion.get_current() == reference_data_version
+
+        changed = LANGUAGES_JSON.replace('"English":"Esperanto"', '"English":"Esperanto (eo)"')
+        storage.update("languages.json", changed, "1999-01-03")
+        assert Locale.objects.get(code="eo").name == "Esperanto (eo)"
+        assert CollectionVersion.get_current() > collection_version
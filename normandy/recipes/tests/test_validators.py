@@ -2,7 +2,8 @@ from django.core.exceptions import ValidationError
 
 import pytest
 
-from normandy.recipes.validators import validate_json
+from normandy.recipes.tests import ActionFactory
+from normandy.recipes.validators import get_arguments_validator, validate_json
 
 
 def test_validate_json():
@@ -10,3 +11,31 @@ def test_validate_json():
     validate_json('{"foo": 2, "bar": "bazz"}')
     with pytest.raises(ValidationError):
         validate_json('invalid_json"""""sadf')
+
+
+class TestGetArgumentsValidator(object):
+    schema_json = '{"type": "object", "required": ["slug"]}'
+
+    def test_it_reuses_validators(self):
+        validator = get_arguments_validator(1, self.schema_json)
+        assert get_arguments_validator(1, self.schema_json) is validator
+        assert get_arguments_validator(2, self.schema_json) is not validator
+        assert get_arguments_validator(1, '{"type": "object"}') is not validator
+
+    def test_it_validates_with_the_schema(self):
+        validator = get_arguments_validator(1, self.schema_json)
+        errors = list(validator.iter_errors({}))
+        assert [(e.message, list(e.path)) for e in errors] == [
+            ("This field is required.", ["slug"])
+        ]
+
+
+@pytest.mark.django_db
+def test_actions_use_the_validator_for_their_current_schema():
+    action = ActionFactory(arguments_schema={"type": "object"})
+    validator = action.arguments_validator
+    assert action.arguments_validator is validator
+
+    action.arguments_schema = {"type": "object", "required": ["slug"]}
+    assert action.arguments_validator is not validator
+    assert not action.arguments_validator.is_valid({})
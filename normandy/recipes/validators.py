@@ -1,4 +1,6 @@
 import json
+from functools import lru_cache
+
 import jsonschema
 
 from django.core.exceptions import ValidationError
@@ -21,6 +23,20 @@ JSONSchemaValidator = jsonschema.validators.extend(
     validator=jsonschema.validators.Draft4Validator, validators={"required": _required}
 )
 
+ARGUMENTS_VALIDATOR_CACHE_SIZE = 128
+
+
+@lru_cache(maxsize=ARGUMENTS_VALIDATOR_CACHE_SIZE)
+def get_arguments_validator(action_id, arguments_schema_json):
+    """
+    Get a validator for the arguments schema of an action.
+
+    Validators are cached per process by action and schema, so they are only
+    built again when the schema changes. Cached validators are shared, and
+    must not be modified.
+    """
+    return JSONSchemaValidator(json.loads(arguments_schema_json))
+
 
 def validate_json(value):
     """
@@ -355,11 +355,14 @@ class Base(Core, CORS, OIDC, Metrics):
     API_ROOT_CACHE_TIME = values.IntegerValue(60 * 60 * 24)
     API_CACHE_TIME = values.IntegerValue(30)
     API_CACHE_ENABLED = values.BooleanValue(True)
+    API_RESPONSE_CACHE_ENABLED = values.BooleanValue(False)
+    API_RESPONSE_CACHE_TIMEOUT = values.IntegerValue(60 * 60)
     PERMANENT_REDIRECT_CACHE_TIME = values.IntegerValue(60 * 60 * 24 * 30)
     HTTPS_REDIRECT_CACHE_TIME = values.IntegerValue(60 * 60 * 24 * 30)
     X5U_CACHE_TIME = values.IntegerValue(60 * 10)
     X5U_ERROR_CACHE_TIME = values.IntegerValue(5)
     X5U_REQUEST_TIMEOUT = values.IntegerValue(0.5)
+    REFERENCE_DATA_CHECK_INTERVAL = values.FloatValue(5)
 
     # If true, approvals must come from two separate users. If false, the same
     # user can approve their own request.
@@ -370,6 +373,13 @@ class Base(Core, CORS, OIDC, Metrics):
     AUTOGRAPH_HAWK_ID = values.Value()
     AUTOGRAPH_HAWK_SECRET_KEY = values.Value()
     AUTOGRAPH_SIGNATURE_MAX_AGE = values.IntegerValue(60 * 60 * 24 * 7)
+    AUTOGRAPH_SIGNING_BATCH_SIZE = values.IntegerValue(100)
+    AUTOGRAPH_CONNECT_TIMEOUT = values.FloatValue(5)
+    AUTOGRAPH_READ_TIMEOUT = values.FloatValue(30)
+    AUTOGRAPH_RETRIES = values.IntegerValue(2)
+    AUTOGRAPH_RETRY_BACKOFF = values.FloatValue(0.5)
+    AUTOGRAPH_CIRCUIT_BREAKER_THRESHOLD = values.IntegerValue(5)
+    AUTOGRAPH_CIRCUIT_BREAKER_RESET_TIMEOUT = values.IntegerValue(60)
     AUTOGRAPH_X5U_CACHE_BUST = values.Value(None)
     AUTOGRAPH_KEYID = values.Value(None)
 
@@ -382,8 +392,12 @@ class Base(Core, CORS, OIDC, Metrics):
     REMOTE_SETTINGS_CAPABILITIES_COLLECTION_ID = values.Value("normandy-recipes-capabilities")
     REMOTE_SETTINGS_RETRY_REQUESTS = values.IntegerValue(3)
 
+    RECIPE_OUTBOX_ENABLED = values.BooleanValue(False)
+    RECIPE_OUTBOX_MAX_ATTEMPTS = values.IntegerValue(5)
+
     # How many days before expiration to warn for expired certificates
     CERTIFICATES_EXPIRE_EARLY_DAYS = values.IntegerValue(None)
+    SIGNATURE_VERIFICATION_WORKERS = values.IntegerValue(1)
     CERTIFICATES_CHECK_VALIDITY = values.BooleanValue(True)
     CERTIFICATES_EXPECTED_ROOT_HASH = values.Value(None)
     CERTIFICATES_EXPECTED_SUBJECT_CN = values.Value("normandy.content-signature.mozilla.org")